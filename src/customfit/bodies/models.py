@@ -494,41 +494,12 @@ class Body(MeasurementSet, _HasBodyType):
     @property
     def patterns(self):
         # putting this import at the top level was throwing ImportErrors
-        # The simplest way to do this is
-        #   patterns = [pattern for pattern in IP.objects.all() if pattern.get_spec_source().body == self]
-        # But this is way too slow. So we need to push this to the database and get those patterns where
-        #
-        # 1) self is the body in the patterns original patternspec and it hasn't been redone, or
-        # 2) the pattern has been redone and self is the body of the redo
-        from django.db.models import Q
-
-        from customfit.pattern_spec.models import PatternSpec
         from customfit.patterns.models import IndividualPattern as IP
-        from customfit.patterns.models import Redo
 
-        # self is the swatch of the pattern's current spec_source and it hasnt been redone
-        pspecs = PatternSpec.objects.filter(SweaterPatternSpec___body=self)
-        q_pspec = Q(
-            pieces__schematic__individual_garment_parameters__pattern_spec__in=pspecs
-        )
-
-        test_pspecs = PatternSpec.objects.filter(TestPatternSpecWithBody___body=self)
-        q_test_pspec = Q(
-            pieces__schematic__individual_garment_parameters__pattern_spec__in=test_pspecs
-        )
-
-        # self is the swatch of the pattern's current spec_source and it has been redone
-        redos = Redo.objects.filter(SweaterRedo___body=self)
-        q_redo = Q(pieces__schematic__individual_garment_parameters__redo__in=redos)
-
-        test_redos = Redo.objects.filter(TestRedoWithBody___body=self)
-        q_test_redo = Q(
-            pieces__schematic__individual_garment_parameters__redo__in=test_redos
-        )
-
-        patterns = IP.approved_patterns.filter(
-            q_pspec | q_redo | q_test_pspec | q_test_redo
-        ).all()
+        # The body of each pattern's current spec source (the redo, if it has been
+        # redone) is denormalized onto the pattern. See
+        # IndividualPattern.update_spec_source_fields()
+        patterns = IP.approved_patterns.filter(spec_source_body=self).all()
 
         return patterns
 
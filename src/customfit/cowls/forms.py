@@ -64,14 +64,9 @@ class PersonalizeDesignForm(forms.ModelForm, _IndividualQuerysetMixin):
 
     # Helper methods for limiting bodies and swatches.
     # --------------------------------------------------------------------------
-    @staticmethod
-    def extract_compatible_swatches(swatches, design):
-        return [swatch for swatch in swatches if design.compatible_swatch(swatch)]
-
     def filter_compatible_swatches(self, swatches):
-        compatible_swatches = self.extract_compatible_swatches(swatches, self.instance)
-        compatible_swatch_pks = [swatch.pk for swatch in compatible_swatches]
-        return Swatch.objects.filter(pk__in=compatible_swatch_pks).order_by("name")
+        compatible_swatches = self.instance.compatible_swatches(swatches)
+        return compatible_swatches.order_by("name")
 
     # Limit drop-down choices to those compatible with the design.
     # --------------------------------------------------------------------------
@@ -467,10 +462,7 @@ class CowlRedoForm(forms.ModelForm, _IndividualQuerysetMixin):
     def filter_compatible_swatches(self, swatch_queryset):
         design = self.pattern.get_design()
         compatible_swatches = (
-            [s for s in swatch_queryset if design.compatible_swatch(s)]
-            if design
-            else swatch_queryset
+            design.compatible_swatches(swatch_queryset) if design else swatch_queryset
         )
-        compatible_swatch_pks = [swatch.pk for swatch in compatible_swatches]
         # Note: we need to return a queryset
-        return Swatch.objects.filter(pk__in=compatible_swatch_pks).order_by("name")
+        return compatible_swatches.order_by("name")
@@ -4,9 +4,10 @@ from collections import namedtuple
 
 import reversion
 from dbtemplates.models import Template
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 
 from customfit.designs.models import AdditionalDesignElement, Design
 from customfit.fields import (
@@ -300,6 +301,14 @@ class CowlDesign(Design, CowlDesignBase, CowlIndividualBase):
         swatch_stitch = swatch.get_stitch()
         return swatch_stitch.is_compatible(self.main_stitch)
 
+    def compatible_swatches(self, swatches):
+        """
+        Filter the `swatches` queryset down to those compatible with this design
+        (see compatible_swatch()), in the database.
+        """
+        # Cannot be factored out to CowlDesignBase without MRO problems
+        return swatches.compatible_with_stitches([self.main_stitch])
+
     def stitches_used(self):
         base_list = self._base_stitches_used()
         additional_stitches = [adls.stitch for adls in self.additionalstitch_set.all()]
@@ -332,6 +341,22 @@ class AdditionalStitch(models.Model):
     )
 
 
+def _additional_stitch_changed(sender, **kwargs):
+    # Additional stitches are among the design's stitches_used(), so keep its
+    # DesignStitch index up to date. (See Design.update_stitch_index().)
+    if kwargs.get("raw", False):
+        return
+    try:
+        kwargs["instance"].design.update_stitch_index()
+    except ObjectDoesNotExist:
+        # The design is being deleted too
+        pass
+
+
+post_save.connect(_additional_stitch_changed, sender=AdditionalStitch)
+post_delete.connect(_additional_stitch_changed, sender=AdditionalStitch)
+
+
 class _BaseCowlPatternSpec(models.Model):
     class Meta:
         abstract = True
@@ -415,6 +440,14 @@ class CowlPatternSpec(
         swatch_stitch = swatch.get_stitch()
         return swatch_stitch.is_compatible(self.main_stitch)
 
+    def compatible_swatches(self, swatches):
+        """
+        Filter the `swatches` queryset down to those compatible with this design
+        (see compatible_swatch()), in the database.
+        """
+        # Cannot be factored out to CowlDesignBase without MRO problems
+        return swatches.compatible_with_stitches([self.main_stitch])
+
     def get_igp_class(self):
         return CowlIndividualGarmentParameters
 
@@ -970,8 +1003,9 @@ class CowlPiece(PatternPiece, _BaseCowlPiece):
     def make(cls, schematic):
         return_me = cls(schematic=schematic)
         return_me._inner_make(schematic.cowl_piece)
-        return_me.full_clean()
-        return_me.save()
+        # Not saved: the schematic may not have been saved yet either. (CowlPatternPieces.save()
+        # will save this piece.)
+        return_me.full_clean(exclude=["schematic"])
         return return_me
 
 
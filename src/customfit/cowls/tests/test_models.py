@@ -6,6 +6,7 @@ from django.test import TestCase
 
 from customfit.stitches.models import Stitch
 from customfit.stitches.tests import StitchFactory
+from customfit.swatches.models import Swatch
 from customfit.swatches.tests import SwatchFactory
 
 from .. import helpers as CDC
@@ -127,6 +128,28 @@ class CowlDesignTests(CowlDesignBaseTests, TestCase):
         with mock.patch.object(Stitch, "is_compatible", return_value=False):
             self.assertFalse(des.compatible_swatch(swatch))
 
+    def test_compatible_swatches(self):
+        plain_swatch = SwatchFactory()
+        repeats_swatch = SwatchFactory(
+            user=plain_swatch.user,
+            use_repeats=True,
+            stitches_per_repeat=7,
+            additional_stitches=3,
+        )
+        swatches = Swatch.objects.filter(user=plain_swatch.user)
+
+        des = CowlDesignFactory(
+            main_stitch=StitchFactory(repeats_x_mod=3, repeats_mod_y=7)
+        )
+        self.assertEqual(
+            set(des.compatible_swatches(swatches)), {plain_swatch, repeats_swatch}
+        )
+
+        des = CowlDesignFactory(
+            main_stitch=StitchFactory(repeats_x_mod=1, repeats_mod_y=4)
+        )
+        self.assertEqual(list(des.compatible_swatches(swatches)), [plain_swatch])
+
     def test_isotope_classes(self):
         des = CowlDesignFactory()
         self.assertEqual(des.isotope_classes(), "cowl")
@@ -204,6 +227,19 @@ class CowlDesignTests(CowlDesignBaseTests, TestCase):
         self.assertTrue(cabled_design.uses_stitch(additional_stitch))
         self.assertFalse(cabled_design.uses_stitch(new_stitch))
 
+    def test_stitch_index(self):
+        main_stitch = StitchFactory(name="main stitch")
+        additional_stitch = StitchFactory(name="additional stitch")
+        design = self.factory(main_stitch=main_stitch)
+        self.assertEqual(main_stitch._get_designs(), [design])
+        self.assertEqual(additional_stitch._get_designs(), [])
+
+        adls = AdditionalStitch(design=design, stitch=additional_stitch)
+        adls.save()
+        self.assertEqual(additional_stitch._get_designs(), [design])
+        adls.delete()
+        self.assertEqual(additional_stitch._get_designs(), [])
+
 
 class CowlPatternspecTests(CowlDesignBaseTests, TestCase):
 
@@ -622,4 +622,9 @@ class PersonalizeGradedDesignViewTests(TestCase):
 
         response = self.client.post(self.personalize_url, self.post_entries)
         self.assertEqual(response.status_code, 302)
-        self.assertRegex(response["Location"], r"^/pattern/graded/\d+/$")
+        self.assertRegex(response["Location"], r"^/graded/build/\d+/$")
+
+        # Celery runs eagerly in tests, so the pattern is already built
+        response2 = self.client.get(response["Location"])
+        self.assertEqual(response2.status_code, 302)
+        self.assertRegex(response2["Location"], r"^/pattern/graded/\d+/$")
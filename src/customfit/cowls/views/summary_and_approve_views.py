@@ -2,25 +2,25 @@ from customfit.design_wizard.views import RedoApproveView, SummaryAndApproveView
 
 from ..models import CowlGarmentSchematic, CowlPattern, CowlPatternPieces
 
+# These compute in memory only; the approve views save the result on approval.
+# See customfit.design_wizard.views.helpers._save_pattern().
+
 
 def make_IPS_from_IGP(igp):
     ips = CowlGarmentSchematic.make_from_garment_parameters(igp)
     ips.clean()
-    ips.save()
     return ips
 
 
 def make_IPP_from_IPS(ips):
     ipp = CowlPatternPieces.make_from_individual_pieced_schematic(ips)
     ipp.clean()
-    ipp.save()
     return ipp
 
 
 def make_pattern_from_IPP(user, ipp):
     pattern = CowlPattern.make_from_individual_pattern_pieces(user, ipp)
     pattern.clean()
-    pattern.save()
     return pattern
 
 
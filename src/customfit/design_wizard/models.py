@@ -4,6 +4,7 @@ import django.utils.timezone as timezone
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.signals import post_delete, post_save, pre_save
 
 from customfit.patterns.models import IndividualPattern
 
@@ -134,3 +135,43 @@ class Transaction(models.Model):
         pattern = self.pattern
 
         super(Transaction, self).save(*args, **kwargs)
+
+
+# Keep IndividualPattern.approved up to date. These are signal handlers rather than
+# part of save() and delete() so that bulk deletes (as in the admin) are covered too.
+# Deleting a queryset sends post_delete for each of its objects.
+
+
+def _remember_previous_pattern(sender, instance, raw=False, **kwargs):
+    # If the transaction is moved to another pattern, the old one needs updating too
+    if instance.pk is None or raw:
+        instance._previous_pattern_id = None
+    else:
+        instance._previous_pattern_id = (
+            Transaction.objects.filter(pk=instance.pk)
+            .values_list("pattern_id", flat=True)
+            .first()
+        )
+
+
+def _update_pattern_approval(sender, instance, raw=False, **kwargs):
+    if raw:
+        # Loading fixtures. The patterns come with their approved field.
+        return
+    pattern_ids = {instance.pattern_id, getattr(instance, "_previous_pattern_id", None)}
+    pattern_ids.discard(None)
+    patterns = []
+    if Transaction.pattern.is_cached(instance):
+        # So that the caller's copy is updated too
+        patterns.append(instance.pattern)
+        pattern_ids.discard(instance.pattern_id)
+    # Patterns deleted along with their transactions are already gone, and so
+    # aren't found here
+    patterns += IndividualPattern.even_unapproved.filter(pk__in=pattern_ids)
+    for pattern in patterns:
+        pattern.update_approved()
+
+
+pre_save.connect(_remember_previous_pattern, sender=Transaction)
+post_save.connect(_update_pattern_approval, sender=Transaction)
+post_delete.connect(_update_pattern_approval, sender=Transaction)
@@ -13,6 +13,8 @@ from customfit.design_wizard.views.helpers import (
     _make_pattern_from_IPP,
 )
 from customfit.patterns.models import IndividualPattern
+from customfit.pieces.models import PatternPieces
+from customfit.schematics.models import ConstructionSchematic
 from customfit.test_garment.factories import (
     TestIndividualGarmentParametersFactory,
     TestIndividualPatternFactory,
@@ -332,17 +334,26 @@ class _ApprovePatternSpecViewGetTestMixin(object):
         pattern = _make_pattern_from_IPP(user, ipp)
         return pattern
 
-    def test_pattern_not_approved(self):
+    def test_pattern_not_saved(self):
         """
-        Ensure the pattern is not yet approved (it should not be approved until
-        after user approval.
+        Ensure the pattern is not yet saved, let alone approved (it should not be saved
+        until after user approval).
         """
         self.login()
         url = self._make_url(self.igp)
         response = self.client.get(url)
-        pattern_id = response.context["pattern_id"]
-        pattern = IndividualPattern.even_unapproved.get(id=pattern_id)
-        self.assertFalse(pattern.approved)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context["pattern_id"])
+        self.assertFalse(
+            IndividualPattern.even_unapproved.filter(
+                pieces__schematic__individual_garment_parameters=self.igp
+            ).exists()
+        )
+        self.assertFalse(
+            ConstructionSchematic.objects.filter(
+                individual_garment_parameters=self.igp
+            ).exists()
+        )
 
     def test_pattern_already_paid(self):
         # approve the pattern
@@ -391,6 +402,18 @@ class _ApproveRedoViewGetTestMixin(object):
         pattern.update_with_new_pieces(ipp)
         return pattern
 
+    def test_get_saves_nothing(self):
+        orig_pieces_count = PatternPieces.objects.count()
+        orig_schematic_count = ConstructionSchematic.objects.count()
+
+        self.login()
+        url = self._make_url(self.igp)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(PatternPieces.objects.count(), orig_pieces_count)
+        self.assertEqual(ConstructionSchematic.objects.count(), orig_schematic_count)
+
     def test_cant_approve_redone_igp_get(self):
         p = TestRedonePatternFactory.from_us(user=self.user, swatch=self.igp.swatch)
         igp = p.pieces.schematic.individual_garment_parameters
@@ -98,6 +98,7 @@ class TransactionAdminSiteTest(TestCase):
         resp = self.client.post(self.add_url, post_params)
 
         # Is the pattern now approved?
+        self.pattern.refresh_from_db()
         self.assertTrue(self.pattern.approved)
         self.assertTrue(
             IndividualPattern.approved_patterns.filter(id=self.pattern.id).exists()
@@ -137,6 +138,7 @@ class TransactionAdminSiteTest(TestCase):
         #        self.assertRedirects(resp, self.list_url)
 
         # Is the pattern now approved?
+        self.pattern.refresh_from_db()
         self.assertTrue(self.pattern.approved)
         self.assertTrue(
             IndividualPattern.approved_patterns.filter(id=self.pattern.id).exists()
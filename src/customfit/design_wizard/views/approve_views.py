@@ -2,6 +2,7 @@ import logging
 
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.views.generic import FormView
@@ -13,7 +14,12 @@ from ..forms import RedoApproveForm, SummaryAndApproveForm
 from ..models import Transaction
 from .caching import cache_pattern, uncache_pattern
 from .garment_registry import model_to_view
-from .helpers import _ErrorCheckerMixin, _get_featured_image_url
+from .helpers import (
+    _ErrorCheckerMixin,
+    _get_featured_image_url,
+    _save_pattern,
+    _save_pattern_pieces,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +48,8 @@ class SummaryAndApproveViewBase(_ErrorCheckerMixin, FormView):
     # Subclasses need to define:
     #
     # * template_name
-    # * _make_pattern()
+    # * _make_pattern(), which should compute the pattern in memory without saving it.
+    #   (We only save it when the user approves it.)
 
     form_class = SummaryAndApproveForm
     template_name = "design_wizard/summary_and_approve.html"
@@ -64,9 +71,6 @@ class SummaryAndApproveViewBase(_ErrorCheckerMixin, FormView):
             except IndividualPattern.DoesNotExist:
                 request = self.request
                 pattern = self.generate_pattern(request, igp)
-                pattern.save()
-                cache_pattern(pattern, self.request)
-                self.request.session["pattern_id"] = pattern.id
                 messages.add_message(
                     request,
                     messages.INFO,
@@ -99,8 +103,7 @@ class SummaryAndApproveViewBase(_ErrorCheckerMixin, FormView):
 
     def get(self, request, *args, **kwargs):
 
-        # First make the ConstructionSchematic and the pattern, then store the pattern
-        # in the session for get_context() and other methods.
+        # First make the ConstructionSchematic and the pattern (in memory).
         # Although we only need schematic data to render the page,
         # we need to make the pattern here so that we won't end up
         # collecting money for patterns that throw exceptions.
@@ -162,7 +165,7 @@ class SummaryAndApproveViewBase(_ErrorCheckerMixin, FormView):
         igp = self.get_object()
         design = self.get_design()
 
-        # Before we save the transaction, let's make sure we can render the patterntext
+        # Before we save anything, let's make sure we can render the patterntext
         self._test_can_render_pattern(self.get_pattern())
 
         pattern = self.get_pattern()
@@ -173,14 +176,21 @@ class SummaryAndApproveViewBase(_ErrorCheckerMixin, FormView):
             Transaction.STAFF_USER if user.is_staff else Transaction.FRIENDS_AND_FAMILY
         )
 
-        transaction = Transaction(
-            user=pattern.user,
-            pattern=pattern,
-            amount=0.00,
-            approved=True,
-            why_free=reason,
-        )
-        transaction.save()
+        with transaction.atomic():
+            if pattern.pk is None:
+                # Computed in memory by get_pattern(). Now that it's approved, save it.
+                _save_pattern(pattern)
+
+            pattern_transaction = Transaction(
+                user=pattern.user,
+                pattern=pattern,
+                amount=0.00,
+                approved=True,
+                why_free=reason,
+            )
+            pattern_transaction.save()
+
+        cache_pattern(pattern, self.request)
 
         return super(SummaryAndApproveViewBase, self).form_valid(form)
 
@@ -202,6 +212,9 @@ class RedoApproveView(_ErrorCheckerMixin, FormView):
     #
     # * _make_pattern(self, request, igp)
     # * _make_new_pieces(self, request, igp)
+    #
+    # Both should compute in memory without saving anything. We only save the new
+    # pieces when the user approves them.
 
     #
     # Copied from _SummaryAndApproveViewBase
@@ -269,7 +282,9 @@ class RedoApproveView(_ErrorCheckerMixin, FormView):
         new_pieces = self._make_new_pieces(self.request, igp)
         pattern = self._get_pattern_from_igp(igp)
         uncache_pattern(pattern)
-        pattern.update_with_new_pieces(new_pieces)
+        with transaction.atomic():
+            _save_pattern_pieces(new_pieces)
+            pattern.update_with_new_pieces(new_pieces)
         cache_pattern(pattern, self.request)
         return super(RedoApproveView, self).form_valid(form)
 
@@ -1,9 +1,10 @@
 import logging
 
 from celery import shared_task
+from django.conf import settings
 from django.contrib.auth.models import User
 
-from customfit.patterns.models import IndividualPattern
+from customfit.patterns.models import IndividualPattern, RenderedPatternContent
 from customfit.patterns.views import (
     IndividualPatternPdfView,
     IndividualPatternShortPdfView,
@@ -30,15 +31,27 @@ def _cache_pattern(pattern_id, user_id, session=None):
     # Cache the patterntext
     pattern.prefill_patterntext_cache()
 
-    # Cache the PDFs
+    # Cache the PDFs, unless someone is already rendering them (a user who
+    # asked to download the pattern while this task was waiting in the queue)
     mock_request = MockRequest(user, session)
-    IndividualPatternPdfView(object=pattern, request=mock_request).make_pdf()
-    IndividualPatternShortPdfView(object=pattern, request=mock_request).make_pdf()
+    for view_class in [IndividualPatternPdfView, IndividualPatternShortPdfView]:
+        view = view_class(object=pattern, request=mock_request)
+        if view.claim_pdf_render():
+            try:
+                view.make_pdf()
+            finally:
+                view.release_pdf_render()
+        else:
+            LOGGER.info("%s already being rendered", view_class.__name__)
 
 
 def cache_pattern(pattern, request):
-    # It is important that this function return quickly, so all the work happens in a celery task
-    _cache_pattern.delay(pattern.id, request.user.id, None)
+    # It is important that this function return quickly, so all the work happens in a celery task.
+    # This is speculative work, so it goes behind any PDFs that users are waiting for.
+    _cache_pattern.apply_async(
+        args=(pattern.id, request.user.id, None),
+        priority=settings.PDF_PREFILL_TASK_PRIORITY,
+    )
 
 
 def uncache_pattern(pattern):
@@ -49,3 +62,6 @@ def uncache_pattern(pattern):
 
     # Flush patterntext
     pattern.flush_patterntext_cache()
+
+    # And the copies of both kept in the database
+    RenderedPatternContent.objects.flush(pattern)
@@ -22,27 +22,50 @@ logger = logging.getLogger(__name__)
 # -----------------------------------------------------------------------------
 
 
+# The _make_* functions compute in memory only: nothing is saved until the user
+# approves the pattern, at which point the approve views call _save_pattern() or
+# _save_pattern_pieces(). This keeps the tweak/preview cycle from writing (and then
+# deleting) a schematic, a set of pieces and a pattern every time around.
+
+
 def _make_IPS_from_IGP(user, igp):
     ips = ConstructionSchematic.make_from_garment_parameters(user, igp)
     ips.clean()
-    ips.save()
     return ips
 
 
 def _make_IPP_from_IPS(ips):
     ipp = PatternPieces.make_from_individual_pieced_schematic(ips)
-    ipp.full_clean()
-    ipp.save()
+    # The pieces can't point to their (unsaved) schematics yet, so don't check that.
+    ipp.full_clean(exclude=["schematic"])
     return ipp
 
 
 def _make_pattern_from_IPP(user, ipp):
     pattern = IndividualPattern.make_from_individual_pattern_pieces(user, ipp)
     pattern.clean()
-    pattern.save()
     return pattern
 
 
+def _save_pattern_pieces(ipp):
+    """
+    Save PatternPieces computed in memory, along with the ConstructionSchematic they
+    were made from. (The containers' save() methods save the pieces and
+    piece-schematics they contain.) Callers should hold a database transaction.
+    """
+    ipp.schematic.save()
+    ipp.save()
+
+
+def _save_pattern(pattern):
+    """
+    Save an IndividualPattern computed in memory, along with its pieces and schematic.
+    Callers should hold a database transaction.
+    """
+    _save_pattern_pieces(pattern.pieces)
+    pattern.save()
+
+
 def _send_to_tweak_or_approve_patternspec(request, igp):
     # Send the user to the tweak or the approval page, as requested.
     if REDIRECT_TWEAK in request.POST:
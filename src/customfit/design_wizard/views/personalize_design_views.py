@@ -209,9 +209,7 @@ class PersonalizeDesignUpdateView(
         # If an approved pattern has already been made from this spec,
         # don't let them make another, in case there's some assumption
         # we made that gets violated.
-        if IndividualPattern.objects.filter(
-            pieces__schematic__individual_garment_parameters__pattern_spec=patternspec
-        ):
+        if IndividualPattern.objects.filter(spec_source_pattern_spec=patternspec):
             logger.warning(
                 "User {user} tried to personalize design "
                 "with patternspec {spec}, but there is already a "
@@ -157,6 +157,10 @@ class _TweakGarmentViewBase(_ErrorCheckerMixin):
         # that we need to flush out.) Note that ErrorCheckerMixin should
         # prevent us from getting to this point if the IGP is part of an approved pattern.
         # Hence, any schematics, pieces, or patterns made from this IGP can be safely deleted
+        #
+        # (The approve views now compute their previews in memory and save nothing until the user
+        # approves, so there is usually nothing to delete here. But unapproved patterns saved by
+        # earlier versions of the wizard may still be around.)
 
         # We need to explicitly call delete() of each model, or specific pieces/piece-schematics won't
         # get deleted.
@@ -3,7 +3,7 @@ import logging
 from django.template.response import TemplateResponse
 from django.views.generic.base import TemplateView
 
-from customfit.designs.models import Collection, Design
+from customfit.designs.catalog import get_design_catalog
 
 from .garment_registry import MYO_OPTIONS
 
@@ -38,20 +38,21 @@ class ChooseDesignTypeView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super(ChooseDesignTypeView, self).get_context_data(**kwargs)
 
-        displayables = Collection.displayable
-        if displayables.exists():
-            collection = displayables.latest()
-            collection_designs = collection.visible_designs
+        catalog = get_design_catalog()
+
+        collections = catalog.collections()
+        if collections:
+            # The latest collection
+            collection_designs = collections[0]
             context["has_collections"] = True
         else:
-            collection_designs = Design.basic.all()
+            collection_designs = catalog.basic()
             context["has_collections"] = False
         context["collection_designs"] = collection_designs
 
-        if Design.featured.exists():
-            designs = Design.featured.all()
-        else:
-            designs = Design.listable.all()[:5]
+        designs = catalog.featured()
+        if not designs:
+            designs = catalog.listable()[:5]
         context["designs"] = designs
 
         context["myo_options"] = MYO_OPTIONS
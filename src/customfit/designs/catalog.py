@@ -0,0 +1,153 @@
+"""
+A cached snapshot of the design catalog.
+
+The catalog pages (all designs, choose-a-design, the home and about galleries)
+would otherwise query the listable/featured/promoted designs and the displayable
+collections on every hit, and work out thumbnails and isotope filter-classes for
+each design. Instead, get_design_catalog() builds all of that once and keeps it in
+the cache until a Design or Collection is saved or deleted (see
+_catalog_changed() in customfit.designs.models). On a warm cache, it makes no
+database queries at all.
+"""
+
+import logging
+from collections import namedtuple
+
+from easy_thumbnails.files import get_thumbnailer
+
+from customfit.helpers.cache_helpers import (
+    get_cache_generation,
+    get_or_set_single_flight,
+)
+
+from .models import CATALOG_GENERATION, Collection, Design
+
+logger = logging.getLogger(__name__)
+
+
+# What the catalog templates need to know about a design
+DesignCard = namedtuple(
+    "DesignCard",
+    [
+        "id",
+        "name",
+        "slug",
+        "url",
+        "image_url",  # thumbnail for the design tiles
+        "gallery_image_url",  # (square) thumbnail for the home/about gallery
+        "isotope_classes",  # filter-classes for the all-designs page
+    ],
+)
+
+
+def _thumbnail_url(image, alias):
+    # As the thumbnail_url template filter, except that a bad image costs only its
+    # own thumbnail (and not the whole catalog) even when THUMBNAIL_DEBUG is set
+    try:
+        return get_thumbnailer(image)[alias].url
+    except Exception as e:
+        logger.warning("Could not make %s thumbnail of %s: %s", alias, image, e)
+        return ""
+
+
+def _make_card(design):
+    if design.image:
+        image_url = _thumbnail_url(design.image, "col-md-3")
+        gallery_image_url = _thumbnail_url(design.image, "col-md-3-square")
+    else:
+        image_url = gallery_image_url = ""
+    # Base Designs (as opposed to sweaters and cowls) have no isotope classes
+    isotope_classes = getattr(design, "isotope_classes", None)
+    return DesignCard(
+        id=design.id,
+        name=design.name,
+        slug=design.slug,
+        url=design.get_absolute_url(),
+        image_url=image_url,
+        gallery_image_url=gallery_image_url,
+        isotope_classes=isotope_classes() if isotope_classes else "",
+    )
+
+
+class DesignCatalog(object):
+    """
+    The cards of all designs, and (in order) which of them each catalog page
+    shows. Lists of cards are returned in the orders of the corresponding Design
+    managers.
+    """
+
+    def __init__(self, generation):
+        super(DesignCatalog, self).__init__()
+        self.generation = generation
+        self._cards = {}
+        self._all_ids = []
+        self._listable_ids = []
+        self._featured_ids = []
+        self._basic_ids = []
+        self._promoted_ids = []
+        # The publicly-visible designs of each displayable collection, newest
+        # collection first
+        self._collection_ids = []
+
+    @classmethod
+    def build(cls, generation):
+        logger.info("Building the design catalog")
+        catalog = cls(generation)
+
+        designs = list(Design.objects.all())
+        for design in designs:
+            catalog._cards[design.id] = _make_card(design)
+        catalog._all_ids = [design.id for design in designs]
+
+        # The managers are the definitions of these, so use them
+        def ids(manager):
+            return list(manager.values_list("id", flat=True))
+
+        catalog._listable_ids = ids(Design.listable)
+        catalog._featured_ids = ids(Design.featured)
+        catalog._basic_ids = ids(Design.basic)
+        catalog._promoted_ids = ids(Design.currently_promoted)
+
+        # As Collection.visible_designs, but from the designs we already have
+        for collection in Collection.displayable.order_by("-creation_date"):
+            catalog._collection_ids.append(
+                [
+                    design.id
+                    for design in designs
+                    if design.collection_id == collection.id
+                    and design.is_visible_to_public()
+                ]
+            )
+
+        return catalog
+
+    def _get_cards(self, ids):
+        return [self._cards[design_id] for design_id in ids]
+
+    def all_designs(self):
+        return self._get_cards(self._all_ids)
+
+    def listable(self):
+        return self._get_cards(self._listable_ids)
+
+    def featured(self):
+        return self._get_cards(self._featured_ids)
+
+    def basic(self):
+        return self._get_cards(self._basic_ids)
+
+    def currently_promoted(self):
+        return self._get_cards(self._promoted_ids)
+
+    def collections(self):
+        """
+        Return a list of lists of cards: the publicly-visible designs of each
+        displayable collection, newest collection first.
+        """
+        return [self._get_cards(ids) for ids in self._collection_ids]
+
+
+def get_design_catalog():
+    generation = get_cache_generation(CATALOG_GENERATION)
+    cache_key = "design-catalog:%s" % generation
+    return get_or_set_single_flight(cache_key, lambda: DesignCatalog.build(generation))
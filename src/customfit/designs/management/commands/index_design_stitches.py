@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from customfit.designs.models import Design
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the index of which stitches each design uses (the DesignStitch "
+        "table). Saving a design keeps it up to date, so this is only needed for "
+        "designs saved before the index existed or loaded from fixtures. Safe to "
+        "run more than once."
+    )
+
+    def handle(self, *args, **options):
+        count = 0
+        for design in Design.objects.all():
+            design.update_stitch_index()
+            count += 1
+        self.stdout.write("Indexed the stitches of %d designs" % count)
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.6 on 2026-10-17 07:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("designs", "0001_initial"),
+        ("stitches", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DesignStitch",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "design",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stitch_index",
+                        to="designs.design",
+                    ),
+                ),
+                (
+                    "stitch",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="design_index",
+                        to="stitches.stitch",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("design", "stitch")},
+            },
+        ),
+    ]
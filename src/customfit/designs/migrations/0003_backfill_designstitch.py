@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def backfill_stitch_index(apps, schema_editor):
+    # Which stitches a design uses is up to its subclass's stitches_used(), which
+    # the historical models don't have. So this uses the real models, as the
+    # index_design_stitches management command does.
+    from customfit.designs.models import Design
+
+    for design in Design.objects.all():
+        design.update_stitch_index()
+
+
+def clear_stitch_index(apps, schema_editor):
+    DesignStitch = apps.get_model("designs", "DesignStitch")
+    DesignStitch.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cowls", "0004_initial"),
+        ("designs", "0002_designstitch"),
+        ("stitches", "0001_initial"),
+        ("sweaters", "0001_initial"),
+        ("test_garment", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_stitch_index, clear_stitch_index),
+    ]
@@ -3,13 +3,13 @@ import os.path
 import urllib.parse
 import uuid
 
-import django.template
 from dbtemplates.models import Template
 from django.conf import settings
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.validators import RegexValidator, URLValidator
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
 from django.urls import reverse
 from django.utils.encoding import force_str
 from django.utils.text import slugify
@@ -18,11 +18,16 @@ from polymorphic.models import PolymorphicManager, PolymorphicModel
 import customfit.designs.helpers.design_choices as DC
 import customfit.stitches.models as stitches
 from customfit.fields import LowerLimitValidator
+from customfit.helpers.cache_helpers import bump_cache_generation
 from customfit.helpers.math_helpers import round
+from customfit.helpers.template_helpers import get_db_template
 
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
 
+# Cache generation of the design catalog. See customfit.designs.catalog
+CATALOG_GENERATION = "design-catalog"
+
 
 def get_designer_image_path(instance, filename):
     designer_slug = slugify(instance.full_name)
@@ -363,6 +368,14 @@ class Design(PolymorphicModel):
     #         """
     #         Return True iff the swatch is compatible with this design
     #         """
+    # *     def compatible_swatches(self, swatches):
+    #         """
+    #         Filter a Swatch queryset down to those compatible with this design
+    #         (in the database; see SwatchQuerySet.compatible_with_stitches())
+    #         """
+    # * def stitches_used(self):
+    #     # Returns a list of the Stitches used by the Design in any way, without
+    #     # repeats. Kept in the DesignStitch table. (See update_stitch_index().)
     # * def uses_stitch(self, stitch):
     #     # Returns True if the Design uses the Stitch in any way. To be implemented
     #     # by subclasses
@@ -565,6 +578,36 @@ class Design(PolymorphicModel):
             assert self.visibility == DC.PRIVATE
             return user.is_staff
 
+    def update_stitch_index(self):
+        """
+        Bring the DesignStitch rows of this design up to date with what
+        stitches_used() says now. Called whenever the design, or one of its
+        additional elements, is saved or deleted.
+        """
+        # self may be a plain Design (as when reached through a foreign key) but
+        # only the subclasses know which stitches they use
+        design = self.get_real_instance()
+        if hasattr(design, "stitches_used"):
+            stitch_ids = {stitch.id for stitch in design.stitches_used()}
+        else:
+            # Bare Designs (as made by DesignFactory) use no stitches
+            stitch_ids = set()
+        with transaction.atomic():
+            DesignStitch.objects.filter(design_id=self.id).exclude(
+                stitch_id__in=stitch_ids
+            ).delete()
+            indexed_ids = set(
+                DesignStitch.objects.filter(design_id=self.id).values_list(
+                    "stitch_id", flat=True
+                )
+            )
+            DesignStitch.objects.bulk_create(
+                [
+                    DesignStitch(design_id=self.id, stitch_id=stitch_id)
+                    for stitch_id in sorted(stitch_ids - indexed_ids)
+                ]
+            )
+
     def __str__(self):
         return "%s" % self.name
 
@@ -572,6 +615,29 @@ class Design(PolymorphicModel):
         ordering = ["name"]
 
 
+class DesignStitch(models.Model):
+    """
+    Which stitches each design uses, so that the designs using a stitch can be found
+    with a single query rather than by asking every design. One row for each stitch
+    in the design's stitches_used(), maintained by Design.update_stitch_index().
+    Don't edit these by hand: run the index_design_stitches management command if
+    they ever need rebuilding.
+    """
+
+    design = models.ForeignKey(
+        Design, on_delete=models.CASCADE, related_name="stitch_index"
+    )
+    stitch = models.ForeignKey(
+        stitches.Stitch, on_delete=models.CASCADE, related_name="design_index"
+    )
+
+    def __str__(self):
+        return "%s uses %s" % (self.design_id, self.stitch_id)
+
+    class Meta:
+        unique_together = [("design", "stitch")]
+
+
 class DesignAlternatePicture(models.Model):
     """
     For the gallery of alternate images that can appear thumbnailed under
@@ -722,8 +788,8 @@ class AdditionalDesignElement(models.Model):
                 )
 
     def get_template(self):
-        return django.template.Template(
-            self.template.content,
+        return get_db_template(
+            self.template,
             # Why do we add the name?
             # For unit testing
             name=self.name,
@@ -760,3 +826,39 @@ class AdditionalDesignElement(models.Model):
 
     class Meta:
         abstract = True
+
+
+def _design_changed(sender, **kwargs):
+    # Keep the DesignStitch index up to date. (Fixtures are loaded raw, with their
+    # related objects possibly still to come: run index_design_stitches after.)
+    if kwargs.get("raw", False):
+        return
+    instance = kwargs["instance"]
+    if isinstance(instance, Design):
+        instance.update_stitch_index()
+    elif isinstance(instance, AdditionalDesignElement):
+        instance.design.update_stitch_index()
+
+
+def _additional_element_deleted(sender, **kwargs):
+    instance = kwargs["instance"]
+    if isinstance(instance, AdditionalDesignElement):
+        try:
+            instance.design.update_stitch_index()
+        except ObjectDoesNotExist:
+            # The design is being deleted too, and takes its DesignStitch rows
+            # with it
+            pass
+
+
+def _catalog_changed(sender, **kwargs):
+    # Any change to a design or collection can change what the catalog pages
+    # show, so start a new catalog.
+    if isinstance(kwargs["instance"], (Design, Collection)):
+        bump_cache_generation(CATALOG_GENERATION)
+
+
+post_save.connect(_design_changed)
+post_delete.connect(_additional_element_deleted)
+post_save.connect(_catalog_changed)
+post_delete.connect(_catalog_changed)
@@ -19,7 +19,8 @@ import customfit.designs.helpers.design_choices as DC
 from customfit.swatches.factories import GaugeFactory
 from customfit.userauth.factories import StaffFactory, UserFactory
 
-from .factories import DesignerFactory, DesignFactory
+from .catalog import get_design_catalog
+from .factories import DesignerFactory, DesignFactory, make_jpeg_bytes
 from .models import AdditionalDesignElement, Collection, Design, RavelryUrlValidator
 
 # Get an instance of a logger
@@ -481,6 +482,85 @@ class DesignManagerTestsWithCollections(TestCase):
 
         self._assert_sorted_by_name(featured)
 
+    def test_catalog(self):
+        def ids(designs):
+            return [design.id for design in designs]
+
+        catalog = get_design_catalog()
+        self.assertEqual(ids(catalog.all_designs()), ids(Design.objects.all()))
+        self.assertEqual(ids(catalog.listable()), ids(Design.listable.all()))
+        self.assertEqual(ids(catalog.featured()), ids(Design.featured.all()))
+        self.assertEqual(ids(catalog.basic()), ids(Design.basic.all()))
+        self.assertEqual(
+            ids(catalog.currently_promoted()), ids(Design.currently_promoted.all())
+        )
+        self.assertEqual(
+            [ids(designs) for designs in catalog.collections()],
+            [
+                ids(self.new_collection.visible_designs),
+                ids(self.old_collection.visible_designs),
+            ],
+        )
+
+
+class DesignCatalogTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_warm_catalog_makes_no_queries(self):
+        design = DesignFactory(
+            image=SimpleUploadedFile("image.jpg", make_jpeg_bytes()),
+            visibility=DC.PUBLIC,
+        )
+        get_design_catalog()
+        with self.assertNumQueries(0):
+            catalog = get_design_catalog()
+        [card] = catalog.listable()
+        self.assertEqual(card.id, design.id)
+        self.assertEqual(card.name, design.name)
+        self.assertEqual(card.url, design.get_absolute_url())
+        self.assertTrue(card.image_url)
+        self.assertTrue(card.gallery_image_url)
+
+    def test_rebuilt_on_change(self):
+        design = DesignFactory(
+            image=SimpleUploadedFile("image.jpg", b"contents"), visibility=DC.PUBLIC
+        )
+        catalog = get_design_catalog()
+        self.assertEqual(catalog.collections(), [])
+
+        design.name = "A new name"
+        design.save()
+        [card] = get_design_catalog().listable()
+        self.assertEqual(card.name, "A new name")
+
+        collection = Collection(name="collection")
+        collection.save()
+        design.collection = collection
+        design.save()
+        [[card]] = get_design_catalog().collections()
+        self.assertEqual(card.id, design.id)
+
+        design.delete()
+        self.assertEqual(get_design_catalog().all_designs(), [])
+
+    def test_all_designs_page(self):
+        design = DesignFactory(
+            image=SimpleUploadedFile("image.jpg", b"contents"), visibility=DC.PUBLIC
+        )
+        response = self.client.get(reverse("designs:all_designs"))
+        self.assertContains(response, design.name)
+
+        # Not hidden by the cached fragment
+        design.name = "A new name"
+        design.save()
+        response = self.client.get(reverse("designs:all_designs"))
+        self.assertContains(response, "A new name")
+
 
 class DesignManagerTestsNoCollections(TestCase):
 
@@ -3,8 +3,9 @@ from django.urls import reverse_lazy
 from django.views.generic.base import TemplateView
 from django.views.generic.edit import CreateView
 
+from .catalog import get_design_catalog
 from .forms import CreateCollectionForm
-from .models import Collection, Design
+from .models import Collection
 
 
 class AllCollectionsView(TemplateView):
@@ -45,13 +46,11 @@ class AllDesignsView(TemplateView):
 
     template_name = "designs/all_designs.html"
 
-    def _get_displayable_designs(self):
-        listable_designs = Design.listable.all()
-        return listable_designs.order_by("name")
-
     def get_context_data(self, **kwargs):
         context = super(AllDesignsView, self).get_context_data(**kwargs)
-        context["designs"] = self._get_displayable_designs()
+        catalog = get_design_catalog()
+        context["designs"] = catalog.listable()
+        context["catalog_generation"] = catalog.generation
 
         # Knitters should see the build-your-own options at the bottom
         # of the all-designs page, too
@@ -0,0 +1,395 @@
+"""
+Bulk builds of graded patterns, to pre-build the sample patterns of the catalog.
+
+build_catalog() builds, for each combination of design, grade set and swatch, the
+graded pattern that a staff member would get by filling in the graded wizard's
+personalize form for the design with the design's defaults, the grade set and the
+swatch's gauge-- and, optionally, writes out its PDF. (Garments that aren't graded
+by grade sets, like cowls, get one pattern per swatch.)
+
+It is done in two passes. The first, in this process, makes the pattern specs and
+GradedPatternBuildJobs; this is cheap. The second builds the patterns and PDFs,
+spread across a pool of processes. The jobs double as a record of what has been
+done: they are keyed on the ids of their design, grade set and swatch (see
+make_catalog_key()), and running the same build again picks up where the last
+one stopped. Patterns that
+were built are skipped (as are PDFs that were written), builds that were
+interrupted are re-run, and builds that failed are left alone unless asked to
+retry them.
+
+What can be shared between designs is done once, before the workers are forked:
+the templates are compiled, and the grade sets (with their grades) are loaded.
+The PDFs are rendered in sections keyed on their HTML (see
+customfit.views.MakePdfMixin), so identical sections of different patterns are
+only rendered once when the cache is shared between the workers.
+"""
+
+import collections
+import logging
+import os
+import time
+
+from django import forms
+from django.test import RequestFactory
+from django.utils.module_loading import import_string
+from django.utils.text import slugify
+
+import customfit.designs.helpers.design_choices as DC
+from customfit.bodies.models import GradeSet
+from customfit.design_wizard.views.caching import MockRequest
+from customfit.designs.models import Design
+from customfit.helpers.parallel_helpers import make_process_pool
+from customfit.helpers.template_helpers import warm_template_cache
+from customfit.pattern_spec.models import GradedPatternSpec
+from customfit.patterns.models import GradedPattern
+from customfit.patterns.views import GradedPatternPdfView
+
+from .helpers import check_graded_pattern_spec
+from .models import GradedPatternBuildJob
+from .tasks import run_build_job
+from .views import view_dict
+
+logger = logging.getLogger(__name__)
+
+
+BUILT = "built"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+# Grade sets loaded (with their grades) before the workers are forked, by id. See
+# _share_gradesets().
+_shared_gradesets = {}
+
+
+class CatalogEntry(object):
+    """
+    One pattern of the catalog: which design, grade set (None if the garment
+    isn't graded by grade sets) and swatch it is made from, and its build job.
+    Also collects the outcome of the build.
+    """
+
+    def __init__(self, design, gradeset, swatch, name):
+        super(CatalogEntry, self).__init__()
+        self.design = design
+        self.gradeset = gradeset
+        self.swatch = swatch
+        self.name = name
+        self.job = None
+        self.pdf_path = None
+        self.status = None
+        self.error = None
+        self.timings = {}
+
+    def as_dict(self):
+        return {
+            "design": self.design.slug,
+            "gradeset": self.gradeset.id if self.gradeset else None,
+            "swatch": self.swatch.id,
+            "name": self.name,
+            "job": self.job.id if self.job else None,
+            "pattern": self.job.graded_pattern_id if self.job else None,
+            "pdf": self.pdf_path,
+            "status": self.status,
+            "error": self.error,
+            "timings": self.timings,
+        }
+
+
+def get_published_designs():
+    return Design.objects.filter(visibility__in=[DC.PUBLIC, DC.FEATURED]).order_by(
+        "name"
+    )
+
+
+def make_catalog_key(design, gradeset, swatch):
+    # Unlike the pattern names, which are truncated and can repeat (two swatches
+    # with the same name, say), these are unique to the combination
+    return "design:%s/gradeset:%s/swatch:%s" % (
+        design.id,
+        gradeset.id if gradeset else "-",
+        swatch.id,
+    )
+
+
+def _distinct_names(objects):
+    # The names of `objects` (swatches, say) by id, with the id added to the names
+    # that more than one of them share. A user can't have two patterns of the same
+    # name.
+    counts = collections.Counter(obj.name for obj in objects)
+    return {
+        obj.id: obj.name if counts[obj.name] == 1 else "%s #%s" % (obj.name, obj.id)
+        for obj in objects
+    }
+
+
+def make_pattern_name(design, gradeset_name, swatch_name):
+    if gradeset_name is None:
+        name = "%s (%s)" % (design.name, swatch_name)
+    else:
+        name = "%s (%s, %s)" % (design.name, gradeset_name, swatch_name)
+    return name[: GradedPatternSpec._meta.get_field("name").max_length]
+
+
+class _PersonalizeForm(object):
+    # The graded wizard's personalize form for a design, filled in as a staff member
+    # would fill it in.
+
+    def __init__(self, user, design):
+        super(_PersonalizeForm, self).__init__()
+        view_class = import_string(view_dict[design._meta.app_label])
+        request = RequestFactory().get("/")
+        request.user = user
+        view = view_class()
+        view.setup(request, design_slug=design.slug)
+        view.object = None
+        self.form_class = view.get_form_class()
+        self.form_kwargs = view.get_form_kwargs()
+        self.blank_form = self.form_class(**self.form_kwargs)
+        self.gradeset_field_name = None
+        for (field_name, field) in self.blank_form.fields.items():
+            if (
+                isinstance(field, forms.ModelChoiceField)
+                and field.queryset.model is GradeSet
+            ):
+                self.gradeset_field_name = field_name
+
+    @property
+    def uses_gradesets(self):
+        return self.gradeset_field_name is not None
+
+    def get_data(self, name, gradeset, gauge):
+        data = {}
+        for (field_name, field) in self.blank_form.fields.items():
+            value = self.blank_form[field_name].value()
+            if (
+                field.required
+                and value in [None, ""]
+                and isinstance(field, forms.ChoiceField)
+                and not isinstance(field, forms.ModelChoiceField)
+            ):
+                # The first of the choices the design allows
+                value = next((k for (k, _) in field.choices if k not in [None, ""]), "")
+            if value is not None:
+                data[field_name] = value
+        data["name"] = name
+        data["stitch_gauge"] = gauge.stitches * 4
+        data["row_gauge"] = gauge.rows * 4
+        if self.uses_gradesets:
+            data[self.gradeset_field_name] = gradeset.id
+        return data
+
+    def make_pattern_spec(self, name, gradeset, gauge):
+        """
+        Make, check and return the GradedPatternSpec. Raises ValueError if the
+        form is invalid.
+        """
+        data = self.get_data(name, gradeset, gauge)
+        form = self.form_class(data=data, **self.form_kwargs)
+        if not form.is_valid():
+            raise ValueError("Invalid personalize form: %s" % form.errors.as_json())
+        pattern_spec = form.save()
+        check_graded_pattern_spec(pattern_spec)
+        return pattern_spec
+
+
+def _plan_entry(entry, personalize_form, gauge, user, retry_failed):
+    catalog_key = make_catalog_key(entry.design, entry.gradeset, entry.swatch)
+    job = (
+        GradedPatternBuildJob.objects.filter(user=user, catalog_key=catalog_key)
+        .order_by("-creation_date")
+        .first()
+    )
+    if job is None:
+        pattern_spec = personalize_form.make_pattern_spec(
+            entry.name, entry.gradeset, gauge
+        )
+        job = GradedPatternBuildJob.objects.create(
+            user=user, pattern_spec=pattern_spec, catalog_key=catalog_key
+        )
+    else:
+        # Which may have been made under another name (before the design was
+        # renamed, say)
+        entry.name = job.pattern_spec.name
+        if job.status == GradedPatternBuildJob.FAILED and retry_failed:
+            job = GradedPatternBuildJob.objects.create(
+                user=user, pattern_spec=job.pattern_spec, catalog_key=catalog_key
+            )
+    # Jobs that are still pending or running were interrupted, and are re-run
+    entry.job = job
+
+
+def _failed_entries(design, swatches, error):
+    entries = [CatalogEntry(design, None, swatch, design.name) for swatch in swatches]
+    for entry in entries:
+        (entry.status, entry.error) = (FAILED, error)
+    return entries
+
+
+def plan_catalog(user, designs, gradesets, swatches, pdf_dir=None, retry_failed=False):
+    """
+    Return a CatalogEntry for each pattern to build, making their pattern specs and
+    build jobs (or finding those of an earlier build). Entries whose spec could not
+    be made are marked as failed.
+    """
+    gauges = {swatch.id: swatch.get_gauge() for swatch in swatches}
+    gradeset_names = _distinct_names(gradesets)
+    swatch_names = _distinct_names(swatches)
+    entries = []
+    for design in designs:
+        try:
+            personalize_form = _PersonalizeForm(user, design)
+        except Exception as e:
+            logger.exception("Could not make the personalize form of %s", design)
+            entries.extend(_failed_entries(design, swatches, repr(e)))
+            continue
+
+        if not personalize_form.uses_gradesets:
+            design_gradesets = [None]
+        elif gradesets:
+            design_gradesets = gradesets
+        else:
+            entries.extend(_failed_entries(design, swatches, "No grade set given"))
+            continue
+
+        for gradeset in design_gradesets:
+            for swatch in swatches:
+                name = make_pattern_name(
+                    design,
+                    gradeset_names[gradeset.id] if gradeset else None,
+                    swatch_names[swatch.id],
+                )
+                entry = CatalogEntry(design, gradeset, swatch, name)
+                try:
+                    _plan_entry(
+                        entry, personalize_form, gauges[swatch.id], user, retry_failed
+                    )
+                except Exception as e:
+                    logger.exception("Could not make the pattern spec of %s", name)
+                    (entry.status, entry.error) = (FAILED, repr(e))
+                if pdf_dir is not None:
+                    entry.pdf_path = os.path.join(
+                        pdf_dir, design.slug, slugify(entry.name) + ".pdf"
+                    )
+                entries.append(entry)
+    return entries
+
+
+def _share_gradesets(gradesets):
+    _shared_gradesets.clear()
+    for gradeset in GradeSet.objects.filter(
+        id__in=[gradeset.id for gradeset in gradesets]
+    ).prefetch_related("grade_set"):
+        _shared_gradesets[gradeset.id] = gradeset
+
+
+def _use_shared_gradesets(pattern_spec):
+    # Point the spec at the grade sets loaded before the workers were forked, so
+    # that the grades aren't loaded again for every design
+    for field in pattern_spec._meta.concrete_fields:
+        if field.many_to_one and field.related_model is GradeSet:
+            gradeset = _shared_gradesets.get(getattr(pattern_spec, field.attname))
+            if gradeset is not None:
+                setattr(pattern_spec, field.name, gradeset)
+
+
+def _write_pdf(pattern, user, pdf_path):
+    view = GradedPatternPdfView(object=pattern, request=MockRequest(user, {}))
+    pdf = view.make_pdf()
+    os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+    # Written under another name first, so that an interrupted build never leaves
+    # a partial PDF behind for the next one to skip
+    partial_path = pdf_path + ".partial"
+    with open(partial_path, "wb") as f:
+        f.write(pdf)
+    os.replace(partial_path, pdf_path)
+
+
+def build_entry(job_id, pdf_path):
+    """
+    Build the pattern of a job (unless it already has been) and then its PDF
+    (unless there is no `pdf_path`, or it has already been written). Returns the
+    status, error and timings of the build for the CatalogEntry. Runs in the
+    workers, so takes and returns only plain values.
+    """
+    (status, error, timings) = (SKIPPED, None, {})
+    try:
+        job = GradedPatternBuildJob.objects.select_related("user").get(id=job_id)
+        if job.status == GradedPatternBuildJob.FAILED:
+            return (FAILED, job.error_message, timings)
+
+        if not job.finished:
+            _use_shared_gradesets(job.pattern_spec)
+            start = time.perf_counter()
+            run_build_job(job)
+            timings["build"] = time.perf_counter() - start
+            if not job.succeeded:
+                return (FAILED, job.error_message, timings)
+            status = BUILT
+
+        if pdf_path is not None and not os.path.exists(pdf_path):
+            pattern = GradedPattern.objects.get(id=job.graded_pattern_id)
+            start = time.perf_counter()
+            _write_pdf(pattern, job.user, pdf_path)
+            timings["pdf"] = time.perf_counter() - start
+            status = BUILT
+    except Exception as e:
+        logger.exception("Could not build catalog job %s", job_id)
+        (status, error) = (FAILED, repr(e))
+    return (status, error, timings)
+
+
+def build_catalog(entries, processes=1, progress=None):
+    """
+    Build the patterns (and PDFs) of the entries returned by plan_catalog(), in a
+    pool of `processes` processes (or in this one, if `processes` is 1), recording
+    the outcome in each entry. progress(entry), if given, is called as each entry
+    is finished.
+    """
+    to_build = [entry for entry in entries if entry.status is None]
+    warm_template_cache()
+    _share_gradesets(
+        {entry.gradeset for entry in to_build if entry.gradeset is not None}
+    )
+
+    def finish(entry, result):
+        (entry.status, entry.error, entry.timings) = result
+        # Refreshed for the report
+        entry.job.refresh_from_db()
+        if progress is not None:
+            progress(entry)
+
+    if processes > 1 and len(to_build) > 1:
+        with make_process_pool(min(processes, len(to_build))) as pool:
+            async_results = [
+                (entry, pool.apply_async(build_entry, (entry.job.id, entry.pdf_path)))
+                for entry in to_build
+            ]
+            for (entry, async_result) in async_results:
+                try:
+                    result = async_result.get()
+                except Exception as e:
+                    # The worker died. Whatever it was doing is re-run next time.
+                    result = (FAILED, repr(e), {})
+                finish(entry, result)
+    else:
+        for entry in to_build:
+            finish(entry, build_entry(entry.job.id, entry.pdf_path))
+
+    return entries
+
+
+def summarize_by_design(entries):
+    """
+    Return a dict, keyed by design slug, of how many of the design's patterns were
+    built, skipped and failed, and the seconds spent building them and their PDFs.
+    """
+    summaries = collections.OrderedDict()
+    for entry in entries:
+        summary = summaries.setdefault(
+            entry.design.slug,
+            {BUILT: 0, SKIPPED: 0, FAILED: 0, "build_seconds": 0.0, "pdf_seconds": 0.0},
+        )
+        summary[entry.status] += 1
+        summary["build_seconds"] += entry.timings.get("build", 0.0)
+        summary["pdf_seconds"] += entry.timings.get("pdf", 0.0)
+    return summaries
@@ -0,0 +1,70 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def check_graded_pattern_spec(graded_pattern_spec):
+    """
+    Cheap checks that can (and should) be done in the web tier before a build is
+    enqueued: the spec must be valid, and every grade must have the measurements
+    the garment needs. Raises if either check fails.
+    """
+    graded_pattern_spec.full_clean()
+    igp_class = graded_pattern_spec.get_igp_class()
+    missing_fields = igp_class.missing_body_fields(graded_pattern_spec)
+    if missing_fields:
+        field_list = ", ".join(missing_fields)
+        msg = "Missing measurements: %s" % field_list
+        raise RuntimeError(msg)
+
+
+def make_graded_pattern(graded_pattern_spec):
+    """
+    Run the whole (expensive) chain GradedGarmentParameters -> GradedConstructionSchematic ->
+    GradedPatternPieces -> GradedPattern for the given spec, and return the saved
+    GradedPattern. Assumes that check_graded_pattern_spec() has already passed.
+    """
+    user = graded_pattern_spec.user
+    igp_class = graded_pattern_spec.get_igp_class()
+
+    igp = igp_class.make_from_patternspec(user, graded_pattern_spec)
+    igp.full_clean()
+
+    logger.info(
+        "Successfully made graded IGP #{igp} for user {user}.".format(
+            igp=igp.id, user=user
+        )
+    )
+
+    schematic_class = igp.get_schematic_class()
+    schematic = schematic_class.make_from_garment_parameters(igp)
+    schematic.full_clean()
+
+    logger.info(
+        "Successfully made graded GarmentSchematic #{sch} for user {user}.".format(
+            sch=schematic.id, user=user
+        )
+    )
+
+    pieces_class = schematic.get_pieces_class()
+    pieces = pieces_class.make_from_schematic(schematic)
+    pieces.full_clean()
+
+    logger.info(
+        "Successfully made graded PatternPieces #{pieces} for user {user}.".format(
+            pieces=pieces.id, user=user
+        )
+    )
+
+    pattern_class = pieces.get_pattern_class()
+    pattern = pattern_class.make_from_graded_pattern_pieces(pieces)
+    pattern.full_clean()
+    pattern.save()
+
+    logger.info(
+        "Successfully made graded Pattern #{p} for user {user}.".format(
+            p=pattern.id, user=user
+        )
+    )
+
+    return pattern
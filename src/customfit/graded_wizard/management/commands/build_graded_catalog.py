@@ -0,0 +1,156 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from customfit.bodies.models import GradeSet
+from customfit.designs.models import Design
+from customfit.swatches.models import Swatch
+
+from ... import catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the graded patterns (and PDFs) of the catalog: one for each design, "
+        "grade set and swatch, owned by the given staff account. Can be re-run to "
+        "pick up where an interrupted build stopped."
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            "--user",
+            dest="user",
+            required=True,
+            help="Username of the (staff) account that will own the patterns",
+        )
+
+        parser.add_argument(
+            "--design",
+            action="append",
+            dest="design",
+            help="Slug of a design to build (may be repeated; default: all "
+            "published designs)",
+        )
+
+        parser.add_argument(
+            "--gradeset",
+            action="append",
+            type=int,
+            dest="gradeset",
+            default=[],
+            help="Id of a grade set to build each design in (may be repeated)",
+        )
+
+        parser.add_argument(
+            "--swatch",
+            action="append",
+            type=int,
+            dest="swatch",
+            required=True,
+            help="Id of a swatch whose gauge to build each design in (may be "
+            "repeated)",
+        )
+
+        parser.add_argument(
+            "--pdf-dir",
+            dest="pdf_dir",
+            default=None,
+            help="Directory to write the PDFs to, one sub-directory per design "
+            "(default: don't make PDFs)",
+        )
+
+        parser.add_argument(
+            "--processes",
+            type=int,
+            dest="processes",
+            default=1,
+            help="Number of processes to build the patterns in",
+        )
+
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            dest="retry_failed",
+            default=False,
+            help="Try again to build the patterns that failed last time",
+        )
+
+        parser.add_argument(
+            "--report",
+            dest="report",
+            default=None,
+            help="File to write a JSON report of every pattern to",
+        )
+
+    def _get_objects(self, model, ids, field_name="id"):
+        objects = list(model.objects.filter(**{field_name + "__in": ids}))
+        found = {getattr(obj, field_name) for obj in objects}
+        missing = [str(i) for i in ids if i not in found]
+        if missing:
+            raise CommandError(
+                "No such %s: %s" % (model._meta.verbose_name, ", ".join(missing))
+            )
+        return sorted(objects, key=lambda obj: ids.index(getattr(obj, field_name)))
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError("No such user: %s" % options["user"])
+
+        if options["design"]:
+            designs = self._get_objects(Design, options["design"], "slug")
+        else:
+            designs = list(catalog.get_published_designs())
+        gradesets = self._get_objects(GradeSet, options["gradeset"])
+        swatches = self._get_objects(Swatch, options["swatch"])
+
+        entries = catalog.plan_catalog(
+            user,
+            designs,
+            gradesets,
+            swatches,
+            pdf_dir=options["pdf_dir"],
+            retry_failed=options["retry_failed"],
+        )
+        self.stderr.write(
+            "Building %d patterns of %d designs" % (len(entries), len(designs))
+        )
+
+        def progress(entry):
+            if entry.status == catalog.FAILED:
+                self.stderr.write("  %s: failed" % entry.name)
+            else:
+                seconds = sum(entry.timings.values())
+                self.stderr.write(
+                    "  %s: %s (%.1fs)" % (entry.name, entry.status, seconds)
+                )
+
+        catalog.build_catalog(
+            entries, processes=options["processes"], progress=progress
+        )
+
+        for (slug, summary) in catalog.summarize_by_design(entries).items():
+            self.stdout.write(
+                "%s: %d built, %d skipped, %d failed; %.1fs building, %.1fs on PDFs"
+                % (
+                    slug,
+                    summary[catalog.BUILT],
+                    summary[catalog.SKIPPED],
+                    summary[catalog.FAILED],
+                    summary["build_seconds"],
+                    summary["pdf_seconds"],
+                )
+            )
+
+        if options["report"]:
+            with open(options["report"], "w") as f:
+                json.dump([entry.as_dict() for entry in entries], f, indent=2)
+
+        failures = [entry for entry in entries if entry.status == catalog.FAILED]
+        for entry in failures:
+            self.stderr.write("%s failed: %s" % (entry.name, entry.error))
+        if failures:
+            raise CommandError("%d patterns failed" % len(failures))
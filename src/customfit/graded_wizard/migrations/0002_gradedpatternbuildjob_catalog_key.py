@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("graded_wizard", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gradedpatternbuildjob",
+            name="catalog_key",
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+    ]
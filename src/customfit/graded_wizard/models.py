@@ -1,3 +1,91 @@
+import django.utils.timezone as timezone
+from django.contrib.auth.models import User
 from django.db import models
+from django.urls import reverse
 
-# Create your models here.
+from customfit.pattern_spec.models import GradedPatternSpec
+from customfit.patterns.models import GradedPattern
+
+
+class GradedPatternBuildJob(models.Model):
+    """
+    Tracks the (asynchronous) construction of a GradedPattern from a GradedPatternSpec.
+    The web tier validates the spec, creates one of these, and hands its id to a celery
+    worker (see customfit.graded_wizard.tasks). The worker then builds the
+    GradedGarmentParameters, GradedConstructionSchematic, GradedPatternPieces and
+    GradedPattern, recording its progress here so that the 'building...' page can poll it.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (PENDING, "waiting to start"),
+        (RUNNING, "building"),
+        (SUCCEEDED, "finished"),
+        (FAILED, "failed"),
+    )
+
+    FINISHED_STATUSES = [SUCCEEDED, FAILED]
+
+    user = models.ForeignKey(User, db_index=True, on_delete=models.CASCADE)
+
+    pattern_spec = models.ForeignKey(
+        GradedPatternSpec, related_name="+", on_delete=models.CASCADE
+    )
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+
+    # Filled in by the worker when the build succeeds
+    graded_pattern = models.ForeignKey(
+        GradedPattern,
+        blank=True,
+        null=True,
+        related_name="+",
+        on_delete=models.SET_NULL,
+    )
+
+    # Filled in by the worker when the build fails
+    error_message = models.TextField(blank=True)
+
+    # Set on the builds of customfit.graded_wizard.catalog: the ids of the design,
+    # grade set and swatch the pattern is made from, so that a later build of the
+    # catalog can find this one
+    catalog_key = models.CharField(max_length=100, blank=True, db_index=True)
+
+    creation_date = models.DateTimeField(default=timezone.now)
+    start_date = models.DateTimeField(blank=True, null=True)
+    finish_date = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return "Build of %s (%s)" % (self.pattern_spec, self.status)
+
+    def get_absolute_url(self):
+        return reverse("graded_wizard:build_progress", kwargs={"pk": self.id})
+
+    @property
+    def finished(self):
+        return self.status in self.FINISHED_STATUSES
+
+    @property
+    def succeeded(self):
+        return self.status == self.SUCCEEDED
+
+    def mark_running(self):
+        self.status = self.RUNNING
+        self.start_date = timezone.now()
+        self.save()
+
+    def mark_succeeded(self, graded_pattern):
+        self.status = self.SUCCEEDED
+        self.graded_pattern = graded_pattern
+        self.finish_date = timezone.now()
+        self.save()
+
+    def mark_failed(self, error_message):
+        self.status = self.FAILED
+        self.error_message = error_message
+        self.finish_date = timezone.now()
+        self.save()
@@ -0,0 +1,51 @@
+import logging
+
+from celery import shared_task
+from django.db import transaction
+
+from .helpers import make_graded_pattern
+from .models import GradedPatternBuildJob
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def build_graded_pattern(job_id):
+    """
+    Build the GradedPattern for a GradedPatternBuildJob, recording progress and outcome
+    in the job so that the 'building...' page can report it.
+    """
+    job = GradedPatternBuildJob.objects.get(id=job_id)
+    if job.finished:
+        # Celery may deliver a task more than once. Don't build the pattern twice.
+        logger.info("Graded-pattern build job %s already finished; skipping", job_id)
+        return job.status
+
+    run_build_job(job)
+    return job.status
+
+
+def run_build_job(job):
+    """
+    Build the pattern of an unfinished job in this process, and record the outcome
+    in the job. Split out of build_graded_pattern() for the build_graded_catalog
+    management command, which builds patterns in bulk.
+    """
+    logger.info("Starting graded-pattern build job %s", job.id)
+    job.mark_running()
+
+    try:
+        # Don't leave half-built garment parameters, schematics or pieces
+        # lying around if some later stage fails.
+        with transaction.atomic():
+            pattern = make_graded_pattern(job.pattern_spec)
+    except Exception as e:
+        # Retrying won't help: the engine is deterministic. Record the failure
+        # for the user (and the logs) instead.
+        logger.exception("Graded-pattern build job %s failed", job.id)
+        job.mark_failed(str(e))
+    else:
+        logger.info(
+            "Graded-pattern build job %s produced pattern %s", job.id, pattern.id
+        )
+        job.mark_succeeded(pattern)
@@ -1,14 +1,34 @@
 import datetime
-
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 from django.urls import reverse
+from PyPDF2 import PdfWriter
 
 import customfit.designs.helpers.design_choices as DC
 from customfit.bodies.factories import GradeSetFactory
 from customfit.stitches.tests import StitchFactory
-from customfit.test_garment.factories import GradedTestPatternFactory, TestDesignFactory
+from customfit.swatches.factories import SwatchFactory
+from customfit.sweaters.factories import SweaterDesignFactory
+from customfit.test_garment.factories import (
+    GradedTestPatternFactory,
+    GradedTestPatternSpecFactory,
+    TestDesignFactory,
+)
 from customfit.userauth.factories import StaffFactory, UserFactory
 
+from . import catalog
+from .models import GradedPatternBuildJob
+from .tasks import build_graded_pattern
+
 
 class AllDesignsViewTests(TestCase):
 
@@ -175,7 +195,12 @@ class PersonalizeDesignViewTest(TestCase):
 
         response = self.client.post(self.personalize_url, self.post_entries)
         self.assertEqual(response.status_code, 302)
-        self.assertRegex(response["Location"], r"^/pattern/graded/\d+/$")
+        self.assertRegex(response["Location"], r"^/graded/build/\d+/$")
+
+        # Celery runs eagerly in tests, so the pattern is already built
+        response2 = self.client.get(response["Location"])
+        self.assertEqual(response2.status_code, 302)
+        self.assertRegex(response2["Location"], r"^/pattern/graded/\d+/$")
 
     def test_post_follow(self):
         self.login()
@@ -216,3 +241,302 @@ class TestPatternListView(TestCase):
         )
 
         self.assertContains(resp, goal_html, html=True)
+
+
+class GradedPatternBuildJobTests(TestCase):
+
+    def setUp(self):
+        super(GradedPatternBuildJobTests, self).setUp()
+        self.user = StaffFactory()
+        self.pattern_spec = GradedTestPatternSpecFactory(user=self.user)
+        self.job = GradedPatternBuildJob.objects.create(
+            user=self.user, pattern_spec=self.pattern_spec
+        )
+        self.progress_url = reverse(
+            "graded_wizard:build_progress", kwargs={"pk": self.job.pk}
+        )
+        self.status_url = reverse(
+            "graded_wizard:build_status", kwargs={"pk": self.job.pk}
+        )
+
+    def test_task_success(self):
+        status = build_graded_pattern(self.job.id)
+        self.assertEqual(status, GradedPatternBuildJob.SUCCEEDED)
+        self.job.refresh_from_db()
+        self.assertTrue(self.job.finished)
+        self.assertIsNotNone(self.job.graded_pattern)
+        self.assertIsNotNone(self.job.start_date)
+        self.assertIsNotNone(self.job.finish_date)
+        self.assertEqual(self.job.error_message, "")
+
+    def test_task_failure(self):
+        with patch(
+            "customfit.graded_wizard.tasks.make_graded_pattern",
+            side_effect=RuntimeError("engine fell over"),
+        ):
+            status = build_graded_pattern(self.job.id)
+        self.assertEqual(status, GradedPatternBuildJob.FAILED)
+        self.job.refresh_from_db()
+        self.assertIsNone(self.job.graded_pattern)
+        self.assertEqual(self.job.error_message, "engine fell over")
+
+    def test_task_not_run_twice(self):
+        build_graded_pattern(self.job.id)
+        self.job.refresh_from_db()
+        pattern = self.job.graded_pattern
+        with patch("customfit.graded_wizard.tasks.make_graded_pattern") as mock_make:
+            build_graded_pattern(self.job.id)
+        mock_make.assert_not_called()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.graded_pattern, pattern)
+
+    def test_status_pending(self):
+        self.client.force_login(self.user)
+        resp = self.client.get(self.status_url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp.json(),
+            {
+                "status": GradedPatternBuildJob.PENDING,
+                "status_display": "waiting to start",
+                "finished": False,
+                "error_message": "",
+                "pattern_url": None,
+            },
+        )
+
+    def test_status_succeeded(self):
+        build_graded_pattern(self.job.id)
+        self.job.refresh_from_db()
+        self.client.force_login(self.user)
+        resp = self.client.get(self.status_url)
+        data = resp.json()
+        self.assertTrue(data["finished"])
+        self.assertEqual(
+            data["pattern_url"], self.job.graded_pattern.get_absolute_url()
+        )
+
+    def test_progress_page_pending(self):
+        self.client.force_login(self.user)
+        resp = self.client.get(self.progress_url)
+        self.assertContains(resp, self.status_url)
+        self.assertContains(resp, "Waiting to start")
+
+    def test_progress_page_failed(self):
+        self.job.mark_failed("engine fell over")
+        self.client.force_login(self.user)
+        resp = self.client.get(self.progress_url)
+        self.assertContains(resp, "We were not able to build this pattern")
+        self.assertContains(resp, "engine fell over")
+
+    def test_progress_page_succeeded_redirects(self):
+        build_graded_pattern(self.job.id)
+        self.job.refresh_from_db()
+        self.client.force_login(self.user)
+        resp = self.client.get(self.progress_url)
+        self.assertRedirects(
+            resp,
+            self.job.graded_pattern.get_absolute_url(),
+            fetch_redirect_response=False,
+        )
+
+    def test_staff_required(self):
+        user = UserFactory()
+        self.client.force_login(user)
+        resp = self.client.get(self.status_url)
+        self.assertEqual(resp.status_code, 302)
+        resp = self.client.get(self.progress_url)
+        self.assertEqual(resp.status_code, 302)
+
+
+class OnePagePdfHTML(object):
+    # Stand-in for WeasyPrint that makes a one-page PDF
+
+    def __init__(self, string, url_fetcher):
+        pass
+
+    def render(self):
+        return self
+
+    def write_pdf(self, target):
+        writer = PdfWriter()
+        writer.add_blank_page(612, 792)
+        writer.write(target)
+
+
+def _build_entry_in_worker(job_id, pdf_path):
+    # Stands in for catalog.build_entry() in the workers, which can't see the
+    # test's database. Reports where it ran.
+    return (
+        catalog.BUILT,
+        None,
+        {"pid": os.getpid(), "cache": id(caches["default"])},
+    )
+
+
+class BuildGradedCatalogTests(TestCase):
+
+    def setUp(self):
+        super(BuildGradedCatalogTests, self).setUp()
+        self.user = StaffFactory()
+        self.design = SweaterDesignFactory(name="Catalog design")
+        self.gradeset = GradeSetFactory(user=self.user, name="Standard")
+        self.swatch = SwatchFactory(user=self.user, name="Worsted")
+        self.pdf_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pdf_dir)
+
+    def _build(self, **kwargs):
+        entries = catalog.plan_catalog(
+            self.user,
+            [self.design],
+            [self.gradeset],
+            [self.swatch],
+            pdf_dir=self.pdf_dir,
+            **kwargs
+        )
+        with patch("customfit.views.HTML", OnePagePdfHTML):
+            return catalog.build_catalog(entries)
+
+    def test_build(self):
+        [entry] = self._build()
+        self.assertEqual(entry.status, catalog.BUILT)
+        self.assertIsNone(entry.error)
+        self.assertEqual(set(entry.timings), {"build", "pdf"})
+
+        job = entry.job
+        self.assertTrue(job.succeeded)
+        pattern_spec = job.pattern_spec
+        self.assertEqual(pattern_spec.name, "Catalog design (Standard, Worsted)")
+        self.assertEqual(pattern_spec.design_origin, self.design)
+        self.assertEqual(pattern_spec.gradeset, self.gradeset)
+        self.assertEqual(pattern_spec.stitch_gauge, 20)
+        self.assertEqual(pattern_spec.row_gauge, 28)
+        self.assertEqual(job.graded_pattern.user, self.user)
+
+        self.assertEqual(
+            entry.pdf_path,
+            os.path.join(
+                self.pdf_dir, self.design.slug, "catalog-design-standard-worsted.pdf"
+            ),
+        )
+        self.assertTrue(os.path.exists(entry.pdf_path))
+
+    def test_resume(self):
+        [entry] = self._build()
+        # A second build finds the first one's work
+        [second_entry] = self._build()
+        self.assertEqual(second_entry.status, catalog.SKIPPED)
+        self.assertEqual(second_entry.job, entry.job)
+        self.assertEqual(GradedPatternBuildJob.objects.count(), 1)
+
+        # and only re-does what is missing
+        os.remove(entry.pdf_path)
+        [third_entry] = self._build()
+        self.assertEqual(third_entry.status, catalog.BUILT)
+        self.assertEqual(set(third_entry.timings), {"pdf"})
+        self.assertTrue(os.path.exists(entry.pdf_path))
+
+    def test_resume_keyed_on_ids(self):
+        [entry] = self._build()
+        # Renaming the design doesn't lose the patterns already built
+        self.design.name = "Renamed design"
+        self.design.save()
+        [renamed_entry] = self._build()
+        self.assertEqual(renamed_entry.status, catalog.SKIPPED)
+        self.assertEqual(renamed_entry.job, entry.job)
+        self.assertEqual(renamed_entry.pdf_path, entry.pdf_path)
+
+    def test_swatches_with_same_name(self):
+        other_swatch = SwatchFactory(user=self.user, name="Worsted")
+        entries = catalog.plan_catalog(
+            self.user, [self.design], [self.gradeset], [self.swatch, other_swatch]
+        )
+        self.assertEqual(
+            [entry.name for entry in entries],
+            [
+                "Catalog design (Standard, Worsted #%s)" % self.swatch.id,
+                "Catalog design (Standard, Worsted #%s)" % other_swatch.id,
+            ],
+        )
+        self.assertNotEqual(entries[0].job, entries[1].job)
+
+    def test_build_in_parallel(self):
+        entries = catalog.plan_catalog(
+            self.user,
+            [self.design],
+            [self.gradeset],
+            [self.swatch, SwatchFactory(user=self.user, name="Aran")],
+        )
+        with patch(
+            "customfit.graded_wizard.catalog.build_entry", _build_entry_in_worker
+        ):
+            catalog.build_catalog(entries, processes=2)
+        for entry in entries:
+            self.assertEqual(entry.status, catalog.BUILT)
+            self.assertNotEqual(entry.timings["pid"], os.getpid())
+            # The workers don't share the parent's cache clients
+            self.assertNotEqual(entry.timings["cache"], id(caches["default"]))
+
+    def test_interrupted_build_rerun(self):
+        [entry] = catalog.plan_catalog(
+            self.user, [self.design], [self.gradeset], [self.swatch]
+        )
+        entry.job.mark_running()
+        [entry] = self._build()
+        self.assertEqual(entry.status, catalog.BUILT)
+        self.assertTrue(entry.job.succeeded)
+
+    def test_failures(self):
+        with patch(
+            "customfit.graded_wizard.tasks.make_graded_pattern",
+            side_effect=RuntimeError("engine fell over"),
+        ):
+            [entry] = self._build()
+        self.assertEqual(entry.status, catalog.FAILED)
+        self.assertEqual(entry.error, "engine fell over")
+        self.assertFalse(os.path.exists(entry.pdf_path))
+
+        # Failures are not retried unless asked
+        [entry] = self._build()
+        self.assertEqual(entry.status, catalog.FAILED)
+        [entry] = self._build(retry_failed=True)
+        self.assertEqual(entry.status, catalog.BUILT)
+        self.assertEqual(GradedPatternBuildJob.objects.count(), 2)
+
+    def test_no_gradeset(self):
+        [entry] = catalog.plan_catalog(self.user, [self.design], [], [self.swatch])
+        self.assertEqual(entry.status, catalog.FAILED)
+        self.assertIsNone(entry.job)
+
+    def test_command(self):
+        (fd, report_path) = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, report_path)
+        stdout = io.StringIO()
+        with patch("customfit.views.HTML", OnePagePdfHTML):
+            call_command(
+                "build_graded_catalog",
+                user=self.user.username,
+                design=[self.design.slug],
+                gradeset=[self.gradeset.id],
+                swatch=[self.swatch.id],
+                pdf_dir=self.pdf_dir,
+                report=report_path,
+                stdout=stdout,
+                stderr=io.StringIO(),
+            )
+        self.assertIn(
+            "%s: 1 built, 0 skipped, 0 failed" % self.design.slug, stdout.getvalue()
+        )
+        with open(report_path) as f:
+            [report] = json.load(f)
+        self.assertEqual(report["status"], catalog.BUILT)
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "build_graded_catalog",
+                user=self.user.username,
+                swatch=[self.swatch.id + 1],
+                stdout=io.StringIO(),
+                stderr=io.StringIO(),
+            )
@@ -23,6 +23,16 @@ urlpatterns = [
         staff_member_required(views.ChooseDesignView.as_view()),
         name="choose_design",
     ),
+    re_path(
+        r"^build/(?P<pk>\d+)/$",
+        staff_member_required(views.GradedPatternBuildProgressView.as_view()),
+        name="build_progress",
+    ),
+    re_path(
+        r"^build/(?P<pk>\d+)/status/$",
+        staff_member_required(views.GradedPatternBuildStatusView.as_view()),
+        name="build_status",
+    ),
     # # Note that the regex in the next line is from the django documentation
     # # as the regex for slugs:
     # # https://docs.djangoproject.com/en/1.9/ref/validators/#validate-slug
@@ -1,13 +1,20 @@
 import logging
 
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404
-from django.urls import reverse
 from django.utils.module_loading import import_string
-from django.views.generic import CreateView, ListView
+from django.views.generic import CreateView, DetailView, ListView
+from django.views.generic.detail import BaseDetailView
 
+from customfit.designs.catalog import get_design_catalog
 from customfit.designs.models import Design
 from customfit.patterns.models import GradedPattern
 
+from .helpers import check_graded_pattern_spec
+from .models import GradedPatternBuildJob
+from .tasks import build_graded_pattern
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,9 +47,12 @@ class ListPatternsView(ListView):
 
 class ChooseDesignView(ListView):
 
-    model = Design
     template_name = "graded_wizard/all_designs.html"
 
+    def get_queryset(self):
+        # DesignCards from the cached catalog, rather than Designs
+        return get_design_catalog().all_designs()
+
 
 ############################################################################################################
 #
@@ -51,70 +61,28 @@ class ChooseDesignView(ListView):
 ############################################################################################################
 
 
-# Logic for making the pattern:
-
-
-def _make_pattern_return_url(request, graded_pattern_spec):
-
-    graded_pattern_spec.full_clean()
-    igp_class = graded_pattern_spec.get_igp_class()
-    missing_fields = igp_class.missing_body_fields(graded_pattern_spec)
-    if missing_fields:
-        field_list = ", ".join(missing_fields)
-        msg = "Missing measurements: %s" % field_list
-        raise RuntimeError(msg)
-    else:
-
-        logger.info(
-            "User {user} has appropriate measurements for graded patternspec "
-            "#{pspec}; making IGP".format(
-                user=request.user, pspec=graded_pattern_spec.pk
-            )
-        )
-        # We can make the IGP; let's see if it's also valid.
+# Logic for making the pattern. Note that we only validate the spec here: the actual
+# construction of the pattern is expensive (several seconds for a many-graded sweater)
+# and so is handed off to a celery worker. The user is sent to a 'building...' page which
+# polls the job until it is done.
 
-        igp = igp_class.make_from_patternspec(request.user, graded_pattern_spec)
-        igp.full_clean()
 
-        logger.info(
-            "Successfully made graded IGP #{igp} for user {user}. "
-            "Continuing to tweak or approval.".format(igp=igp.id, user=request.user)
-        )
+def _enqueue_pattern_build(request, graded_pattern_spec):
 
-        schematic_class = igp.get_schematic_class()
-        schematic = schematic_class.make_from_garment_parameters(igp)
-        schematic.full_clean()
+    check_graded_pattern_spec(graded_pattern_spec)
 
-        logger.info(
-            "Successfully made graded GarmentSchematic #{sch} for user {user}. "
-            "Continuing to tweak or approval.".format(
-                sch=schematic.id, user=request.user
-            )
+    logger.info(
+        "User {user} has appropriate measurements for graded patternspec "
+        "#{pspec}; enqueueing build".format(
+            user=request.user, pspec=graded_pattern_spec.pk
         )
+    )
 
-        pieces_class = schematic.get_pieces_class()
-        pieces = pieces_class.make_from_schematic(schematic)
-        pieces.full_clean()
+    job = GradedPatternBuildJob(user=request.user, pattern_spec=graded_pattern_spec)
+    job.save()
+    build_graded_pattern.delay(job.id)
 
-        logger.info(
-            "Successfully made graded PatternPieces #{pieces} for user {user}. "
-            "Continuing to tweak or approval.".format(
-                pieces=pieces.id, user=request.user
-            )
-        )
-
-        pattern_class = pieces.get_pattern_class()
-        pattern = pattern_class.make_from_graded_pattern_pieces(pieces)
-        pattern.full_clean()
-        pattern.save()
-
-        logger.info(
-            "Successfully made graded Pattern #{p} for user {user}. "
-            "Continuing to tweak or approval.".format(p=pattern.id, user=request.user)
-        )
-
-        success_url = reverse("patterns:gradedpattern_detail_view", args=(pattern.id,))
-        return success_url
+    return job.get_absolute_url()
 
 
 # And now, the actual class
@@ -164,10 +132,67 @@ class PersonalizeGradedDesignView(CreateView):
         return super(PersonalizeGradedDesignView, self).form_invalid(form)
 
     def get_success_url(self):
-        redirect_url = _make_pattern_return_url(self.request, self.object)
+        redirect_url = _enqueue_pattern_build(self.request, self.object)
         return redirect_url
 
 
+############################################################################################################
+#
+# Wait for the pattern to be built
+#
+############################################################################################################
+
+
+class _BuildJobMixin(object):
+
+    model = GradedPatternBuildJob
+    context_object_name = "job"
+
+    def get_object(self, queryset=None):
+        job = super(_BuildJobMixin, self).get_object(queryset)
+        if job.user == self.request.user or self.request.user.is_staff:
+            return job
+        else:
+            raise PermissionDenied
+
+
+class GradedPatternBuildProgressView(_BuildJobMixin, DetailView):
+    """
+    The 'building...' page. Polls GradedPatternBuildStatusView until the job is
+    finished, and then sends the user on to the pattern. If the job is already finished
+    by the time the user arrives (as it will be when celery runs tasks eagerly) we
+    skip the page entirely.
+    """
+
+    template_name = "graded_wizard/build_progress.html"
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        if self.object.succeeded:
+            return HttpResponseRedirect(self.object.graded_pattern.get_absolute_url())
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
+
+class GradedPatternBuildStatusView(_BuildJobMixin, BaseDetailView):
+    """
+    JSON status endpoint for a GradedPatternBuildJob.
+    """
+
+    def render_to_response(self, context, **response_kwargs):
+        job = self.object
+        status = {
+            "status": job.status,
+            "status_display": job.get_status_display(),
+            "finished": job.finished,
+            "error_message": job.error_message,
+            "pattern_url": (
+                job.graded_pattern.get_absolute_url() if job.succeeded else None
+            ),
+        }
+        return JsonResponse(status)
+
+
 # Magic garment registry
 
 
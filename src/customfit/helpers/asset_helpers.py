@@ -0,0 +1,111 @@
+"""
+An index of our static files, and an in-process cache of the assets (fonts, CSS,
+images) that WeasyPrint asks for while rendering PDFs.
+
+Every PDF refers to the same handful of assets, and customfit.views.pdf_url_fetcher
+used to look for each of them on disk (or in the cache server) every time.
+find_static_asset() looks them up in an index of the static directory instead,
+built once per process (see build_static_asset_index(), which
+customfit.patterns.tasks calls when a worker process starts). get_pdf_asset()
+keeps the fetched assets in memory, up to settings.PDF_ASSET_CACHE_BYTES of them,
+so that a worker rendering PDF after PDF only fetches each asset once.
+"""
+
+import logging
+import mimetypes
+import os
+import threading
+
+from django.conf import settings
+
+from .memo_helpers import LRUMemo
+
+logger = logging.getLogger(__name__)
+
+
+# customfit/static
+STATIC_ASSET_ROOT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "static"
+)
+
+# Path relative to STATIC_ASSET_ROOT -> full path. None until built.
+_static_index = None
+_static_index_lock = threading.Lock()
+
+
+def build_static_asset_index(root=None):
+    """
+    (Re-)build the index of the files under `root` (default: STATIC_ASSET_ROOT)
+    and return how many there are.
+    """
+    global _static_index
+
+    if root is None:
+        root = STATIC_ASSET_ROOT
+    index = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            full_path = os.path.join(dirpath, filename)
+            rel_path = os.path.relpath(full_path, root).replace(os.sep, "/")
+            index[rel_path] = full_path
+    with _static_index_lock:
+        _static_index = index
+    logger.info("Indexed %s static assets under %s", len(index), root)
+    return len(index)
+
+
+def find_static_asset(rel_path):
+    """
+    Return the full path of the static file at `rel_path` (relative to the
+    static directory, as in a static URL) or None if there is no such file.
+    """
+    if _static_index is None:
+        build_static_asset_index()
+    return _static_index.get(rel_path)
+
+
+def read_static_asset(rel_path):
+    """
+    Return the static file at `rel_path` as WeasyPrint's url_fetcher would: a dict
+    of its contents (under 'string'), mime_type and encoding. None if there is no
+    such file.
+    """
+    path = find_static_asset(rel_path)
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        contents = f.read()
+    (mime_type, encoding) = mimetypes.guess_type(path)
+    return {"string": contents, "mime_type": mime_type, "encoding": encoding}
+
+
+def _asset_size(asset):
+    contents = asset.get("string") or b""
+    return len(contents)
+
+
+_pdf_assets = LRUMemo(
+    getattr(settings, "PDF_ASSET_CACHE_BYTES", 32 * 1024 * 1024), sizeof=_asset_size
+)
+
+
+def get_pdf_asset(url, fetch):
+    """
+    Return (a copy of) the asset at `url`, calling fetch() to get it if it is not
+    in memory. fetch() must return a url_fetcher dict with the contents under
+    'string' (and not 'file_obj').
+    """
+    # A copy, so that whatever WeasyPrint does with it can't change what we keep
+    return dict(_pdf_assets.get_or_compute(url, fetch))
+
+
+def pdf_asset_cache_info():
+    """
+    Return the MemoInfo of the PDF asset cache: hits, misses, and its maximum and
+    current sizes in bytes.
+    """
+    return _pdf_assets.info()
+
+
+def clear_pdf_asset_cache():
+    _pdf_assets.clear()
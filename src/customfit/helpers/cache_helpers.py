@@ -0,0 +1,178 @@
+"""
+Helpers for filling the cache without stampedes, and for content-addressed keys.
+
+Patterntext and PDFs are expensive to render, and are usually wanted by several
+requests (and the prefill task) at about the same time: just after the pattern is
+approved, say, or when a user opens both PDF links at once. get_or_set_single_flight()
+makes sure that only one of them renders any given cache entry while the others
+wait for it to show up.
+
+Cache keys built from database ids can't be shared between objects with the same
+contents, and silently go stale when those contents change. model_fingerprint()
+describes a model instance by its values instead, so that keys can be built from
+what was rendered rather than from where it is stored.
+"""
+
+import hashlib
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.cache import cache
+from django.db import models
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightTimeout(Exception):
+    """
+    Raised by get_or_set_single_flight() when a caller has waited as long as it
+    was allowed to for someone else to compute a value, and may not compute it
+    itself.
+    """
+
+
+def make_lock_key(cache_key):
+    return "lock:" + cache_key
+
+
+def get_or_set_single_flight(
+    cache_key,
+    compute,
+    lock_timeout=60,
+    wait_timeout=15,
+    poll_interval=0.1,
+    compute_after_wait=True,
+):
+    """
+    Return the value cached under `cache_key`. On a miss, one caller (per cache)
+    takes a lock in the cache, calls compute() and stores its (non-None) value,
+    while any other callers missing the same key poll the cache until the value
+    appears.
+
+    The lock expires after `lock_timeout` seconds in case its holder dies, in
+    which case a waiter takes over. A waiter that has waited `wait_timeout`
+    seconds stops waiting and computes the value itself or, if
+    `compute_after_wait` is False, raises SingleFlightTimeout. Exceptions raised
+    by compute() are passed through, and release the lock.
+    """
+    value = cache.get(cache_key)
+    if value is not None:
+        return value
+
+    lock_key = make_lock_key(cache_key)
+    deadline = time.monotonic() + wait_timeout
+    while True:
+        if cache.add(lock_key, True, lock_timeout):
+            try:
+                # Someone may have finished while we were deciding to take the lock
+                value = cache.get(cache_key)
+                if value is None:
+                    value = compute()
+                    cache.set(cache_key, value)
+            finally:
+                cache.delete(lock_key)
+            return value
+
+        if time.monotonic() >= deadline:
+            if not compute_after_wait:
+                raise SingleFlightTimeout(cache_key)
+            logger.warning("Gave up waiting for %s; computing it anyway", cache_key)
+            value = compute()
+            cache.set(cache_key, value)
+            return value
+
+        time.sleep(poll_interval)
+        value = cache.get(cache_key)
+        if value is not None:
+            return value
+
+
+def _generic_foreign_keys(instance):
+    return [
+        field
+        for field in instance._meta.private_fields
+        if isinstance(field, GenericForeignKey)
+    ]
+
+
+def _skip_field(field):
+    # Ids, one-to-one links (to parent-class rows, or to an object's own schematic),
+    # timestamps and owners say nothing about what an object looks like. Nor do
+    # non-editable fields, which hold what is derived from other fields (a pattern's
+    # spec source, say, or its own content fingerprint).
+    if field.primary_key or field.one_to_one or not field.editable:
+        return True
+    if isinstance(field, models.DateField):
+        return True
+    return (
+        field.is_relation
+        and field.related_model._meta.label == settings.AUTH_USER_MODEL
+    )
+
+
+def model_fingerprint(instance, depth=1, memo=None):
+    """
+    Return a string describing the values of a model instance: its concrete
+    fields, other than ids, one-to-one links, timestamps, owners and non-editable
+    fields. The objects it links to (including through generic foreign keys) are
+    described by their own fingerprints down to `depth` levels, and by their ids
+    below that.
+
+    Pass the same dict as `memo` to several calls to describe each linked object
+    (a stitch used all over a pattern spec, say) only once.
+    """
+    if memo is None:
+        memo = {}
+    generic_fields = _generic_foreign_keys(instance)
+    generic_attnames = set()
+    for field in generic_fields:
+        generic_attnames.add(field.fk_field)
+        generic_attnames.add(instance._meta.get_field(field.ct_field).attname)
+
+    values = [instance._meta.label]
+    for field in instance._meta.concrete_fields:
+        if _skip_field(field) or field.attname in generic_attnames:
+            continue
+        value = field.value_from_object(instance)
+        if field.is_relation and depth > 0 and value is not None:
+            memo_key = (field.related_model._meta.label, value, depth - 1)
+            if memo_key not in memo:
+                related = getattr(instance, field.name)
+                memo[memo_key] = model_fingerprint(related, depth - 1, memo)
+            value = memo[memo_key]
+        elif not field.is_relation:
+            # As stored, so that (say) a float field set to 5 matches one loaded as 5.0
+            value = repr(field.get_prep_value(value))
+        else:
+            value = repr(value)
+        values.append("%s=%s" % (field.attname, value))
+    for field in generic_fields:
+        related = getattr(instance, field.name)
+        if related is not None:
+            values.append(model_fingerprint(related, depth, memo))
+    return "(%s)" % ";".join(values)
+
+
+def make_digest(*parts):
+    """
+    Return a hex digest of the given strings, suitable for use in a cache key.
+    """
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def get_cache_generation(name):
+    """
+    Return the current generation of the named group of cache entries. Entries
+    keyed on the generation are invalidated, all at once, by
+    bump_cache_generation().
+    """
+    # Random rather than counted, so that a generation evicted from the cache
+    # can't come back with a value that was used before.
+    return cache.get_or_set("generation:" + name, lambda: uuid.uuid4().hex, None)
+
+
+def bump_cache_generation(name):
+    cache.set("generation:" + name, uuid.uuid4().hex, None)
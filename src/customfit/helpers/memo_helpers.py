@@ -0,0 +1,166 @@
+"""
+Helpers for memoizing the pure computations of the pattern engine.
+
+The shaping solvers (see customfit.sweaters.models.pieces.base_piece) are called
+over and over with identical inputs: within a single piece (as the waist/bust
+code retries with adjusted stitch counts), across the grades of a graded pattern,
+and across the patterns built by a single worker. LRUMemo is a small, bounded,
+thread-safe cache with hit/miss counters for such computations.
+
+Pieces, on the other hand, have many values derived from their fields (row-counts,
+areas) that call each other over and over while a pattern is rendered. Those are
+remembered per instance instead: see DerivedValuesMixin and memoized().
+"""
+
+import functools
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+
+logger = logging.getLogger(__name__)
+
+
+MemoInfo = namedtuple("MemoInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class LRUMemo(object):
+    """
+    A bounded least-recently-used map from (hashable) keys to computed values,
+    counting hits and misses. A maxsize of 0 disables the cache (every lookup
+    is a miss and nothing is stored).
+
+    By default, maxsize is a number of entries. If `sizeof` is given, it is
+    instead a limit on the total sizeof(value) of the entries (their size in
+    bytes, say), and a value bigger than maxsize is never stored.
+    """
+
+    def __init__(self, maxsize, sizeof=None):
+        super(LRUMemo, self).__init__()
+        self._maxsize = maxsize
+        self._sizeof = sizeof
+        self._entries = OrderedDict()
+        # Key -> size of its entry, and their total
+        self._sizes = {}
+        self._currsize = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the value stored under `key`, calling compute() (without holding
+        the lock, so that computations may themselves use memoized functions) and
+        storing its value if there is none. Exceptions raised by compute() are
+        passed through and nothing is stored.
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = compute()
+
+        size = 1 if self._sizeof is None else self._sizeof(value)
+        if 0 < self._maxsize and size <= self._maxsize:
+            with self._lock:
+                self._currsize += size - self._sizes.get(key, 0)
+                self._entries[key] = value
+                self._sizes[key] = size
+                self._entries.move_to_end(key)
+                while self._currsize > self._maxsize:
+                    (old_key, _) = self._entries.popitem(last=False)
+                    self._currsize -= self._sizes.pop(old_key)
+        return value
+
+    def info(self):
+        """
+        Return the MemoInfo of the cache. Its currsize is in the units of maxsize:
+        a number of entries, or their total size.
+        """
+        with self._lock:
+            return MemoInfo(self.hits, self.misses, self._maxsize, self._currsize)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._currsize = 0
+            self.hits = 0
+            self.misses = 0
+
+
+# Where DerivedValuesMixin instances keep their remembered values
+_DERIVED_VALUES_ATTR = "_derived_values"
+
+
+class DerivedValuesMixin(object):
+    """
+    Mixin for (model) classes with @memoized methods and properties. Their values
+    are computed once per instance and then remembered until any attribute of the
+    instance-- a model field, say-- is assigned, at which point they are all
+    forgotten. So values derived only from the instance's own fields are never
+    stale. Values that also depend on other objects (a piece's gauge, say, or the
+    pieces of a PatternPieces) are remembered until one of the instance's own
+    attributes is assigned: call forget_derived_values() after changing those
+    other objects in place.
+    """
+
+    def __setattr__(self, name, value):
+        self.__dict__.pop(_DERIVED_VALUES_ATTR, None)
+        super(DerivedValuesMixin, self).__setattr__(name, value)
+
+    def forget_derived_values(self):
+        self.__dict__.pop(_DERIVED_VALUES_ATTR, None)
+
+    def __getstate__(self):
+        # Copies (and unpickled instances) start afresh, rather than sharing the
+        # remembered values of the original
+        state = super(DerivedValuesMixin, self).__getstate__()
+        if isinstance(state, dict) and _DERIVED_VALUES_ATTR in state:
+            state = dict(state)
+            del state[_DERIVED_VALUES_ATTR]
+        return state
+
+
+def memoized(method):
+    """
+    Decorator for methods of DerivedValuesMixin subclasses whose arguments (other
+    than self) are hashable, and for the getters of properties (see
+    memoized_property()). Each value is remembered under the method and its
+    arguments. Exceptions are passed through and nothing is remembered.
+    """
+    # The qualified name, so that an override and the method it overrides (if
+    # both are memoized) are remembered separately
+    name = method.__qualname__
+
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        key = (name,) + args
+        values = self.__dict__.get(_DERIVED_VALUES_ATTR)
+        if values is None:
+            values = {}
+            # Directly, so as not to forget what we are remembering
+            self.__dict__[_DERIVED_VALUES_ATTR] = values
+        try:
+            return values[key]
+        except KeyError:
+            pass
+        value = method(self, *args)
+        # If method() assigned to an attribute of self, `values` has been
+        # forgotten along with everything in it. Which is as it should be.
+        values[key] = value
+        return value
+
+    return wrapper
+
+
+def memoized_property(method):
+    """
+    Like @property, but the value is remembered as by @memoized.
+    """
+    return property(memoized(method))
@@ -0,0 +1,95 @@
+"""
+Helpers for spreading per-grade computation across processes.
+
+Graded patterns are computed one grade at a time, and (until their results are
+persisted) the grades are independent of each other. map_over_grades() lets the
+engine compute them in a process pool when settings.GRADED_PATTERN_PROCESSES is
+greater than one, and falls back to a plain serial map otherwise.
+"""
+
+import logging
+import pickle
+
+import billiard
+from django import db
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+# Connections (and cache clients) inherited from the parent process. See
+# _initialize_worker().
+_inherited_connections = []
+
+
+def _initialize_worker():
+    # Forked children inherit the parent's database connections. Using (or even
+    # closing) the parent's socket from a child would corrupt the parent's session,
+    # so we just set them aside-- holding a reference so that they are never garbage-
+    # collected and closed-- and let Django open a fresh connection on demand.
+    for conn in db.connections.all(initialized_only=True):
+        if conn.connection is not None:
+            _inherited_connections.append(conn.connection)
+        conn.connection = None
+    # The same goes for the cache clients, which (for memcached) hold sockets of
+    # their own. Each child gets new ones.
+    for cache in caches.all(initialized_only=True):
+        _inherited_connections.append(cache)
+    for alias in caches:
+        caches[alias] = caches.create_connection(alias)
+
+
+def make_process_pool(processes):
+    """
+    Return a pool (a billiard.Pool) of `processes` forked workers, each of which
+    opens its own database connections. Forking lets the workers share whatever
+    the parent has already loaded (compiled templates, say).
+
+    Billiard rather than multiprocessing, because graded patterns are built in
+    Celery's prefork workers. Those are daemonic, and multiprocessing does not let
+    daemonic processes have children.
+    """
+    return billiard.Pool(processes=processes, initializer=_initialize_worker)
+
+
+def get_grade_process_count():
+    return getattr(settings, "GRADED_PATTERN_PROCESSES", 1)
+
+
+def map_over_grades(f, arg_tuples):
+    """
+    Return [f(*args) for args in arg_tuples], computing the entries in a process
+    pool if so configured. `f` must be a module-level function and the arguments
+    and results must be picklable (unsaved model instances are fine).
+
+    Parallel computation is an optimization only: if the pool cannot be used for
+    any reason (a child dies, or an argument cannot be pickled) we log the problem
+    and compute the results serially instead.
+    """
+    arg_tuples = list(arg_tuples)
+    processes = min(get_grade_process_count(), len(arg_tuples))
+
+    if processes > 1:
+        try:
+            # The pool's result handler waits forever for tasks it could not send,
+            # so find out here whether we can send them
+            pickle.dumps((f, arg_tuples), pickle.HIGHEST_PROTOCOL)
+            with make_process_pool(processes) as pool:
+                # One job per grade rather than starmap(): billiard credits all of a
+                # map's results to one worker, and the others then wait (for 30s)
+                # for results to be counted before they exit.
+                async_results = [pool.apply_async(f, args) for args in arg_tuples]
+                results = [async_result.get() for async_result in async_results]
+                # Let the workers exit on their own, rather than be terminated
+                pool.close()
+                pool.join()
+                return results
+        except Exception:
+            logger.warning(
+                "Could not compute %s grades in parallel; falling back to serial",
+                len(arg_tuples),
+                exc_info=True,
+            )
+
+    return [f(*args) for args in arg_tuples]
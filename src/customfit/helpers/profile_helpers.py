@@ -0,0 +1,202 @@
+"""
+Opt-in timing of pattern renders.
+
+When settings.RENDER_PROFILING is on, profile() collects, for everything rendered
+inside it: the wall time of each section (and, within a section, of each template
+it renders), the time spent loading/compiling templates as opposed to rendering
+them, cache hits and misses, database queries, and the time WeasyPrint spends on
+layout as opposed to writing the PDF. The renderers report to whichever profile
+is active in the current thread through the small functions below, which do
+nothing (cheaply) when there is none. When profiling is off, profile() does
+nothing at all.
+
+Finished profiles are logged as JSON (see RenderProfile.as_dict()), and handed to
+the caller's `on_finish` callback; see customfit.patterns.models.RenderProfileRecord.
+"""
+
+import contextlib
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+_state = threading.local()
+
+
+class RenderProfile(object):
+    """
+    The timings collected by one call to profile().
+    """
+
+    def __init__(self, label, info):
+        super(RenderProfile, self).__init__()
+        self.label = label
+        self.info = info
+        self.total_time = 0.0
+        # Section name -> {"time": seconds, "count": renders, "templates": {name: seconds}}
+        self.sections = {}
+        self.template_load_time = 0.0
+        self.template_render_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.query_count = 0
+        self.pdf_layout_time = 0.0
+        self.pdf_write_time = 0.0
+        self._section_stack = []
+
+    @property
+    def cache_hit_ratio(self):
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else None
+
+    def as_dict(self):
+        return {
+            "label": self.label,
+            "info": self.info,
+            "total_time": self.total_time,
+            "sections": self.sections,
+            "template_load_time": self.template_load_time,
+            "template_render_time": self.template_render_time,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_ratio": self.cache_hit_ratio,
+            "query_count": self.query_count,
+            "pdf_layout_time": self.pdf_layout_time,
+            "pdf_write_time": self.pdf_write_time,
+        }
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.query_count += 1
+        return execute(sql, params, many, context)
+
+
+def get_active_profile():
+    return getattr(_state, "profile", None)
+
+
+@contextlib.contextmanager
+def profile(label, on_finish=None, **info):
+    """
+    Profile everything rendered in the body of the `with` statement, yielding the
+    RenderProfile (or None, if profiling is off). Nested calls add to the outermost
+    profile, and only the outermost one logs it and calls on_finish(profile).
+    `info` (ids, say) is logged with the results.
+    """
+    if not getattr(settings, "RENDER_PROFILING", False) or get_active_profile():
+        yield get_active_profile()
+        return
+
+    render_profile = RenderProfile(label, info)
+    _state.profile = render_profile
+    start = time.perf_counter()
+    try:
+        with connection.execute_wrapper(render_profile._count_query):
+            yield render_profile
+    finally:
+        render_profile.total_time = time.perf_counter() - start
+        _state.profile = None
+
+    logger.info("Render profile: %s", json.dumps(render_profile.as_dict()))
+    if on_finish is not None:
+        try:
+            on_finish(render_profile)
+        except Exception:
+            # Profiling should never break a render
+            logger.exception("Could not store render profile %s", label)
+
+
+@contextlib.contextmanager
+def _timed(record):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(time.perf_counter() - start)
+
+
+def time_section(name):
+    """
+    Time the rendering of the section `name`. Sections may nest (a section's
+    templates are attributed to the innermost one).
+    """
+    render_profile = get_active_profile()
+    if render_profile is None:
+        return contextlib.nullcontext()
+
+    def record(seconds):
+        render_profile._section_stack.pop()
+        section = render_profile.sections.setdefault(
+            name, {"time": 0.0, "count": 0, "templates": {}}
+        )
+        section["time"] += seconds
+        section["count"] += 1
+
+    render_profile._section_stack.append(name)
+    return _timed(record)
+
+
+def time_template_load():
+    render_profile = get_active_profile()
+    if render_profile is None:
+        return contextlib.nullcontext()
+
+    def record(seconds):
+        render_profile.template_load_time += seconds
+
+    return _timed(record)
+
+
+def time_template_render(template_name):
+    render_profile = get_active_profile()
+    if render_profile is None:
+        return contextlib.nullcontext()
+
+    def record(seconds):
+        render_profile.template_render_time += seconds
+        if render_profile._section_stack:
+            section_name = render_profile._section_stack[-1]
+            section = render_profile.sections.setdefault(
+                section_name, {"time": 0.0, "count": 0, "templates": {}}
+            )
+            templates = section["templates"]
+            templates[template_name] = templates.get(template_name, 0.0) + seconds
+
+    return _timed(record)
+
+
+def record_cache_lookup(hit):
+    render_profile = get_active_profile()
+    if render_profile is None:
+        return
+    if hit:
+        render_profile.cache_hits += 1
+    else:
+        render_profile.cache_misses += 1
+
+
+def time_pdf_layout():
+    render_profile = get_active_profile()
+    if render_profile is None:
+        return contextlib.nullcontext()
+
+    def record(seconds):
+        render_profile.pdf_layout_time += seconds
+
+    return _timed(record)
+
+
+def time_pdf_write():
+    render_profile = get_active_profile()
+    if render_profile is None:
+        return contextlib.nullcontext()
+
+    def record(seconds):
+        render_profile.pdf_write_time += seconds
+
+    return _timed(record)
@@ -0,0 +1,130 @@
+"""
+An in-process cache of compiled templates for the patterntext renderers.
+
+Rendering a pattern renders a few hundred small templates: files from the
+renderer-template directories, and stitch/design templates kept in the database
+by dbtemplates. Our template loaders don't cache, so every one of those used to be
+read and parsed again on every use. get_file_template() and get_db_template()
+keep the compiled templates instead, keyed on their names and modification times
+so that edited files and templates are picked up without a restart.
+warm_template_cache() compiles the renderer-template files ahead of time (see
+customfit.patterns.tasks, which calls it when a worker process starts).
+"""
+
+import logging
+import os
+
+import django.template
+import django.template.loader
+from django.conf import settings
+
+from .memo_helpers import LRUMemo
+from .profile_helpers import time_template_load
+
+logger = logging.getLogger(__name__)
+
+
+_file_templates = LRUMemo(getattr(settings, "TEMPLATE_CACHE_SIZE", 1024))
+_db_templates = LRUMemo(getattr(settings, "TEMPLATE_CACHE_SIZE", 1024))
+
+# Template name -> path of the file it was found in
+_template_paths = {}
+
+
+def _get_mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def get_file_template(template_name):
+    """
+    Return the (compiled) template found by the template loaders under
+    `template_name`, as django.template.loader.get_template() would. The template
+    is read again if its file has been modified since it was last read.
+    """
+    with time_template_load():
+        return _get_file_template(template_name)
+
+
+def _get_file_template(template_name):
+    path = _template_paths.get(template_name)
+    if path is not None:
+        mtime = _get_mtime(path)
+        if mtime is not None:
+            return _file_templates.get_or_compute(
+                (template_name, mtime),
+                lambda: django.template.loader.get_template(template_name),
+            )
+
+    template = django.template.loader.get_template(template_name)
+    path = template.origin.name
+    _template_paths[template_name] = path
+    return _file_templates.get_or_compute(
+        (template_name, _get_mtime(path)), lambda: template
+    )
+
+
+def get_db_template(db_template, name=None):
+    """
+    Return a compiled django.template.Template of the content of `db_template` (an
+    instance of a dbtemplates Template model), named `name` (or the name of
+    `db_template`). Templates are kept until they are saved again (see
+    clear_db_templates()); unsaved ones are compiled on every call.
+    """
+    with time_template_load():
+        return _get_db_template(db_template, name)
+
+
+def _get_db_template(db_template, name):
+    if name is None:
+        name = db_template.name
+    if db_template.pk is None:
+        return django.template.Template(db_template.content, name=name)
+    key = (
+        db_template._meta.label,
+        db_template.pk,
+        db_template.last_changed,
+        name,
+    )
+    return _db_templates.get_or_compute(
+        key, lambda: django.template.Template(db_template.content, name=name)
+    )
+
+
+def clear_db_templates():
+    """
+    Forget all the compiled dbtemplates. Called whenever one is saved or deleted
+    (see customfit.patterns.models). The timestamps in the keys are enough to spot
+    edits made through other processes, but edits are rare enough that we may as
+    well free the memory here.
+    """
+    _db_templates.clear()
+
+
+def warm_template_cache(template_dirs=None):
+    """
+    Compile every .html file under the given template directories (relative to the
+    template directories of the loaders, like template names), and return how
+    many there were. Defaults to settings.RENDERER_TEMPLATE_DIRS.
+    """
+    if template_dirs is None:
+        template_dirs = getattr(settings, "RENDERER_TEMPLATE_DIRS", [])
+
+    count = 0
+    engine = django.template.engines["django"].engine
+    for loader in engine.template_loaders:
+        for root in loader.get_dirs():
+            for template_dir in template_dirs:
+                full_dir = os.path.join(root, template_dir)
+                for dirpath, _, filenames in os.walk(full_dir):
+                    for filename in filenames:
+                        if not filename.endswith(".html"):
+                            continue
+                        full_path = os.path.join(dirpath, filename)
+                        template_name = os.path.relpath(full_path, root)
+                        get_file_template(template_name)
+                        count += 1
+    logger.info("Compiled %s renderer templates", count)
+    return count
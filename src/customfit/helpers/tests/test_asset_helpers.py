@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..asset_helpers import (
+    build_static_asset_index,
+    clear_pdf_asset_cache,
+    find_static_asset,
+    get_pdf_asset,
+    pdf_asset_cache_info,
+    read_static_asset,
+)
+
+
+class StaticAssetIndexTest(SimpleTestCase):
+
+    def setUp(self):
+        super(StaticAssetIndexTest, self).setUp()
+        self.static_dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.static_dir, "css"))
+        self.path = os.path.join(self.static_dir, "css", "pdf.css")
+        with open(self.path, "wb") as f:
+            f.write(b"body { color: black; }")
+        build_static_asset_index(self.static_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.static_dir)
+        # Back to the real static directory
+        build_static_asset_index()
+        super(StaticAssetIndexTest, self).tearDown()
+
+    def test_find_static_asset(self):
+        self.assertEqual(find_static_asset("css/pdf.css"), self.path)
+        self.assertIsNone(find_static_asset("css/other.css"))
+        self.assertIsNone(find_static_asset("css"))
+
+    def test_read_static_asset(self):
+        self.assertEqual(
+            read_static_asset("css/pdf.css"),
+            {
+                "string": b"body { color: black; }",
+                "mime_type": "text/css",
+                "encoding": None,
+            },
+        )
+        self.assertIsNone(read_static_asset("css/other.css"))
+
+
+class PdfAssetCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        super(PdfAssetCacheTest, self).setUp()
+        clear_pdf_asset_cache()
+
+    def tearDown(self):
+        clear_pdf_asset_cache()
+        super(PdfAssetCacheTest, self).tearDown()
+
+    def test_fetched_once(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return {"string": b"contents", "mime_type": "image/png"}
+
+        asset = get_pdf_asset("http://example.com/image.png", fetch)
+        self.assertEqual(asset, {"string": b"contents", "mime_type": "image/png"})
+        # Changing what we were given doesn't change what is kept
+        asset["string"] = b"other"
+        asset = get_pdf_asset("http://example.com/image.png", fetch)
+        self.assertEqual(asset["string"], b"contents")
+        self.assertEqual(len(calls), 1)
+
+        info = pdf_asset_cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 1, 8))
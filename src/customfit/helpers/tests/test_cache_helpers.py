@@ -0,0 +1,149 @@
+import threading
+import unittest.mock as mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from customfit.patterns.models import IndividualPattern
+from customfit.swatches.models import Swatch
+
+from ..cache_helpers import (
+    SingleFlightTimeout,
+    bump_cache_generation,
+    get_cache_generation,
+    get_or_set_single_flight,
+    make_lock_key,
+    model_fingerprint,
+)
+
+
+class SingleFlightTest(SimpleTestCase):
+
+    def setUp(self):
+        super(SingleFlightTest, self).setUp()
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+        super(SingleFlightTest, self).tearDown()
+
+    def test_computes_on_miss_only(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return "value"
+
+        self.assertEqual(get_or_set_single_flight("key", compute), "value")
+        self.assertEqual(get_or_set_single_flight("key", compute), "value")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.get("key"), "value")
+        self.assertIsNone(cache.get(make_lock_key("key")))
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "value"
+
+        results = []
+
+        def worker():
+            results.append(get_or_set_single_flight("key", compute, poll_interval=0.01))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, ["value"] * 4)
+        self.assertEqual(len(calls), 1)
+
+    def test_waiter_gives_up(self):
+        # Someone else holds the lock, and never finishes
+        cache.add(make_lock_key("key"), True)
+        with mock.patch("customfit.helpers.cache_helpers.time.sleep"):
+            value = get_or_set_single_flight("key", lambda: "value", wait_timeout=0)
+        self.assertEqual(value, "value")
+        self.assertEqual(cache.get("key"), "value")
+
+    def test_waiter_gives_up_without_computing(self):
+        cache.add(make_lock_key("key"), True)
+
+        def compute():
+            self.fail("Computed the value after waiting")
+
+        with mock.patch("customfit.helpers.cache_helpers.time.sleep"):
+            with self.assertRaises(SingleFlightTimeout):
+                get_or_set_single_flight(
+                    "key", compute, wait_timeout=0, compute_after_wait=False
+                )
+        self.assertIsNone(cache.get("key"))
+        # The lock is still the holder's
+        self.assertTrue(cache.get(make_lock_key("key")))
+
+    def test_waiter_takes_over_released_lock(self):
+        # The lock-holder fails, releasing the lock without filling the cache
+        cache.add(make_lock_key("key"), True)
+
+        def holder_fails(seconds):
+            cache.delete(make_lock_key("key"))
+
+        with mock.patch(
+            "customfit.helpers.cache_helpers.time.sleep", side_effect=holder_fails
+        ):
+            value = get_or_set_single_flight("key", lambda: "value")
+        self.assertEqual(value, "value")
+
+    def test_exception_releases_lock(self):
+        def compute():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            get_or_set_single_flight("key", compute)
+        self.assertIsNone(cache.get("key"))
+        self.assertIsNone(cache.get(make_lock_key("key")))
+
+
+class ModelFingerprintTest(SimpleTestCase):
+
+    def test_ids_and_owners_ignored(self):
+        swatch1 = Swatch(id=1, user_id=1, name="gauge", stitches_length=4)
+        swatch2 = Swatch(id=2, user_id=2, name="gauge", stitches_length=4)
+        self.assertEqual(model_fingerprint(swatch1), model_fingerprint(swatch2))
+
+    def test_values_included(self):
+        swatch1 = Swatch(name="gauge", stitches_length=4)
+        swatch2 = Swatch(name="gauge", stitches_length=5)
+        self.assertNotEqual(model_fingerprint(swatch1), model_fingerprint(swatch2))
+
+    def test_derived_values_ignored(self):
+        pattern1 = IndividualPattern(name="p", approved=True, content_fingerprint="a")
+        pattern2 = IndividualPattern(name="p", approved=False, content_fingerprint="")
+        self.assertEqual(model_fingerprint(pattern1), model_fingerprint(pattern2))
+
+
+class CacheGenerationTest(SimpleTestCase):
+
+    def setUp(self):
+        super(CacheGenerationTest, self).setUp()
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+        super(CacheGenerationTest, self).tearDown()
+
+    def test_bump_changes_generation(self):
+        generation = get_cache_generation("name")
+        self.assertEqual(get_cache_generation("name"), generation)
+        bump_cache_generation("name")
+        self.assertNotEqual(get_cache_generation("name"), generation)
@@ -0,0 +1,131 @@
+import copy
+
+from django.test import SimpleTestCase
+
+from ..memo_helpers import DerivedValuesMixin, LRUMemo, memoized, memoized_property
+
+
+class LRUMemoTest(SimpleTestCase):
+
+    def test_hits_and_misses(self):
+        memo = LRUMemo(10)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return "value"
+
+        self.assertEqual(memo.get_or_compute("key", compute), "value")
+        self.assertEqual(memo.get_or_compute("key", compute), "value")
+        self.assertEqual(len(calls), 1)
+        info = memo.info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 1, 1))
+
+    def test_evicts_least_recently_used(self):
+        memo = LRUMemo(2)
+        memo.get_or_compute("a", lambda: 1)
+        memo.get_or_compute("b", lambda: 2)
+        memo.get_or_compute("a", lambda: 1)  # 'b' is now the oldest
+        memo.get_or_compute("c", lambda: 3)
+        self.assertEqual(memo.info().currsize, 2)
+        self.assertEqual(memo.get_or_compute("a", lambda: None), 1)
+        self.assertIsNone(memo.get_or_compute("b", lambda: None))
+
+    def test_disabled(self):
+        memo = LRUMemo(0)
+        memo.get_or_compute("a", lambda: 1)
+        self.assertEqual(memo.get_or_compute("a", lambda: 2), 2)
+        self.assertEqual(memo.info().currsize, 0)
+
+    def test_exceptions_not_stored(self):
+        memo = LRUMemo(10)
+
+        def fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            memo.get_or_compute("a", fail)
+        self.assertEqual(memo.get_or_compute("a", lambda: 1), 1)
+
+    def test_sizeof(self):
+        memo = LRUMemo(10, sizeof=len)
+        memo.get_or_compute("a", lambda: "aaaa")
+        memo.get_or_compute("b", lambda: "bbbb")
+        self.assertEqual(memo.info().currsize, 8)
+        memo.get_or_compute("c", lambda: "ccc")  # 'a' no longer fits
+        self.assertEqual(memo.info().currsize, 7)
+        self.assertEqual(memo.get_or_compute("a", lambda: "a"), "a")
+        # Too big to keep at all
+        memo.get_or_compute("d", lambda: "d" * 11)
+        self.assertEqual(memo.get_or_compute("d", lambda: "d"), "d")
+
+    def test_clear(self):
+        memo = LRUMemo(10)
+        memo.get_or_compute("a", lambda: 1)
+        memo.get_or_compute("a", lambda: 1)
+        memo.clear()
+        self.assertEqual(memo.info(), (0, 0, 10, 0))
+
+
+class _Rectangle(DerivedValuesMixin):
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.calls = []
+
+    @memoized_property
+    def area(self):
+        self.calls.append("area")
+        return self.width * self.height
+
+    @memoized
+    def scaled_area(self, factor):
+        self.calls.append(("scaled_area", factor))
+        return self.area * factor
+
+    @memoized
+    def fail(self):
+        self.calls.append("fail")
+        raise ValueError()
+
+
+class DerivedValuesTest(SimpleTestCase):
+
+    def test_remembered(self):
+        rect = _Rectangle(2, 3)
+        self.assertEqual(rect.area, 6)
+        self.assertEqual(rect.area, 6)
+        self.assertEqual(rect.scaled_area(2), 12)
+        self.assertEqual(rect.scaled_area(2), 12)
+        self.assertEqual(rect.scaled_area(3), 18)
+        self.assertEqual(rect.calls, ["area", ("scaled_area", 2), ("scaled_area", 3)])
+
+    def test_forgotten_on_assignment(self):
+        rect = _Rectangle(2, 3)
+        self.assertEqual(rect.scaled_area(2), 12)
+        rect.width = 4
+        self.assertEqual(rect.scaled_area(2), 24)
+        self.assertEqual(rect.area, 12)
+
+    def test_forget_derived_values(self):
+        rect = _Rectangle(2, 3)
+        rect.area
+        rect.forget_derived_values()
+        rect.area
+        self.assertEqual(rect.calls.count("area"), 2)
+
+    def test_exceptions_not_remembered(self):
+        rect = _Rectangle(2, 3)
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                rect.fail()
+        self.assertEqual(rect.calls, ["fail", "fail"])
+
+    def test_copies_start_afresh(self):
+        rect = _Rectangle(2, 3)
+        rect.area
+        other = copy.copy(rect)
+        other.__dict__["width"] = 5  # bypassing __setattr__
+        self.assertEqual(other.area, 15)
+        self.assertEqual(rect.area, 6)
@@ -0,0 +1,39 @@
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from ..parallel_helpers import map_over_grades
+
+
+def _add(x, y):
+    return x + y
+
+
+def _cache_id():
+    return id(caches["default"])
+
+
+class MapOverGradesTest(SimpleTestCase):
+
+    def test_serial(self):
+        results = map_over_grades(_add, [(1, 2), (3, 4), (5, 6)])
+        self.assertEqual(results, [3, 7, 11])
+
+    def test_empty(self):
+        self.assertEqual(map_over_grades(_add, []), [])
+
+    @override_settings(GRADED_PATTERN_PROCESSES=2)
+    def test_parallel(self):
+        results = map_over_grades(_add, [(1, 2), (3, 4), (5, 6)])
+        self.assertEqual(results, [3, 7, 11])
+
+    @override_settings(GRADED_PATTERN_PROCESSES=2)
+    def test_parallel_falls_back_to_serial(self):
+        # Lambdas cannot be sent to worker processes
+        with self.assertLogs("customfit.helpers.parallel_helpers", level="WARNING"):
+            results = map_over_grades(lambda x, y: x * y, [(1, 2), (3, 4)])
+        self.assertEqual(results, [2, 12])
+
+    @override_settings(GRADED_PATTERN_PROCESSES=2)
+    def test_workers_get_their_own_cache_clients(self):
+        cache_ids = map_over_grades(_cache_id, [(), ()])
+        self.assertNotIn(id(caches["default"]), cache_ids)
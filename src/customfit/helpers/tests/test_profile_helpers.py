@@ -0,0 +1,103 @@
+from django.test import SimpleTestCase, override_settings
+
+from ..profile_helpers import (
+    get_active_profile,
+    profile,
+    record_cache_lookup,
+    time_pdf_layout,
+    time_pdf_write,
+    time_section,
+    time_template_load,
+    time_template_render,
+)
+
+
+class ProfileOffTest(SimpleTestCase):
+
+    def test_nothing_recorded(self):
+        finished = []
+        with profile("render", on_finish=finished.append) as render_profile:
+            self.assertIsNone(render_profile)
+            self.assertIsNone(get_active_profile())
+            with time_section("Section"):
+                with time_template_render("template.html"):
+                    pass
+            record_cache_lookup(hit=True)
+        self.assertEqual(finished, [])
+
+
+@override_settings(RENDER_PROFILING=True)
+class ProfileOnTest(SimpleTestCase):
+
+    def test_timings(self):
+        with profile("render", pattern_id=5) as render_profile:
+            with time_section("Outer"):
+                with time_template_render("outer.html"):
+                    pass
+                with time_section("Inner"):
+                    with time_template_load():
+                        pass
+                    with time_template_render("inner.html"):
+                        pass
+            with time_section("Inner"):
+                pass
+            with time_pdf_layout():
+                pass
+            with time_pdf_write():
+                pass
+        self.assertIsNone(get_active_profile())
+
+        results = render_profile.as_dict()
+        self.assertEqual(results["info"], {"pattern_id": 5})
+        sections = results["sections"]
+        self.assertEqual(set(sections), {"Outer", "Inner"})
+        self.assertEqual(sections["Inner"]["count"], 2)
+        # Templates go to the innermost section
+        self.assertEqual(list(sections["Outer"]["templates"]), ["outer.html"])
+        self.assertEqual(list(sections["Inner"]["templates"]), ["inner.html"])
+        self.assertGreater(results["total_time"], 0)
+        self.assertGreater(results["template_load_time"], 0)
+        self.assertGreater(results["template_render_time"], 0)
+        self.assertGreater(results["pdf_layout_time"], 0)
+        self.assertGreater(results["pdf_write_time"], 0)
+
+    def test_cache_hit_ratio(self):
+        with profile("render") as render_profile:
+            self.assertIsNone(render_profile.cache_hit_ratio)
+            record_cache_lookup(hit=True)
+            record_cache_lookup(hit=True)
+            record_cache_lookup(hit=True)
+            record_cache_lookup(hit=False)
+        self.assertEqual(render_profile.cache_hits, 3)
+        self.assertEqual(render_profile.cache_misses, 1)
+        self.assertEqual(render_profile.cache_hit_ratio, 0.75)
+
+    def test_nested_profiles(self):
+        finished = []
+        with profile("outer", on_finish=finished.append) as outer:
+            with profile("inner", on_finish=finished.append) as inner:
+                self.assertIs(inner, outer)
+            self.assertEqual(finished, [])
+        self.assertEqual(finished, [outer])
+
+    def test_logged(self):
+        with self.assertLogs("customfit.helpers.profile_helpers", "INFO") as logs:
+            with profile("render"):
+                pass
+        self.assertIn('"label": "render"', logs.output[0])
+
+    def test_on_finish_errors_ignored(self):
+        def on_finish(render_profile):
+            raise ValueError()
+
+        with self.assertLogs("customfit.helpers.profile_helpers", "ERROR"):
+            with profile("render", on_finish=on_finish):
+                pass
+
+    def test_failed_render_not_kept(self):
+        finished = []
+        with self.assertRaises(ValueError):
+            with profile("render", on_finish=finished.append):
+                raise ValueError()
+        self.assertEqual(finished, [])
+        self.assertIsNone(get_active_profile())
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+
+import django.template
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from customfit.stitches.factories import WaistHemTemplateFactory
+
+from ..template_helpers import get_db_template, get_file_template, warm_template_cache
+
+
+class FileTemplateTest(SimpleTestCase):
+
+    def setUp(self):
+        super(FileTemplateTest, self).setUp()
+        self.template_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.template_dir, "file_template_test.html")
+        self._write("<p>old</p>", 1000000000)
+        templates = [
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "DIRS": [self.template_dir],
+                "OPTIONS": {"loaders": ["django.template.loaders.filesystem.Loader"]},
+            }
+        ]
+        self.settings_override = override_settings(TEMPLATES=templates)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.template_dir)
+        super(FileTemplateTest, self).tearDown()
+
+    def _write(self, content, mtime):
+        with open(self.path, "w") as f:
+            f.write(content)
+        os.utime(self.path, (mtime, mtime))
+
+    def _render(self, template):
+        return template.render({})
+
+    def test_compiled_once(self):
+        template = get_file_template("file_template_test.html")
+        self.assertIs(get_file_template("file_template_test.html"), template)
+        self.assertEqual(self._render(template), "<p>old</p>")
+
+    def test_modified_file_reread(self):
+        get_file_template("file_template_test.html")
+        self._write("<p>new</p>", 1000000001)
+        template = get_file_template("file_template_test.html")
+        self.assertEqual(self._render(template), "<p>new</p>")
+
+    def test_warm(self):
+        os.mkdir(os.path.join(self.template_dir, "warm"))
+        self.path = os.path.join(self.template_dir, "warm", "warm_test.html")
+        self._write("<p>warm</p>", 1000000000)
+        self.assertEqual(warm_template_cache(["warm"]), 1)
+        with self.settings(TEMPLATES=[]):
+            # No loaders at all: it has to come from the cache
+            template = get_file_template("warm/warm_test.html")
+        self.assertEqual(self._render(template), "<p>warm</p>")
+
+
+class DbTemplateTest(TestCase):
+
+    def _render(self, template):
+        return template.render(django.template.Context({}))
+
+    def test_compiled_once(self):
+        db_template = WaistHemTemplateFactory(content="<p>old</p>")
+        template = get_db_template(db_template)
+        self.assertIs(get_db_template(db_template), template)
+        self.assertEqual(self._render(template), "<p>old</p>")
+
+    def test_saved_template_recompiled(self):
+        db_template = WaistHemTemplateFactory(content="<p>old</p>")
+        get_db_template(db_template)
+        db_template.content = "<p>new</p>"
+        db_template.save()
+        self.assertEqual(self._render(get_db_template(db_template)), "<p>new</p>")
@@ -2,13 +2,13 @@
 import logging
 import os.path
 
-import django.template
 from django.contrib.auth.models import User
 from django.db import models
 from polymorphic.models import PolymorphicModel
 
 from customfit.bodies.models import Body
 from customfit.designs.models import Design
+from customfit.helpers.template_helpers import get_db_template, get_file_template
 from customfit.stitches.models import Stitch
 from customfit.swatches.models import Swatch
 
@@ -97,18 +97,14 @@ class BasePatternSpec(PolymorphicModel):
         if self.design_origin is not None:
             design_template = getattr(self.design_origin, design_field_name)
             if design_template is not None:
-                return django.template.Template(
-                    design_template.content,
-                    # Why do we add the name?
-                    # For unit testing
-                    name=design_template.name,
-                )
+                # Why do we keep the name? For unit testing
+                return get_db_template(design_template)
         if stitch is not None and use_stitch_bool:
             return getattr(stitch, stitch_field_name)
         else:
             # Get the no-stitch template from the filesystem
             template_path = os.path.join(template_directory, no_stitch_template_name)
-            return django.template.loader.get_template(template_path)
+            return get_file_template(template_path)
 
     def __str__(self):
         return "%s/%s" % (self.name, self.user)
@@ -18,7 +18,7 @@ class ApprovedPatternFilter(admin.SimpleListFilter):
 
     def queryset(self, request, queryset):
         if self.value() == "yes":
-            return queryset.filter(transactions__approved=True)
+            return queryset.filter(approved=True)
 
 
 class UserGroupFilter(admin.SimpleListFilter):
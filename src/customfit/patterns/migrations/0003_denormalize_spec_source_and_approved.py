@@ -0,0 +1,151 @@
+# Generated by Django 5.0.6 on 2026-10-17 03:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Spec-source models with a body, as (app label, model name). The body of a redo
+# that doesn't have one of its own is that of the original pattern spec.
+PATTERN_SPEC_MODELS_WITH_BODY = [
+    ("sweaters", "SweaterPatternSpec"),
+    ("test_garment", "TestPatternSpecWithBody"),
+]
+REDO_MODELS_WITH_BODY = [
+    ("sweaters", "SweaterRedo"),
+    ("test_garment", "TestRedoWithBody"),
+]
+
+
+def _get_body_ids(apps, model_names):
+    body_ids = {}
+    for (app_label, model_name) in model_names:
+        model = apps.get_model(app_label, model_name)
+        body_ids.update(model.objects.values_list("pk", "body_id"))
+    return body_ids
+
+
+def backfill_denormalized_fields(apps, schema_editor):
+    IndividualPattern = apps.get_model("patterns", "IndividualPattern")
+    Redo = apps.get_model("patterns", "Redo")
+    PatternSpec = apps.get_model("pattern_spec", "PatternSpec")
+    Transaction = apps.get_model("design_wizard", "Transaction")
+
+    pattern_spec_body_ids = _get_body_ids(apps, PATTERN_SPEC_MODELS_WITH_BODY)
+    redo_body_ids = _get_body_ids(apps, REDO_MODELS_WITH_BODY)
+
+    IndividualPattern.objects.filter(
+        id__in=Transaction.objects.filter(approved=True).values("pattern_id")
+    ).update(approved=True)
+
+    igp_path = "schematic__individual_garment_parameters__"
+    for pattern in IndividualPattern.objects.all().values(
+        "id",
+        "pieces__" + igp_path + "pattern_spec_id",
+        "pieces__" + igp_path + "redo_id",
+        "original_pieces__" + igp_path + "pattern_spec_id",
+    ):
+        pattern_spec_id = pattern["pieces__" + igp_path + "pattern_spec_id"]
+        redo_id = pattern["pieces__" + igp_path + "redo_id"]
+        if redo_id is not None:
+            redo = Redo.objects.get(pk=redo_id)
+            original_pattern_spec = PatternSpec.objects.get(
+                pk=pattern["original_pieces__" + igp_path + "pattern_spec_id"]
+            )
+            IndividualPattern.objects.filter(pk=pattern["id"]).update(
+                spec_source_redo_id=redo_id,
+                spec_source_swatch_id=redo.swatch_id,
+                spec_source_body_id=redo_body_ids.get(
+                    redo_id, pattern_spec_body_ids.get(original_pattern_spec.pk)
+                ),
+                spec_source_design_id=original_pattern_spec.design_origin_id,
+            )
+        elif pattern_spec_id is not None:
+            pattern_spec = PatternSpec.objects.get(pk=pattern_spec_id)
+            IndividualPattern.objects.filter(pk=pattern["id"]).update(
+                spec_source_pattern_spec_id=pattern_spec_id,
+                spec_source_swatch_id=pattern_spec.swatch_id,
+                spec_source_body_id=pattern_spec_body_ids.get(pattern_spec_id),
+                spec_source_design_id=pattern_spec.design_origin_id,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bodies", "0002_initial"),
+        ("design_wizard", "0002_initial"),
+        ("designs", "0001_initial"),
+        ("pattern_spec", "0002_initial"),
+        ("patterns", "0002_initial"),
+        ("swatches", "0002_initial"),
+        ("sweaters", "0001_initial"),
+        ("test_garment", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="individualpattern",
+            name="approved",
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name="individualpattern",
+            name="spec_source_body",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="bodies.body",
+            ),
+        ),
+        migrations.AddField(
+            model_name="individualpattern",
+            name="spec_source_design",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="designs.design",
+            ),
+        ),
+        migrations.AddField(
+            model_name="individualpattern",
+            name="spec_source_pattern_spec",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="pattern_spec.patternspec",
+            ),
+        ),
+        migrations.AddField(
+            model_name="individualpattern",
+            name="spec_source_redo",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="patterns.redo",
+            ),
+        ),
+        migrations.AddField(
+            model_name="individualpattern",
+            name="spec_source_swatch",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="swatches.swatch",
+            ),
+        ),
+        migrations.RunPython(backfill_denormalized_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patterns", "0003_denormalize_spec_source_and_approved"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RenderedPatternContent",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255)),
+                ("pieces_hash", models.CharField(max_length=40)),
+                ("html", models.TextField(null=True)),
+                ("pdf", models.BinaryField(null=True)),
+                ("creation_date", models.DateTimeField(auto_now_add=True)),
+                (
+                    "pattern",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="patterns.individualpattern",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("key", "pieces_hash")},
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.6 on 2026-10-17 05:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("designs", "0001_initial"),
+        ("patterns", "0004_renderedpatterncontent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RenderProfileRecord",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("creation_date", models.DateTimeField(auto_now_add=True)),
+                ("label", models.CharField(max_length=100)),
+                ("pattern_id", models.PositiveIntegerField(blank=True, null=True)),
+                ("total_time", models.FloatField()),
+                ("query_count", models.PositiveIntegerField()),
+                ("cache_hits", models.PositiveIntegerField()),
+                ("cache_misses", models.PositiveIntegerField()),
+                ("data", models.JSONField()),
+                (
+                    "design",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="designs.design",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-creation_date"],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+def clear_rendered_content(apps, schema_editor):
+    # The stored content has no kind to key it on. It is only a cache, and is
+    # re-rendered as it is asked for.
+    RenderedPatternContent = apps.get_model("patterns", "RenderedPatternContent")
+    RenderedPatternContent.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patterns", "0005_renderprofilerecord"),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_rendered_content, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="renderedpatterncontent",
+            unique_together=set(),
+        ),
+        migrations.RemoveField(
+            model_name="renderedpatterncontent",
+            name="pieces_hash",
+        ),
+        migrations.AddField(
+            model_name="renderedpatterncontent",
+            name="kind",
+            field=models.CharField(default="", max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AlterUniqueTogether(
+            name="renderedpatterncontent",
+            unique_together={("pattern", "kind")},
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-17 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patterns", "0006_renderedpatterncontent_kind"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gradedpattern",
+            name="content_fingerprint",
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name="individualpattern",
+            name="content_fingerprint",
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+    ]
@@ -2,16 +2,24 @@
 
 
 import datetime
+import functools
 import logging
 import urllib.parse
 
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Q, prefetch_related_objects
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.safestring import mark_safe
 from polymorphic.models import PolymorphicManager, PolymorphicModel
+from polymorphic.query import PolymorphicQuerySet
 
+from customfit.helpers.cache_helpers import make_digest, model_fingerprint
+from customfit.helpers.template_helpers import clear_db_templates
 from customfit.pieces.models import GradedPatternPieces, PatternPieces
 from customfit.swatches.models import Swatch
 
@@ -22,17 +30,118 @@ LOGGER = logging.getLogger(__name__)
 # Create your models here.
 
 
+class IndividualPatternQuerySet(PolymorphicQuerySet):
+
+    def __init__(self, *args, **kwargs):
+        super(IndividualPatternQuerySet, self).__init__(*args, **kwargs)
+        self._load_list_data = False
+
+    def _clone(self, *args, **kwargs):
+        new = super(IndividualPatternQuerySet, self)._clone(*args, **kwargs)
+        new._load_list_data = self._load_list_data
+        return new
+
+    def with_list_data(self):
+        """
+        Load everything the pattern lists show for each pattern-- its spec source,
+        the design it came from, its featured picture and its other pictures--
+        in a fixed number of queries, rather than a handful per pattern. (Finding
+        the spec source otherwise means walking pieces -> schematic -> IGP ->
+        pattern spec/redo -> design one pattern at a time.)
+        """
+        clone = self._clone()
+        clone._load_list_data = True
+        return clone
+
+    def _fetch_all(self):
+        already_fetched = self._result_cache is not None
+        super(IndividualPatternQuerySet, self)._fetch_all()
+        if self._load_list_data and not already_fetched:
+            _load_list_data(self._result_cache)
+
+
+def _load_list_data(patterns):
+    # Imported here to avoid circular imports
+    from customfit.designs.models import Design
+    from customfit.pattern_spec.models import PatternSpec
+    from customfit.uploads.models import IndividualPatternPicture
+
+    if not patterns:
+        return
+
+    featured_pics = IndividualPatternPicture.objects.in_bulk(
+        {p.featured_pic_id for p in patterns if p.featured_pic_id is not None}
+    )
+    for pattern in patterns:
+        if pattern.featured_pic_id in featured_pics:
+            pattern.featured_pic = featured_pics[pattern.featured_pic_id]
+
+    prefetch_related_objects(patterns, "pictures")
+
+    # The spec sources are denormalized onto the patterns. (For redos, we still need
+    # to follow the foreign keys in the database to find the original pattern specs.)
+    spec_source_ids = {
+        pattern.id: (pattern.spec_source_pattern_spec_id, pattern.spec_source_redo_id)
+        for pattern in patterns
+    }
+
+    redo_ids = {redo_id for (_, redo_id) in spec_source_ids.values() if redo_id}
+    igp_path = "schematic__individual_garment_parameters__"
+    original_pattern_spec_rows = (
+        Redo.objects.filter(id__in=redo_ids)
+        .non_polymorphic()
+        .values_list(
+            "id",
+            "pattern__original_pieces__" + igp_path + "pattern_spec_id",
+            "pattern__pieces__" + igp_path + "pattern_spec_id",
+        )
+    )
+    original_pattern_spec_ids = {
+        redo_id: original_id if original_id is not None else current_id
+        for (redo_id, original_id, current_id) in original_pattern_spec_rows
+    }
+
+    pattern_specs = PatternSpec.objects.in_bulk(
+        {pspec_id for (pspec_id, _) in spec_source_ids.values() if pspec_id}
+        | set(original_pattern_spec_ids.values())
+    )
+    designs = Design.objects.in_bulk(
+        {
+            pspec.design_origin_id
+            for pspec in pattern_specs.values()
+            if pspec.design_origin_id is not None
+        }
+    )
+    for pspec in pattern_specs.values():
+        if pspec.design_origin_id in designs:
+            pspec.design_origin = designs[pspec.design_origin_id]
+
+    redos = Redo.objects.in_bulk(redo_ids)
+    for redo in redos.values():
+        original_pattern_spec = pattern_specs.get(
+            original_pattern_spec_ids.get(redo.id)
+        )
+        # Otherwise, get_original_patternspec() looks it up itself
+        if original_pattern_spec is not None:
+            redo._original_patternspec = original_pattern_spec
+
+    for pattern in patterns:
+        (pattern_spec_id, redo_id) = spec_source_ids[pattern.id]
+        if pattern_spec_id is not None:
+            pattern._spec_source = pattern_specs[pattern_spec_id]
+        elif redo_id is not None:
+            pattern._spec_source = redos[redo_id]
+
+
 class ApprovedPatternManager(PolymorphicManager):
     """
     This returns all approved patterns, whether archived or not.
     """
 
+    queryset_class = IndividualPatternQuerySet
+
     def get_queryset(self):
-        return (
-            super(ApprovedPatternManager, self)
-            .get_queryset()
-            .filter(transactions__approved=True)
-        )
+        return super(ApprovedPatternManager, self).get_queryset().filter(approved=True)
 
 
 class LivePatternManager(ApprovedPatternManager):
@@ -82,6 +191,7 @@ class _BasePattern(PolymorphicModel):
     # * render_postamble(self, abridged=False)
     # * render_charts(self, abridged=False)
     # * render_pattern(self, abridged=False)
+    # * iter_pattern(self, abridged=False)
 
     class Meta:
         abstract = True
@@ -105,6 +215,9 @@ class _BasePattern(PolymorphicModel):
         related_name="+",
     )
 
+    # See get_content_fingerprint(). Empty until first asked for.
+    content_fingerprint = models.CharField(max_length=40, blank=True, editable=False)
+
     #
     # Overrides to Django built-in functions.
     #
@@ -115,6 +228,17 @@ class _BasePattern(PolymorphicModel):
             # Make sure that any featured pic is actually of THIS pattern.
             if self.featured_pic.object != self:
                 self.featured_pic = None
+        if self.pk is not None:
+            # Don't trust the in-memory content fingerprint: its inputs may have
+            # changed since this instance was loaded. New pieces (as from a redo)
+            # need a new one.
+            stored_fingerprint = (
+                self._get_stored_row()
+                .filter(pieces_id=self.pieces_id)
+                .values_list("content_fingerprint", flat=True)
+                .first()
+            )
+            self.content_fingerprint = stored_fingerprint or ""
         super(_BasePattern, self).save(*args, **kwargs)
 
     def __str__(self):
@@ -125,6 +249,13 @@ class _BasePattern(PolymorphicModel):
     #
 
     def get_spec_source(self):
+        try:
+            # Loaded in bulk by IndividualPatternQuerySet.with_list_data()
+            return self.__dict__["_spec_source"]
+        except KeyError:
+            return self._get_spec_source()
+
+    def _get_spec_source(self):
         return self.pieces.get_spec_source()
 
     def get_design(self):
@@ -253,13 +384,77 @@ class _BasePattern(PolymorphicModel):
         patterntext = renderer.render_pattern()
         return patterntext
 
+    def iter_pattern(self, abridged=False, for_pdf=False):
+        renderer = self._get_renderer(abridged, for_pdf)
+        return renderer.iter_pattern()
+
     #
-    # Misc.
+    # Fingerprints for cache keys
     #
 
-    @property
-    def approved(self):
-        return bool(self.transactions.filter(approved=True))
+    def get_content_fingerprint(self):
+        """
+        Return a hex digest of everything the patterntext is rendered from, other than
+        the pattern itself: the pieces, the spec source (with its swatch, body and
+        stitches, and the templates of those stitches) and the design it came from
+        (with its additional elements). Patterns with the same inputs have the same
+        content fingerprint, whatever their ids.
+
+        Stored on the pattern the first time it is asked for, and cleared when any of
+        those inputs are saved or deleted (see _content_changed below) or the pattern
+        gets new pieces.
+        """
+        if self.pk is None:
+            return self._compute_content_fingerprint()
+        if not self.content_fingerprint:
+            self.content_fingerprint = self._compute_content_fingerprint()
+            self._get_stored_row().update(content_fingerprint=self.content_fingerprint)
+        return self.content_fingerprint
+
+    def _get_stored_row(self):
+        # This pattern's row in the table holding content_fingerprint (that of
+        # IndividualPattern or GradedPattern), as a queryset. Its subclasses' tables
+        # would only add joins.
+        model = self._meta.get_field("content_fingerprint").model
+        return model.objects.filter(pk=self.pk)
+
+    def _compute_content_fingerprint(self):
+        memo = {}
+        spec_source = self.get_spec_source()
+        fingerprints = [
+            self.pieces.content_hash(),
+            model_fingerprint(spec_source, depth=2, memo=memo),
+        ]
+        if isinstance(spec_source, Redo):
+            original_pspec = spec_source.get_original_patternspec()
+            fingerprints.append(model_fingerprint(original_pspec, depth=2, memo=memo))
+        design = spec_source.design_origin
+        if design is not None:
+            design = design.get_real_instance()
+            fingerprints.append(model_fingerprint(design, depth=2, memo=memo))
+            fingerprints += [
+                model_fingerprint(element, memo=memo)
+                for element in _get_additional_elements(design)
+            ]
+        return make_digest(*fingerprints)
+
+    def get_fingerprint(self):
+        """
+        Return a hex digest of the content fingerprint and the parts of the pattern
+        itself that show up in its patterntext and PDFs. Unlike the content
+        fingerprint, no two patterns share it.
+        """
+        return make_digest(
+            self.get_content_fingerprint(),
+            str(self.pk),
+            self.name,
+            self.notes,
+            str(self.featured_pic_id),
+        )
+
+    #
+    # Misc.
+    #
 
     def delete(self):
         super(_BasePattern, self).delete()
@@ -286,6 +481,7 @@ class IndividualPattern(_BasePattern):
     # * render_postamble(self, abridged=False)
     # * render_charts(self, abridged=False)
     # * render_pattern(self, abridged=False)
+    # * iter_pattern(self, abridged=False)
 
     user = models.ForeignKey(User, db_index=True, on_delete=models.CASCADE)
 
@@ -301,6 +497,55 @@ class IndividualPattern(_BasePattern):
         related_name="+",
     )
 
+    # Denormalized from the spec source (pieces -> schematic -> garment parameters ->
+    # pattern spec or redo) so that we can find a pattern's spec source, and look up
+    # patterns by swatch, body or design, without walking or joining across all those
+    # polymorphic tables. Kept up to date by save() and update_with_new_pieces().
+    spec_source_pattern_spec = models.ForeignKey(
+        "pattern_spec.PatternSpec",
+        blank=True,
+        null=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    spec_source_redo = models.ForeignKey(
+        "Redo",
+        blank=True,
+        null=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    spec_source_swatch = models.ForeignKey(
+        Swatch,
+        blank=True,
+        null=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    spec_source_body = models.ForeignKey(
+        "bodies.Body",
+        blank=True,
+        null=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    spec_source_design = models.ForeignKey(
+        "designs.Design",
+        blank=True,
+        null=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+
+    # Denormalized from the transactions: is there an approved one? Kept up to date
+    # by save() and by signal handlers in customfit.design_wizard.models
+    approved = models.BooleanField(default=False, db_index=True, editable=False)
+
     objects = PolymorphicManager()
     approved_patterns = ApprovedPatternManager()
     live_patterns = LivePatternManager()
@@ -313,8 +558,50 @@ class IndividualPattern(_BasePattern):
             self.original_pieces.save()
             self.original_pieces = self.original_pieces
         self.user = self.user
+        if (self.spec_source_pattern_spec_id is None) and (
+            self.spec_source_redo_id is None
+        ):
+            self.update_spec_source_fields()
+        if self.pk is not None:
+            # Don't trust the in-memory value: a transaction may have been approved
+            # (through another instance) since this one was loaded.
+            self.approved = self.transactions.filter(approved=True).exists()
         super(IndividualPattern, self).save(*args, **kwargs)
 
+    def update_spec_source_fields(self):
+        """
+        Copy the spec source, and its swatch, body and design, from the pieces into
+        the denormalized fields. Does not save.
+        """
+        if self.pieces.schematic is None:
+            return
+        spec_source = self.pieces.get_spec_source()
+        if isinstance(spec_source, Redo):
+            self.spec_source_pattern_spec = None
+            self.spec_source_redo = spec_source
+        else:
+            self.spec_source_pattern_spec = spec_source
+            self.spec_source_redo = None
+        self.spec_source_swatch = spec_source.swatch
+        # Not all spec sources have bodies (cowls don't, for example)
+        self.spec_source_body = getattr(spec_source, "body", None)
+        self.spec_source_design = spec_source.design_origin
+
+    def update_approved(self):
+        """
+        Re-compute the denormalized `approved` field from the transactions and store
+        it. Called whenever a Transaction is saved or deleted.
+        """
+        self.approved = self.transactions.filter(approved=True).exists()
+        IndividualPattern.objects.filter(pk=self.pk).update(approved=self.approved)
+
+    def _get_spec_source(self):
+        if self.spec_source_redo_id is not None:
+            return self.spec_source_redo
+        if self.spec_source_pattern_spec_id is not None:
+            return self.spec_source_pattern_spec
+        return super(IndividualPattern, self)._get_spec_source()
+
     def clean_fields(self, exclude=None):
         if self.original_pieces:
             self.original_pieces.clean_fields(exclude)
@@ -385,7 +672,7 @@ class IndividualPattern(_BasePattern):
 
     def redo_possible(self):
         # Returns True iff the user should be allowed to redo this pattern
-        already_redone = self.original_pieces is not None
+        already_redone = self.original_pieces_id is not None
         deadline_in_future = timezone.now() < self.redo_deadline()
 
         redo_possible = (not already_redone) and deadline_in_future
@@ -396,6 +683,7 @@ class IndividualPattern(_BasePattern):
         assert self.original_pieces is None
         self.original_pieces = self.pieces
         self.pieces = ipp
+        self.update_spec_source_fields()
         self.save()
 
     def full_clean(self, *args, **kwargs):
@@ -437,6 +725,7 @@ class GradedPattern(_BasePattern):
     # * render_postamble(self, abridged=False)
     # * render_charts(self, abridged=False)
     # * render_pattern(self, abridged=False)
+    # * iter_pattern(self, abridged=False)
 
     class Meta:
         pass
@@ -476,7 +765,7 @@ class GradedPattern(_BasePattern):
 class ApprovedPatternLinkageManager(models.Manager):
     def get_queryset(self):
         qs = super(ApprovedPatternLinkageManager, self).get_queryset()
-        return qs.filter(pattern__transactions__approved=True)
+        return qs.filter(pattern__approved=True)
 
 
 class LivePatternLinkageManager(ApprovedPatternLinkageManager):
@@ -525,6 +814,12 @@ class Redo(PolymorphicModel):
         # IndividualPattern.get_design, which is used by templates in the database
         from customfit.pattern_spec.models import PatternSpec
 
+        try:
+            # Loaded in bulk by IndividualPatternQuerySet.with_list_data()
+            return self.__dict__["_original_patternspec"]
+        except KeyError:
+            pass
+
         pattern = self.pattern
         schematic = (
             pattern.original_pieces.schematic
@@ -536,6 +831,292 @@ class Redo(PolymorphicModel):
         return pattern_spec
 
 
+class RenderedPatternContentManager(models.Manager):
+
+    @staticmethod
+    def _get_kind(key):
+        # Keys end in a fingerprint of what was rendered (see _make_cache_key() in
+        # customfit.patterns.renderers.pattern and customfit.views), and what comes
+        # before it says what was rendered: "pdf:IndividualPatternPdfView", say.
+        return key.rsplit(":", 1)[0]
+
+    def _get(self, pattern, key, field_name):
+        return (
+            self.filter(pattern=pattern, kind=self._get_kind(key), key=key)
+            .values_list(field_name, flat=True)
+            .first()
+        )
+
+    def _store(self, pattern, key, field_name, value):
+        # Replaces whatever was stored for the pattern before, which was rendered
+        # from older content and will never be asked for again. (One upsert, rather
+        # than update_or_create()'s select, insert and savepoints.)
+        row = self.model(pattern=pattern, kind=self._get_kind(key), key=key)
+        setattr(row, field_name, value)
+        self.bulk_create(
+            [row],
+            update_conflicts=True,
+            unique_fields=["pattern", "kind"],
+            update_fields=["key", field_name],
+        )
+
+    def _get_or_render(self, pattern, key, field_name, render):
+        stored = self._get(pattern, key, field_name)
+        if stored is not None:
+            return stored
+
+        value = render()
+        self._store(pattern, key, field_name, value)
+        return value
+
+    def get_or_render_html(self, pattern, key, render):
+        """
+        Return the patterntext stored for `pattern` under `key`, calling render()
+        and storing its value if there is none.
+        """
+        html = self._get_or_render(pattern, key, "html", render)
+        return mark_safe(html)
+
+    def get_html(self, pattern, key):
+        """
+        Return the patterntext stored for `pattern` under `key`, or None.
+        """
+        html = self._get(pattern, key, "html")
+        return None if html is None else mark_safe(html)
+
+    def store_html(self, pattern, key, html):
+        self._store(pattern, key, "html", html)
+
+    def get_or_render_pdf(self, pattern, key, render):
+        """
+        Return the PDF stored for `pattern` under `key`, calling render() and storing
+        its value if there is none.
+        """
+        return bytes(self._get_or_render(pattern, key, "pdf", render))
+
+    def has_pdf(self, pattern, key):
+        return self.filter(
+            pattern=pattern, kind=self._get_kind(key), key=key, pdf__isnull=False
+        ).exists()
+
+    def flush(self, pattern):
+        self.filter(pattern=pattern).delete()
+
+
+class RenderedPatternContent(models.Model):
+    """
+    Rendered patterntext and PDFs of approved patterns, kept in the database behind
+    the cache so that they survive cache evictions and restarts. A pattern has one
+    row for each kind of content (each section of the patterntext, say, or its
+    PDF), holding the latest render and the cache key it was rendered under. The
+    cache keys are fingerprints of what was rendered, so content rendered before a
+    stitch template was edited, say, is simply never asked for again, and is
+    replaced the next time that kind of content is rendered. Redos delete the lot
+    (see uncache_pattern()).
+    """
+
+    pattern = models.ForeignKey(
+        IndividualPattern, on_delete=models.CASCADE, related_name="+"
+    )
+    kind = models.CharField(max_length=255)
+    key = models.CharField(max_length=255)
+    html = models.TextField(null=True)
+    pdf = models.BinaryField(null=True)
+    creation_date = models.DateTimeField(auto_now_add=True)
+
+    objects = RenderedPatternContentManager()
+
+    class Meta:
+        unique_together = [("pattern", "kind")]
+
+    def __str__(self):
+        return self.key
+
+
+class RenderProfileRecordManager(models.Manager):
+
+    def record(self, render_profile):
+        """
+        Keep a finished customfit.helpers.profile_helpers.RenderProfile.
+        """
+        info = render_profile.info
+        return self.create(
+            label=render_profile.label,
+            pattern_id=info.get("pattern_id"),
+            design_id=info.get("design_id"),
+            total_time=render_profile.total_time,
+            query_count=render_profile.query_count,
+            cache_hits=render_profile.cache_hits,
+            cache_misses=render_profile.cache_misses,
+            data=render_profile.as_dict(),
+        )
+
+
+class RenderProfileRecord(models.Model):
+    """
+    The timings of one render of a pattern's patterntext or PDF, kept when
+    settings.RENDER_PROFILING is on (see customfit.helpers.profile_helpers) for the
+    render-profile report.
+    """
+
+    creation_date = models.DateTimeField(auto_now_add=True)
+    label = models.CharField(max_length=100)
+    # Not a foreign key: the profiles of deleted patterns are still of interest
+    pattern_id = models.PositiveIntegerField(null=True, blank=True)
+    design = models.ForeignKey(
+        "designs.Design",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    total_time = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    cache_hits = models.PositiveIntegerField()
+    cache_misses = models.PositiveIntegerField()
+    data = models.JSONField()
+
+    objects = RenderProfileRecordManager()
+
+    class Meta:
+        ordering = ["-creation_date"]
+
+    def __str__(self):
+        return "%s (%.3fs)" % (self.label, self.total_time)
+
+
+def _get_additional_elements(design):
+    # Imported here to avoid circular imports
+    from customfit.designs.models import AdditionalDesignElement
+
+    # The elements are spread across several (multi-table) subclasses, each with
+    # fields of its own.
+    elements = []
+    for model in apps.get_models():
+        if issubclass(model, AdditionalDesignElement):
+            elements += model.objects.filter(design=design).order_by("pk")
+    return elements
+
+
+@functools.lru_cache(maxsize=None)
+def _content_models():
+    # Imported here to avoid circular imports
+    from dbtemplates.models import Template
+
+    from customfit.bodies.models import Body
+    from customfit.designs.models import (
+        AdditionalDesignElement,
+        Collection,
+        Design,
+        Designer,
+    )
+    from customfit.pattern_spec.models import BasePatternSpec
+    from customfit.stitches.models import Stitch
+
+    return (
+        Template,
+        Stitch,
+        Design,
+        Designer,
+        Collection,
+        AdditionalDesignElement,
+        Swatch,
+        Body,
+        BasePatternSpec,
+        Redo,
+    )
+
+
+def _ids_linking_to(base_model, targets, id_field="pk"):
+    # The ids (or other id_field) of the rows of base_model (and its subclasses)
+    # with a foreign key to any of the targets, a list of (model, ids) pairs. A key
+    # to a parent or subclass of a target model counts too: their rows share ids.
+    ids = set()
+    for model in apps.get_models():
+        if not issubclass(model, base_model):
+            continue
+        for field in model._meta.local_concrete_fields:
+            if not field.many_to_one:
+                continue
+            for (target_model, target_ids) in targets:
+                if not target_ids:
+                    continue
+                if issubclass(field.related_model, target_model) or issubclass(
+                    target_model, field.related_model
+                ):
+                    ids.update(
+                        model._base_manager.filter(
+                            **{field.attname + "__in": target_ids}
+                        ).values_list(id_field, flat=True)
+                    )
+    return ids
+
+
+def _clear_content_fingerprints(instance):
+    # Imported here to avoid circular imports
+    from customfit.designs.models import AdditionalDesignElement, Design
+    from customfit.pattern_spec.models import BasePatternSpec
+    from customfit.stitches.models import Stitch
+
+    # Work up from the changed object through everything whose fingerprint
+    # describes it (see _BasePattern._compute_content_fingerprint()): stitches
+    # describe their templates; designs and their additional elements their
+    # stitches, designers and collections; spec sources all of those, and their
+    # swatches and bodies.
+    changed = [(type(instance), {instance.pk})]
+    changed.append((Stitch, _ids_linking_to(Stitch, changed)))
+    design_ids = _ids_linking_to(Design, changed)
+    design_ids |= _ids_linking_to(AdditionalDesignElement, changed, "design_id")
+    if isinstance(instance, AdditionalDesignElement):
+        design_ids.add(instance.design_id)
+    changed.append((Design, design_ids))
+    pattern_spec_ids = _ids_linking_to(BasePatternSpec, changed)
+    redo_ids = _ids_linking_to(Redo, changed)
+    if isinstance(instance, BasePatternSpec):
+        pattern_spec_ids.add(instance.pk)
+    if isinstance(instance, Redo):
+        redo_ids.add(instance.pk)
+    if not (pattern_spec_ids or redo_ids):
+        return
+
+    igp_path = "schematic__individual_garment_parameters__"
+    IndividualPattern.objects.filter(
+        Q(spec_source_pattern_spec__in=pattern_spec_ids)
+        | Q(spec_source_redo__in=redo_ids)
+        # Redos are described along with the pattern specs they redo
+        | Q(**{"original_pieces__" + igp_path + "pattern_spec__in": pattern_spec_ids})
+    ).update(content_fingerprint="")
+    GradedPattern.objects.filter(
+        pieces__schematic__graded_garment_parameters__pattern_spec__in=pattern_spec_ids
+    ).update(content_fingerprint="")
+
+
+def _content_changed(sender, **kwargs):
+    # A change to the inputs of a pattern's content fingerprint (a stitch template
+    # edited in the admin, say) clears the stored fingerprints of the patterns that
+    # use the changed object, and only those. They are recomputed as needed.
+    # Deletions are handled before the fact, while the links to the object are still
+    # there to be followed. New objects aren't used by any pattern yet.
+    if kwargs.get("raw") or kwargs.get("created"):
+        return
+    if isinstance(kwargs["instance"], _content_models()):
+        _clear_content_fingerprints(kwargs["instance"])
+
+
+def _template_changed(sender, **kwargs):
+    # Imported here to avoid circular imports
+    from dbtemplates.models import Template
+
+    if isinstance(kwargs["instance"], Template):
+        clear_db_templates()
+
+
+post_save.connect(_content_changed)
+pre_delete.connect(_content_changed)
+post_save.connect(_template_changed)
+post_delete.connect(_template_changed)
+
+
 #
 # Models for testing
 #
@@ -10,6 +10,8 @@ import django.utils
 from django.db.models import Model
 
 from customfit.helpers.math_helpers import CallableCompoundResult, CompoundResult
+from customfit.helpers.profile_helpers import time_section, time_template_render
+from customfit.helpers.template_helpers import get_file_template
 
 logger = logging.getLogger(__name__)
 
@@ -224,7 +226,8 @@ def render_template(template, additional_context_data=None):
         template = template.template
 
     try:
-        html = template.render(context)
+        with time_template_render(template.name):
+            html = template.render(context)
         safe_html = django.utils.safestring.mark_safe(html)
         return safe_html
     except:
@@ -242,7 +245,7 @@ def render_template_path(template_path, additional_context_data=None):
 
     if additional_context_data is None:
         additional_context_data = {}
-    template = django.template.loader.get_template(template_path)
+    template = get_file_template(template_path)
     try:
         return render_template(template, additional_context_data)
     except:
@@ -624,6 +627,10 @@ class Section(object, metaclass=abc.ABCMeta):
         pass
 
     def render(self, additional_context=None):
+        with time_section(self.__class__.__name__):
+            return self._render(additional_context)
+
+    def _render(self, additional_context):
         if additional_context is None:
             additional_context = {}
 
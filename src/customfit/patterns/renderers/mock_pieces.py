@@ -100,6 +100,13 @@ class WebPersonalNotesRenderer(PersonalNotesRendererBase):
 
     template_name = "personal_notes"
 
+    def __bool__(self):
+        """
+        Patterns that are still being previewed (and so haven't been saved) have
+        nowhere to keep notes, so there's nothing to link to.
+        """
+        return self.piece.pk is not None
+
 
 class PdfPersonalNotesRenderer(PersonalNotesRendererBase):
 
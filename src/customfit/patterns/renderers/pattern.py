@@ -1,9 +1,15 @@
+import functools
 import logging
 
 import django.template
 import django.utils
 from django.core.cache import cache
 
+from customfit.helpers.cache_helpers import get_or_set_single_flight
+from customfit.helpers.profile_helpers import record_cache_lookup
+
+from ..models import RenderedPatternContent
+
 PREAMBLE_CHUNK_NAME = "preamble"
 INSTRUCTIONS_CHUNK_NAME = "instructions"
 POSTAMBLE_CHUNK_NAME = "postamble"
@@ -42,6 +48,8 @@ class PatternRendererBase(object):
 
     def __init__(self, pattern):
         self.pattern = pattern
+        self._content_fingerprint = None
+        self._fingerprint = None
         self.preamble_pieces = self._make_preamble_piece_list(pattern)
         self.instruction_pieces = self._make_instruction_piece_list(pattern)
         self.postamble_pieces = self._make_postamble_piece_list(pattern)
@@ -57,21 +65,46 @@ class PatternRendererBase(object):
         )
 
     @staticmethod
-    def _make_cache_key(renderer, chunk_name, ids):
-        key = "patterntext:%s:%s:%s" % (renderer.__class__.__name__, chunk_name, ids)
+    def _make_cache_key(renderer, chunk_name, fingerprint):
+        key = "patterntext:%s:%s:%s" % (
+            renderer.__class__.__name__,
+            chunk_name,
+            fingerprint,
+        )
         key = key.replace(" ", "_")  # Memcached doesn't like spaces
         return key
 
+    def _get_content_fingerprint(self):
+        if self._content_fingerprint is None:
+            self._content_fingerprint = self.pattern.get_content_fingerprint()
+        return self._content_fingerprint
+
+    def _get_fingerprint(self):
+        if self._fingerprint is None:
+            self._fingerprint = self.pattern.get_fingerprint()
+        return self._fingerprint
+
     def _piece_cache_key(self, renderer):
+        # Keys are built from fingerprints of what the text is rendered from, rather
+        # than ids, so that they change when (say) a stitch template is edited.
+        # Instructions only depend on the pieces and the inputs to the pattern, and
+        # are shared by all patterns with the same content. Other sections may show
+        # the pattern's name or notes, and are not. (Note that a pattern has at most
+        # one piece of each kind for each renderer.)
         try:
             exemplar = renderer.exemplar
-            ids = renderer.piece_list.id
+            fingerprint = self._get_content_fingerprint()
         except AttributeError:
             exemplar = renderer.piece
-            ids = [renderer.piece.id]
+            fingerprint = self._get_fingerprint()
         assert exemplar.__class__.__name__ not in COMPOUND_CHUNK_NAMES
 
-        return self._make_cache_key(renderer, exemplar.__class__.__name__, ids)
+        return self._make_cache_key(renderer, exemplar.__class__.__name__, fingerprint)
+
+    def _use_cache(self):
+        # Patterns computed in memory for preview (see the design-wizard approve views)
+        # have no ids to build cache-keys from, and are re-computed on every request anyway.
+        return self.pattern.pk is not None
 
     def prefill_cache(self):
         self.render_pattern()
@@ -87,7 +120,7 @@ class PatternRendererBase(object):
             cache_keys = [self._piece_cache_key(renderer) for renderer in renderers]
             cache.delete_many(cache_keys)
         chunk_keys = [
-            self._make_cache_key(self, chunk_name, [self.pattern.id])
+            self._make_cache_key(self, chunk_name, self._get_fingerprint())
             for chunk_name in COMPOUND_CHUNK_NAMES
         ]
         cache.delete_many(chunk_keys)
@@ -115,6 +148,12 @@ class PatternRendererBase(object):
         PieceRendererClasses, and combine/return the resulting strings
         as a single safestring.
         """
+        html = "".join(self._iter_piece_list(piece_list))
+        safe_html = django.utils.safestring.mark_safe(html)
+        return safe_html
+
+    def _iter_piece_list(self, piece_list):
+        # Yields the patterntext of each piece in turn. See _render_piece_list()
 
         # Skip:
         #
@@ -140,40 +179,32 @@ class PatternRendererBase(object):
         renderers = self._filter_renderers(piece_list)
 
         # Now get (cached?) patterntext for each renderer
-        return_strings = []
-
         for renderer in renderers:
 
             # Let's first check to see if we have that
             # patterntext in the cache. (We can't do this within the renderer's 'render()' method
             # because we only know out here what the 'additional context' will be.)
 
-            cache_key = self._piece_cache_key(renderer)
-            logger.info("Looking in cache for %s", cache_key)
-            piece_text = cache.get(cache_key)
-
-            if piece_text is None:
-                # cache miss! Generate the text and store it
-                logger.info("%s not found in cache-- generating and storing", cache_key)
+            if not self._use_cache():
                 additional_context = {"pattern": self.pattern}
-                piece_text = renderer.render(additional_context)
-                cache.set(cache_key, piece_text)
-            else:
-                logger.info("%s found in cache", cache_key)
+                yield renderer.render(additional_context)
+                continue
 
-            return_strings.append(piece_text)
-
-        html = "".join(return_strings)
-        safe_html = django.utils.safestring.mark_safe(html)
-        return safe_html
+            cache_key = self._piece_cache_key(renderer)
+            logger.info("Looking in cache for %s", cache_key)
+            additional_context = {"pattern": self.pattern}
+            # On a miss, only one of the concurrent requests (or the prefill task)
+            # renders the piece. The others wait for it to show up in the cache.
+            yield self._get_or_render(
+                cache_key, functools.partial(renderer.render, additional_context)
+            )
 
     def render_pattern(self):
         """
         Will return the HTML for patterntext as a safestring.
         """
-        cache_key = self._make_cache_key(self, PATTERN_CHUNK_NAME, [self.pattern.id])
-        chunk_text = cache.get(cache_key)
-        if chunk_text is None:
+
+        def compute():
             sub_htmls = [
                 self.render_preamble(),
                 self.render_instructions(),
@@ -181,17 +212,110 @@ class PatternRendererBase(object):
                 self.render_charts(),
             ]
             html = "".join(sub_htmls)
-            chunk_text = django.utils.safestring.mark_safe(html)
-            cache.set(cache_key, chunk_text)
-        return chunk_text
+            return django.utils.safestring.mark_safe(html)
+
+        if not self._use_cache():
+            return compute()
+        cache_key = self._make_cache_key(
+            self, PATTERN_CHUNK_NAME, self._get_fingerprint()
+        )
+        return self._get_or_render(
+            cache_key, functools.partial(self._load_or_render, cache_key, compute)
+        )
+
+    def iter_pattern(self):
+        """
+        Yield the HTML of the patterntext, as safestrings, a bit at a time: the
+        preamble, instructions, postamble and charts in turn, and the pieces of each
+        of those as they are rendered. Whatever is already cached is used as it is,
+        and whatever is rendered is cached (just as render_pattern() would cache it).
+        For responses that stream the patterntext.
+        """
+        chunks = [
+            (self.preamble_pieces, PREAMBLE_CHUNK_NAME),
+            (self.instruction_pieces, INSTRUCTIONS_CHUNK_NAME),
+            (self.postamble_pieces, POSTAMBLE_CHUNK_NAME),
+            (self.chart_pieces, CHARTS_CHUNK_NAME),
+        ]
+
+        if not self._use_cache():
+            for (piece_list, _) in chunks:
+                yield from self._iter_piece_list(piece_list)
+            return
+
+        pattern_key = self._make_cache_key(
+            self, PATTERN_CHUNK_NAME, self._get_fingerprint()
+        )
+        html = self._get_stored(pattern_key)
+        if html is not None:
+            yield html
+            return
+
+        sub_htmls = []
+        for (piece_list, chunk_name) in chunks:
+            cache_key = self._make_cache_key(self, chunk_name, self._get_fingerprint())
+            chunk_html = self._get_stored(cache_key)
+            if chunk_html is None:
+                piece_texts = []
+                for piece_text in self._iter_piece_list(piece_list):
+                    piece_texts.append(piece_text)
+                    yield piece_text
+                chunk_html = django.utils.safestring.mark_safe("".join(piece_texts))
+                self._store(cache_key, chunk_html)
+            else:
+                yield chunk_html
+            sub_htmls.append(chunk_html)
+
+        self._store(pattern_key, django.utils.safestring.mark_safe("".join(sub_htmls)))
+
+    def _get_stored(self, cache_key):
+        # What _get_or_render() would find without rendering anything, or None
+        html = cache.get(cache_key)
+        if html is None and getattr(self.pattern, "approved", False):
+            html = RenderedPatternContent.objects.get_html(self.pattern, cache_key)
+            if html is not None:
+                cache.set(cache_key, html)
+        record_cache_lookup(hit=html is not None)
+        return html
+
+    def _store(self, cache_key, html):
+        # As _get_or_render() and _load_or_render() would store it
+        cache.set(cache_key, html)
+        if getattr(self.pattern, "approved", False):
+            RenderedPatternContent.objects.store_html(self.pattern, cache_key, html)
 
     def _render_text_chunk(self, piece_list, chunk_name):
-        cache_key = self._make_cache_key(self, chunk_name, [self.pattern.id])
-        text_chunk = cache.get(cache_key)
-        if text_chunk is None:
-            text_chunk = self._render_piece_list(piece_list)
-            cache.set(cache_key, text_chunk)
-        return text_chunk
+        if not self._use_cache():
+            return self._render_piece_list(piece_list)
+        cache_key = self._make_cache_key(self, chunk_name, self._get_fingerprint())
+        render = functools.partial(self._render_piece_list, piece_list)
+        return self._get_or_render(
+            cache_key, functools.partial(self._load_or_render, cache_key, render)
+        )
+
+    @staticmethod
+    def _get_or_render(cache_key, render):
+        # get_or_set_single_flight(), noting the hit or miss for the render profile
+        # (see customfit.helpers.profile_helpers)
+        misses = []
+
+        def note_miss():
+            misses.append(cache_key)
+            return render()
+
+        result = get_or_set_single_flight(cache_key, note_miss)
+        record_cache_lookup(hit=not misses)
+        return result
+
+    def _load_or_render(self, cache_key, render):
+        # Called on a cache miss. The chunks of approved patterns are kept in the
+        # database too, so that we don't have to re-render them after the cache
+        # is flushed. (Graded patterns are never approved, and aren't kept.)
+        if not getattr(self.pattern, "approved", False):
+            return render()
+        return RenderedPatternContent.objects.get_or_render_html(
+            self.pattern, cache_key, render
+        )
 
     def render_preamble(self):
         """
@@ -0,0 +1,46 @@
+import logging
+
+from celery import shared_task
+from celery.signals import worker_process_init
+from django.contrib.auth.models import User
+
+from customfit.design_wizard.views.caching import MockRequest
+from customfit.helpers.asset_helpers import build_static_asset_index
+from customfit.helpers.template_helpers import warm_template_cache
+
+from .models import IndividualPattern
+from .views import IndividualPatternPdfView, IndividualPatternShortPdfView
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def render_pattern_pdf(pattern_id, user_id, abridged):
+    """
+    Render and cache one of the PDFs of a pattern for a user who is waiting to
+    download it, then release the render-claim taken by the download view. See
+    MakePdfMixin.wait_for_pdf().
+    """
+    view_class = IndividualPatternShortPdfView if abridged else IndividualPatternPdfView
+    pattern = IndividualPattern.even_unapproved.get(id=pattern_id)
+    user = User.objects.get(id=user_id)
+    view = view_class(object=pattern, request=MockRequest(user, {}))
+    logger.info("Rendering %s for pattern %s", view_class.__name__, pattern_id)
+    try:
+        view.make_pdf()
+    finally:
+        view.release_pdf_render()
+
+
+@worker_process_init.connect
+def warm_renderer_templates(**kwargs):
+    # So that the first pattern each worker process renders doesn't pay for
+    # compiling all the renderer templates
+    warm_template_cache()
+
+
+@worker_process_init.connect
+def index_static_assets(**kwargs):
+    # So that the PDFs rendered by each worker process find our fonts, CSS and
+    # images without going to the filesystem for each one
+    build_static_asset_index()
@@ -8,45 +8,60 @@ import unittest.mock as mock
 import urllib.error
 import urllib.parse
 import urllib.request
+from io import BytesIO
 
 import pytz
 from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import resolve, reverse
+from PyPDF2 import PdfReader, PdfWriter
 
+from customfit.design_wizard.factories import TransactionFactory
+from customfit.design_wizard.views.caching import MockRequest, uncache_pattern
 from customfit.designs.factories import DesignerFactory, DesignFactory
+from customfit.helpers.cache_helpers import make_lock_key
 from customfit.helpers.math_helpers import CallableCompoundResult, CompoundResult
 from customfit.pattern_spec.factories import PatternSpecFactory
-from customfit.stitches.factories import StitchFactory
+from customfit.stitches.factories import StitchFactory, WaistHemTemplateFactory
 from customfit.swatches.factories import GaugeFactory
 from customfit.test_garment.factories import (
     GradedTestPatternFactory,
     TestAdditionalElementFactory,
     TestApprovedIndividualPatternFactory,
+    TestApprovedIndividualPatternWithBodyFactory,
     TestArchivedIndividualPatternFactory,
     TestIndividualPatternFactory,
+    TestIndividualPatternWithBodyFactory,
+    TestPatternPiecesFactory,
     TestPatternSpecFactory,
+    TestPatternSpecWithBodyFactory,
     TestRedonePatternFactory,
+    pattern_with_body_from_pspec_and_redo_kwargs,
 )
 from customfit.test_garment.models import (
     TestAdditionalDesignElement,
     TestIndividualPattern,
 )
+from customfit.uploads.factories import create_individual_pattern_picture
 from customfit.userauth.factories import StaffFactory, UserFactory
 
-from .models import IndividualPattern
+from .models import IndividualPattern, RenderedPatternContent, RenderProfileRecord
 from .renderers import (
     AboutDesignerRenderer,
     DesignerNotesRenderer,
     InformationSection,
     InstructionSection,
+    PatternRendererBase,
     PdfPersonalNotesRenderer,
     PieceList,
     StitchesSectionRenderer,
     SubSection,
     WebPersonalNotesRenderer,
 )
+from .renderers.test_renderers import TestPieceRenderer
 from .templatetags.pattern_conventions import (
     count_fmt,
     divide_counts_by_gauge,
@@ -59,6 +74,12 @@ from .templatetags.pattern_conventions import (
     round_lengths_tag,
     round_tag,
 )
+from .views import (
+    PATTERNTEXT_PLACEHOLDER,
+    IndividualPatternPdfView,
+    IndividualPatternShortPdfView,
+    _profile_pattern_render,
+)
 
 
 class PieceListTests(TestCase):
@@ -992,8 +1013,9 @@ class PatternTests(TestCase):
 
     def test_cache_fill_and_flush(self):
         p = TestIndividualPatternFactory()
-        piece = p.pieces.test_piece
-        cache_key = "patterntext:TestPieceRenderer:TestPatternPiece:%d" % piece.id
+        cache_key = "patterntext:TestPieceRenderer:TestPatternPiece:%s" % (
+            p.get_content_fingerprint()
+        )
 
         p.prefill_patterntext_cache()
         self.assertIsNotNone(cache.get(cache_key), msg=cache_key)
@@ -1222,6 +1244,131 @@ class PatternRendererTests(RendererTestCase):
         )
         self.assertHTMLEqual(html, goal_html)
 
+    def test_approved_patterntext_outlasts_cache(self):
+        p = TestApprovedIndividualPatternFactory()
+        cache.clear()
+        html = p.render_pattern()
+        self.assertTrue(RenderedPatternContent.objects.filter(pattern=p).exists())
+
+        # Once the cache is flushed, the patterntext is read back, not re-rendered
+        cache.clear()
+        with mock.patch.object(
+            PatternRendererBase, "_render_piece_list", side_effect=AssertionError
+        ):
+            self.assertEqual(p.render_pattern(), html)
+
+        # Redos throw it away
+        uncache_pattern(p)
+        self.assertFalse(RenderedPatternContent.objects.filter(pattern=p).exists())
+
+    def test_unapproved_patterntext_not_stored(self):
+        p = TestIndividualPatternFactory()
+        p.render_pattern()
+        self.assertFalse(RenderedPatternContent.objects.exists())
+
+    def test_stored_patterntext_keyed_on_pieces(self):
+        p = TestApprovedIndividualPatternFactory()
+        cache.clear()
+        p.render_pattern()
+
+        # New pieces (as from a redo) mean new patterntext, even if no one
+        # flushed the old
+        p.update_with_new_pieces(
+            TestPatternPiecesFactory(
+                test_piece__test_field=4, schematic=p.pieces.schematic
+            )
+        )
+        cache.clear()
+        with mock.patch.object(
+            PatternRendererBase,
+            "_render_piece_list",
+            autospec=True,
+            return_value="new patterntext",
+        ) as mock_render:
+            self.assertIn("new patterntext", p.render_pattern())
+        mock_render.assert_called()
+
+    def test_stored_patterntext_replaced(self):
+        p = TestApprovedIndividualPatternFactory()
+        cache.clear()
+        p.render_pattern()
+        stored = RenderedPatternContent.objects.filter(pattern=p)
+        keys = set(stored.values_list("key", flat=True))
+
+        # Renaming the pattern changes the keys of its patterntext. What was stored
+        # under the old ones is replaced, not kept alongside.
+        p.name = "a new name"
+        p.save()
+        cache.clear()
+        p.render_pattern()
+        self.assertEqual(stored.count(), len(keys))
+        self.assertFalse(keys & set(stored.values_list("key", flat=True)))
+
+    def test_duplicate_patterns_share_instructions(self):
+        p1 = TestIndividualPatternFactory()
+        pspec = p1.get_spec_source()
+        p2 = TestIndividualPatternFactory(
+            pieces__schematic__individual_garment_parameters__pattern_spec=pspec
+        )
+        self.assertEqual(p1.get_content_fingerprint(), p2.get_content_fingerprint())
+        self.assertNotEqual(p1.get_fingerprint(), p2.get_fingerprint())
+
+        # The instructions of the second come from the cache entries of the first.
+        # (The other sections link to the pattern, and are its own.)
+        p1.render_pattern()
+        with mock.patch.object(TestPieceRenderer, "render", side_effect=AssertionError):
+            html = p2.render_pattern()
+        self.assertIn("Knit 2 over 2", html)
+        self.assertIn("/pattern/%s/note/" % p2.id, html)
+
+    def test_template_edit_changes_only_affected_keys(self):
+        template = WaistHemTemplateFactory(content="<p>old hem</p>")
+        stitch = StitchFactory(_waist_hem_stitch_template=template)
+        p1 = TestIndividualPatternFactory(
+            pieces__schematic__individual_garment_parameters__pattern_spec__stitch1=stitch
+        )
+        p2 = TestIndividualPatternFactory()
+        fingerprints = [p.get_content_fingerprint() for p in (p1, p2)]
+
+        template.content = "<p>new hem</p>"
+        template.save()
+        (p1, p2) = [IndividualPattern.objects.get(pk=p.pk) for p in (p1, p2)]
+        self.assertNotEqual(p1.get_content_fingerprint(), fingerprints[0])
+        # The other pattern's fingerprint is still stored, not recomputed
+        with self.assertNumQueries(0):
+            self.assertEqual(p2.get_content_fingerprint(), fingerprints[1])
+
+    def test_unrelated_edit_keeps_content_fingerprint(self):
+        p1 = TestIndividualPatternWithBodyFactory()
+        p2 = TestIndividualPatternWithBodyFactory()
+        fingerprints = [p.get_content_fingerprint() for p in (p1, p2)]
+
+        body = p1.get_spec_source().body
+        body.waist_circ += 1
+        body.save()
+        (p1, p2) = [IndividualPattern.objects.get(pk=p.pk) for p in (p1, p2)]
+        self.assertNotEqual(p1.get_content_fingerprint(), fingerprints[0])
+        with self.assertNumQueries(0):
+            self.assertEqual(p2.get_content_fingerprint(), fingerprints[1])
+
+        # Nor does saving the pattern lose its stored fingerprint
+        p2.notes = "new notes"
+        p2.save()
+        p2 = IndividualPattern.objects.get(pk=p2.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(p2.get_content_fingerprint(), fingerprints[1])
+
+    def test_edited_inputs_rendered_without_flush(self):
+        designer = DesignerFactory(about_designer_long="long description")
+        (html, p) = self._render_pattern(designer=designer)
+        self.assertIn("long description", html)
+
+        designer.about_designer_long = "new description"
+        designer.save()
+        p = IndividualPattern.objects.get(pk=p.pk)
+        html = self.normalize_html(p.render_pattern())
+        self.assertIn("new description", html)
+
 
 class GradedPatternRendererTests(RendererTestCase):
 
@@ -1409,6 +1556,27 @@ class TestPatterntextPDFView(TestCase):
         pspec.delete()
         user.delete()
 
+    def test_get_graded_pdf(self):
+        p = GradedTestPatternFactory(name="Graded name")
+        pdf_url = reverse("patterns:gradedpattern_pdf_view", args=(p.pk,))
+
+        rendered_html = []
+        with mock.patch(
+            "customfit.views.HTML", self._one_page_html_class(rendered_html)
+        ):
+            response = self.client.get(pdf_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="graded-name.pdf"'
+        )
+        # preamble and instructions, as for individual patterns
+        self.assertEqual(len(rendered_html), 2)
+
+        # Only the owner (and staff) can get it
+        self.client.force_login(UserFactory())
+        response = self.client.get(pdf_url)
+        self.assertEqual(response.status_code, 403)
+
     def test_get_both_pdf(self):
         user = UserFactory()
         five_hundred_foos = " ".join(itertools.repeat("foo", 500))
@@ -1450,6 +1618,198 @@ class TestPatterntextPDFView(TestCase):
         pspec.delete()
         user.delete()
 
+    def _one_page_html_class(self, rendered_html):
+        # Stand-in for WeasyPrint that makes a one-page PDF and remembers the HTML
+        class OnePageHTML(object):
+            def __init__(self, string, url_fetcher):
+                rendered_html.append(string)
+
+            def render(self):
+                return self
+
+            def write_pdf(self, target):
+                writer = PdfWriter()
+                writer.add_blank_page(612, 792)
+                writer.write(target)
+
+        return OnePageHTML
+
+    def test_pdf_sections_cached_separately(self):
+        rendered_html = []
+        OnePageHTML = self._one_page_html_class(rendered_html)
+
+        pspec = TestPatternSpecFactory(name="Pattern name")
+        p = self._make_pattern_from_patternspec(pspec)
+        pdf_url = reverse("patterns:individualpattern_pdf_view", args=(p.pk,))
+        cache.clear()
+
+        with mock.patch("customfit.views.HTML", OnePageHTML):
+            response = self.client.get(pdf_url)
+            self.assertEqual(response.status_code, 200)
+            # preamble and instructions. (No stitch charts, so no charts section.)
+            self.assertEqual(len(rendered_html), 2)
+            self.assertEqual(len(PdfReader(BytesIO(response.content)).pages), 2)
+            self.assertIn('<div id="id-preamble">', rendered_html[0])
+            self.assertNotIn('<div class="two_column">', rendered_html[0])
+            self.assertIn('<div class="two_column">', rendered_html[1])
+            self.assertNotIn('<div id="id-preamble">', rendered_html[1])
+            # later sections carry on the page numbering
+            self.assertIn("counter-reset: page 1;", rendered_html[1])
+
+            # Flushing the PDF (as a redo does) doesn't mean re-rendering
+            # sections that haven't changed
+            uncache_pattern(p)
+            rendered_html.clear()
+            response = self.client.get(pdf_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(rendered_html, [])
+
+            # A new note only changes the preamble
+            p.notes = "Remember to use the blue yarn"
+            p.save()
+            uncache_pattern(p)
+            response = self.client.get(pdf_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(rendered_html), 1)
+            self.assertIn("Remember to use the blue yarn", rendered_html[0])
+            self.assertEqual(len(PdfReader(BytesIO(response.content)).pages), 2)
+
+    def test_pdf_outlasts_cache(self):
+        rendered_html = []
+        pspec = TestPatternSpecFactory(name="Pattern name")
+        p = self._make_pattern_from_patternspec(pspec)
+        pdf_url = reverse("patterns:individualpattern_shortpdf_view", args=(p.pk,))
+        view = IndividualPatternShortPdfView(object=p)
+        cache.clear()
+
+        OnePageHTML = self._one_page_html_class(rendered_html)
+        with mock.patch("customfit.views.HTML", OnePageHTML):
+            self.assertFalse(view.has_stored_pdf())
+            response = self.client.get(pdf_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(rendered_html), 2)
+            self.assertTrue(view.has_stored_pdf())
+
+            # Once the cache is flushed, the PDF is read back, not re-rendered
+            cache.clear()
+            rendered_html.clear()
+            second_response = self.client.get(pdf_url)
+            self.assertEqual(second_response.status_code, 200)
+            self.assertEqual(rendered_html, [])
+            self.assertEqual(second_response.content, response.content)
+
+        # Redos throw it away
+        uncache_pattern(p)
+        self.assertFalse(view.has_stored_pdf())
+
+    def test_download_queues_render_ahead_of_prefills(self):
+        from .tasks import render_pattern_pdf
+
+        rendered_html = []
+        pspec = TestPatternSpecFactory(name="Pattern name")
+        p = self._make_pattern_from_patternspec(pspec)
+        pdf_url = reverse("patterns:individualpattern_shortpdf_view", args=(p.pk,))
+        cache.clear()
+
+        with mock.patch(
+            "customfit.views.HTML", self._one_page_html_class(rendered_html)
+        ), mock.patch.object(
+            render_pattern_pdf, "apply_async", wraps=render_pattern_pdf.apply_async
+        ) as mock_apply_async:
+            response = self.client.get(pdf_url)
+            self.assertEqual(response.status_code, 200)
+
+        mock_apply_async.assert_called_once_with(
+            args=(p.id, self.elf.id, True),
+            priority=settings.PDF_DOWNLOAD_TASK_PRIORITY,
+        )
+        self.assertEqual(len(rendered_html), 2)
+        view = IndividualPatternShortPdfView(object=p)
+        self.assertFalse(view.pdf_render_in_flight())
+
+    def test_download_waits_for_render_in_flight(self):
+        from .tasks import render_pattern_pdf
+
+        rendered_html = []
+        pspec = TestPatternSpecFactory(name="Pattern name")
+        p = self._make_pattern_from_patternspec(pspec)
+        pdf_url = reverse("patterns:individualpattern_pdf_view", args=(p.pk,))
+        cache.clear()
+
+        # Someone else (the prefill task, say) is rendering this PDF, and
+        # finishes while the download is waiting
+        worker_view = IndividualPatternPdfView(
+            object=p, request=MockRequest(self.elf, {})
+        )
+        self.assertTrue(worker_view.claim_pdf_render())
+
+        def finish_render(seconds):
+            worker_view.make_pdf()
+            worker_view.release_pdf_render()
+
+        with mock.patch(
+            "customfit.views.HTML", self._one_page_html_class(rendered_html)
+        ), mock.patch(
+            "customfit.views.time.sleep", side_effect=finish_render
+        ) as mock_sleep, mock.patch.object(
+            render_pattern_pdf, "apply_async"
+        ) as mock_apply_async:
+            response = self.client.get(pdf_url)
+            self.assertEqual(response.status_code, 200)
+
+        mock_sleep.assert_called_once()
+        mock_apply_async.assert_not_called()
+        # Rendered once (in two sections), not twice
+        self.assertEqual(len(rendered_html), 2)
+
+    @override_settings(PDF_DOWNLOAD_WAIT_SECONDS=0)
+    def test_download_stops_waiting_for_stuck_render(self):
+        rendered_html = []
+        pspec = TestPatternSpecFactory(name="Pattern name")
+        p = self._make_pattern_from_patternspec(pspec)
+        pdf_url = reverse("patterns:individualpattern_pdf_view", args=(p.pk,))
+        cache.clear()
+
+        # A render was claimed, and never finished. (Claimed by hand, as the claims
+        # made by claim_pdf_render() expire along with the wait.)
+        view = IndividualPatternPdfView(object=p)
+        cache.add(view._make_render_marker_key(), True)
+
+        with mock.patch(
+            "customfit.views.HTML", self._one_page_html_class(rendered_html)
+        ):
+            response = self.client.get(pdf_url)
+
+        # The user is asked to come back, rather than the PDF being rendered here
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response["Retry-After"], str(view.pdf_retry_seconds))
+        self.assertEqual(rendered_html, [])
+
+    @override_settings(PDF_DOWNLOAD_WAIT_SECONDS=0)
+    def test_download_stops_waiting_for_other_request(self):
+        rendered_html = []
+        pspec = TestPatternSpecFactory(name="Pattern name")
+        p = self._make_pattern_from_patternspec(pspec)
+        pdf_url = reverse("patterns:individualpattern_pdf_view", args=(p.pk,))
+        cache.clear()
+
+        # With no worker to hand it to, the download renders the PDF itself, but
+        # another request already is
+        view = IndividualPatternPdfView(object=p)
+        cache.add(make_lock_key(view._make_cache_key()), True)
+
+        with mock.patch(
+            "customfit.views.HTML", self._one_page_html_class(rendered_html)
+        ), mock.patch.object(
+            IndividualPatternPdfView, "queue_pdf_render", return_value=False
+        ), mock.patch(
+            "customfit.helpers.cache_helpers.time.sleep"
+        ):
+            response = self.client.get(pdf_url)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(rendered_html, [])
+
     def test_missing_image(self):
         # Sanity check: make sure the dummy image does not really exist
         image_url = "http://example.com/nonesuch.jpg"
@@ -1489,6 +1849,163 @@ class TestPatterntextPDFView(TestCase):
         user.delete()
 
 
+class PatternListDataTests(TestCase):
+
+    def setUp(self):
+        super(PatternListDataTests, self).setUp()
+        self.user = UserFactory()
+        self.design = DesignFactory()
+
+    def _make_patterns(self):
+        design_kwarg = (
+            "pieces__schematic__individual_garment_parameters__pattern_spec__design_origin"
+        )
+        TestApprovedIndividualPatternFactory.for_user(self.user)
+        TestApprovedIndividualPatternFactory(
+            user=self.user, **{design_kwarg: self.design}
+        )
+        with_picture = TestApprovedIndividualPatternFactory.for_user(self.user)
+        create_individual_pattern_picture(with_picture)
+        with_featured_pic = TestApprovedIndividualPatternFactory.for_user(self.user)
+        with_featured_pic.featured_pic = create_individual_pattern_picture(
+            with_featured_pic
+        )
+        with_featured_pic.save()
+        return TestRedonePatternFactory(user=self.user, **{design_kwarg: self.design})
+
+    def _list_data(self, pattern):
+        return (
+            pattern.get_spec_source(),
+            pattern.get_spec_source().design_origin,
+            pattern.preferred_picture_url,
+            pattern.preferred_picture_file,
+            pattern.redo_possible(),
+        )
+
+    def test_with_list_data(self):
+        redone = self._make_patterns()
+        queryset = IndividualPattern.live_patterns.filter(user=self.user).order_by("id")
+        expected = [self._list_data(p) for p in queryset]
+
+        patterns = list(queryset.with_list_data())
+        with self.assertNumQueries(0):
+            actual = [self._list_data(p) for p in patterns]
+        self.assertEqual(actual, expected)
+        # Including the redo's
+        [redone_data] = [
+            data for (p, data) in zip(patterns, actual) if p.id == redone.id
+        ]
+        self.assertEqual(redone_data[1], self.design)
+
+    def test_query_count_independent_of_pattern_count(self):
+        queryset = IndividualPattern.live_patterns.filter(user=self.user)
+        self._make_patterns()
+        with CaptureQueriesContext(connection) as few_patterns_queries:
+            list(queryset.with_list_data())
+        self._make_patterns()
+        self._make_patterns()
+        with CaptureQueriesContext(connection) as many_patterns_queries:
+            self.assertEqual(len(list(queryset.with_list_data())), 15)
+        self.assertEqual(
+            len(few_patterns_queries.captured_queries),
+            len(many_patterns_queries.captured_queries),
+        )
+
+    def test_list_views_use_list_data(self):
+        self._make_patterns()
+        IndividualPattern.live_patterns.filter(user=self.user).update(archived=True)
+        TestApprovedIndividualPatternFactory.for_user(self.user)
+        client = Client()
+        client.force_login(self.user)
+
+        response = client.get(reverse("patterns:individualpattern_list_view"))
+        self.assertEqual(response.status_code, 200)
+        [pattern] = response.context["pattern_list"]
+        self.assertIn("_spec_source", pattern.__dict__)
+
+        response = client.get(reverse("patterns:individualpattern_archive_view"))
+        self.assertEqual(response.status_code, 200)
+        patterns = response.context["object_list"]
+        self.assertEqual(len(patterns), 5)
+        for pattern in patterns:
+            self.assertIn("_spec_source", pattern.__dict__)
+
+
+class DenormalizedSpecSourceTests(TestCase):
+
+    def test_spec_source_fields_on_create(self):
+        pattern = TestApprovedIndividualPatternWithBodyFactory()
+        pspec = pattern.pieces.get_spec_source()
+        pattern.refresh_from_db()
+        self.assertEqual(pattern.spec_source_pattern_spec_id, pspec.id)
+        self.assertIsNone(pattern.spec_source_redo_id)
+        self.assertEqual(pattern.spec_source_swatch, pspec.swatch)
+        self.assertEqual(pattern.spec_source_body, pspec.body)
+        self.assertEqual(pattern.spec_source_design, pspec.design_origin)
+        self.assertEqual(pattern.get_spec_source(), pspec)
+
+    def test_spec_source_fields_follow_redo(self):
+        pspec = TestPatternSpecWithBodyFactory(design_origin=DesignFactory())
+        pattern = pattern_with_body_from_pspec_and_redo_kwargs(pspec)
+        redo = pattern.pieces.get_spec_source()
+        pattern = IndividualPattern.objects.get(pk=pattern.pk)
+        self.assertIsNone(pattern.spec_source_pattern_spec_id)
+        self.assertEqual(pattern.spec_source_redo_id, redo.id)
+        self.assertEqual(pattern.spec_source_swatch, redo.swatch)
+        self.assertNotEqual(pattern.spec_source_swatch, pspec.swatch)
+        self.assertEqual(pattern.spec_source_body, redo.body)
+        self.assertNotEqual(pattern.spec_source_body, pspec.body)
+        self.assertEqual(pattern.spec_source_design, pspec.design_origin)
+        self.assertEqual(pattern.get_spec_source(), redo)
+
+        # And the lookups follow along
+        self.assertEqual(list(redo.swatch.patterns), [pattern])
+        self.assertEqual(list(pspec.swatch.patterns), [])
+        self.assertEqual(list(redo.body.patterns), [pattern])
+        self.assertEqual(list(pspec.body.patterns), [])
+
+    def test_approved_follows_transactions(self):
+        pattern = TestIndividualPatternFactory()
+        self.assertFalse(pattern.approved)
+        self.assertNotIn(pattern, IndividualPattern.approved_patterns.all())
+
+        transaction = TransactionFactory(pattern=pattern)
+        self.assertTrue(pattern.approved)
+        self.assertTrue(IndividualPattern.objects.get(pk=pattern.pk).approved)
+        self.assertIn(pattern, IndividualPattern.approved_patterns.all())
+        self.assertIn(pattern, IndividualPattern.live_patterns.all())
+
+        transaction.delete()
+        self.assertFalse(IndividualPattern.objects.get(pk=pattern.pk).approved)
+        self.assertNotIn(pattern, IndividualPattern.approved_patterns.all())
+
+    def test_approved_follows_queryset_delete(self):
+        # As when transactions are deleted in bulk in the admin
+        pattern = TestIndividualPatternFactory()
+        TransactionFactory(pattern=pattern)
+        TransactionFactory(pattern=pattern)
+        self.assertTrue(IndividualPattern.objects.get(pk=pattern.pk).approved)
+        pattern.transactions.all().delete()
+        self.assertFalse(IndividualPattern.objects.get(pk=pattern.pk).approved)
+
+    def test_approved_follows_moved_transaction(self):
+        pattern = TestIndividualPatternFactory()
+        other_pattern = TestIndividualPatternFactory()
+        transaction = TransactionFactory(pattern=pattern)
+        transaction.pattern = other_pattern
+        transaction.save()
+        self.assertFalse(IndividualPattern.objects.get(pk=pattern.pk).approved)
+        self.assertTrue(IndividualPattern.objects.get(pk=other_pattern.pk).approved)
+
+    def test_stale_instance_does_not_unapprove(self):
+        pattern = TestIndividualPatternFactory()
+        stale_copy = IndividualPattern.objects.get(pk=pattern.pk)
+        TransactionFactory(pattern=pattern)
+        stale_copy.notes = "changed"
+        stale_copy.save()
+        self.assertTrue(IndividualPattern.objects.get(pk=pattern.pk).approved)
+
+
 class TestPatternArchives(TestCase):
     """Verifies that pattern archiving works."""
 
@@ -1829,6 +2346,32 @@ class IndividualPatternDetailViewTest(TestCase):
         resp = self.client.get(self.unapproved_url)
         self.assertEqual(resp.status_code, 404)
 
+    def test_patterntext_streamed(self):
+        cache.clear()
+        self.login()
+        resp = self.client.get(self.approved_url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        # Nothing is rendered until the page is sent
+        stored = RenderedPatternContent.objects.filter(pattern=self.approved_pattern)
+        self.assertFalse(stored.exists())
+        content = b"".join(resp.streaming_content).decode()
+        self.assertNotIn(PATTERNTEXT_PLACEHOLDER, content)
+        self.assertTrue(content.rstrip().endswith("</html>"))
+        # The sections are stored as they are sent (preamble, instructions,
+        # postamble, charts), and then the whole
+        self.assertEqual(stored.count(), 5)
+        self.assertIn(self.approved_pattern.render_pattern(), content)
+
+        # and the cached copy is sent the second time around
+        cache.clear()
+        resp = self.client.get(self.approved_url)
+        with mock.patch.object(
+            PatternRendererBase, "_iter_piece_list", side_effect=AssertionError
+        ):
+            second_content = b"".join(resp.streaming_content).decode()
+        self.assertIn(self.approved_pattern.render_pattern(), second_content)
+
     def test_unapproved_archived(self):
         self.unapproved_pattern.archived = True
         self.unapproved_pattern.save()
@@ -1970,6 +2513,107 @@ class IndividualPatternPDFViewTest(TestCase):
         self.assertEqual(resp.status_code, 404)
 
 
+class RenderProfileTests(TestCase):
+
+    def setUp(self):
+        super(RenderProfileTests, self).setUp()
+        self.user = UserFactory()
+        self.pattern = TestApprovedIndividualPatternFactory.for_user(user=self.user)
+        self.detail_url = reverse(
+            "patterns:individualpattern_detail_view", args=(self.pattern.pk,)
+        )
+        self.report_url = reverse("patterns:render_profile_report")
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def test_off_by_default(self):
+        resp = self.client.get(self.detail_url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(RenderProfileRecord.objects.exists())
+
+    def test_off_costs_nothing(self):
+        with mock.patch.object(IndividualPattern, "get_spec_source") as get_spec_source:
+            with _profile_pattern_render(self.pattern, "label") as render_profile:
+                self.assertIsNone(render_profile)
+        get_spec_source.assert_not_called()
+
+    @override_settings(RENDER_PROFILING=True)
+    def test_patterntext_profiled(self):
+        resp = self.client.get(self.detail_url)
+        self.assertEqual(resp.status_code, 200)
+        # The patterntext is rendered as it is streamed
+        self.assertFalse(RenderProfileRecord.objects.exists())
+        b"".join(resp.streaming_content)
+        record = RenderProfileRecord.objects.get()
+        self.assertEqual(record.label, "patterntext:IndividualPatternDetailView")
+        self.assertEqual(record.pattern_id, self.pattern.id)
+        self.assertEqual(record.design, self.pattern.get_spec_source().design_origin)
+        self.assertGreater(record.query_count, 0)
+        self.assertGreater(record.cache_misses, 0)
+        self.assertIn("TestPieceRenderer", record.data["sections"])
+        self.assertTrue(record.data["sections"]["TestPieceRenderer"]["templates"])
+        self.assertGreater(record.data["template_render_time"], 0)
+
+        # Second time around, it all comes from the cache
+        resp = self.client.get(self.detail_url)
+        b"".join(resp.streaming_content)
+        record = RenderProfileRecord.objects.order_by("-id").first()
+        self.assertEqual(record.cache_misses, 0)
+        self.assertGreater(record.cache_hits, 0)
+        self.assertEqual(record.data["sections"], {})
+
+    @override_settings(RENDER_PROFILING=True)
+    def test_pdf_profiled(self):
+        pdf_url = reverse(
+            "patterns:individualpattern_pdf_view", args=(self.pattern.pk,)
+        )
+        resp = self.client.get(pdf_url)
+        self.assertEqual(resp.status_code, 200)
+        # The download hands the render to a (here, eager) task, and then finds the
+        # PDF in the cache. The task finds the patterntext in the cache, in turn.
+        records = [
+            record
+            for record in RenderProfileRecord.objects.filter(
+                label="pdf:IndividualPatternPdfView"
+            )
+            if record.data["pdf_layout_time"]
+        ]
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertGreater(record.cache_hits, 0)
+        self.assertGreater(record.data["pdf_layout_time"], 0)
+        self.assertGreater(record.data["pdf_write_time"], 0)
+
+    def test_report_staff_only(self):
+        resp = self.client.get(self.report_url)
+        self.assertEqual(resp.status_code, 302)
+
+    @override_settings(RENDER_PROFILING=True)
+    def test_report(self):
+        resp = self.client.get(self.detail_url)
+        b"".join(resp.streaming_content)
+        design = DesignFactory()
+        RenderProfileRecord.objects.update(design=design)
+        self.client.force_login(StaffFactory())
+
+        resp = self.client.get(self.report_url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "TestPieceRenderer")
+        self.assertEqual(resp.context["sections"][0]["renders"], 1)
+
+        resp = self.client.get(self.report_url, {"design": design.id})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context["records"]), 1)
+
+        other_design = DesignFactory()
+        resp = self.client.get(self.report_url, {"design": other_design.id})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["records"], [])
+
+        resp = self.client.get(self.report_url, {"design": "nonsense"})
+        self.assertEqual(resp.status_code, 404)
+
+
 class MyPatternsViewTest(TestCase):
 
     def setUp(self):
@@ -1,3 +1,4 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.urls import re_path
 from django.views.generic.base import RedirectView
@@ -53,9 +54,19 @@ urlpatterns = [
         login_required(views.IndividualPatternShortPdfView.as_view()),
         name="individualpattern_shortpdf_view",
     ),
+    re_path(
+        r"^profiles/$",
+        staff_member_required(views.RenderProfileReportView.as_view()),
+        name="render_profile_report",
+    ),
     re_path(
         r"^graded/(?P<pk>\d+)/$",
         login_required(views.GradedPatternDetailView.as_view()),
         name="gradedpattern_detail_view",
     ),
+    re_path(
+        r"^graded/(?P<pk>\d+)/pdf/$",
+        login_required(views.GradedPatternPdfView.as_view()),
+        name="gradedpattern_pdf_view",
+    ),
 ]
@@ -9,13 +9,21 @@ from django.contrib import messages
 from django.core.exceptions import PermissionDenied
 from django.db import transaction
 from django.forms.models import modelform_factory
-from django.http import Http404, HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.urls import reverse, reverse_lazy
+from django.utils.safestring import mark_safe
 from django.views.generic import DetailView, ListView, TemplateView, UpdateView, View
 
+from customfit.designs.models import Design
+from customfit.helpers.profile_helpers import get_active_profile, profile
 from customfit.views import MakePdfMixin
 
-from .models import GradedPattern, IndividualPattern
+from .models import (
+    GradedPattern,
+    IndividualPattern,
+    RenderedPatternContent,
+    RenderProfileRecord,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +39,10 @@ class MyPatternsView(TemplateView):
 
     def get_patterns(self):
         user = self.request.user
-        queryset = IndividualPattern.live_patterns.filter(user=user).order_by(
-            "-creation_date"
+        queryset = (
+            IndividualPattern.live_patterns.filter(user=user)
+            .order_by("-creation_date")
+            .with_list_data()
         )
         return queryset
 
@@ -56,8 +66,10 @@ class IndividualPatternArchivesListView(ListView):
 
     def get_queryset(self):
         user = self.request.user
-        queryset = self.model.archived_patterns.filter(user=user).order_by(
-            "-creation_date"
+        queryset = (
+            self.model.archived_patterns.filter(user=user)
+            .order_by("-creation_date")
+            .with_list_data()
         )
         return queryset
 
@@ -93,14 +105,38 @@ class IndividualPatternArchivesListView(ListView):
 
 # There is no Create view, because pattern creation is handled by design_wizard.
 
+
+def _profile_pattern_render(pattern, label):
+    # Profiles (if settings.RENDER_PROFILING is on) are kept for the report below.
+    # Only look up the design if this render will actually be profiled.
+    if not getattr(settings, "RENDER_PROFILING", False) or get_active_profile():
+        return profile(label)
+    spec_source = pattern.get_spec_source()
+    return profile(
+        label,
+        on_finish=RenderProfileRecord.objects.record,
+        pattern_id=pattern.id,
+        design_id=getattr(spec_source, "design_origin_id", None),
+    )
+
+
 # The Detail view for a pattern *is* very complicated. To make it simpler, we
 # build a generic-view-like class to take a piece model-instance and render it
 # in the appropriate 'patterntext.html' template.
 
 
+# Stands in for the patterntext in the page when it is streamed
+PATTERNTEXT_PLACEHOLDER = "<!-- customfit:patterntext -->"
+
+
 class _BasePatternDetailView(DetailView):
     context_object_name = "pattern"
 
+    # If True, the page (which must only show the patterntext as `pattern_text`)
+    # is sent as soon as it is rendered, and the patterntext is rendered and
+    # streamed after it a section at a time. See render_to_response().
+    stream_patterntext = False
+
     def _valid_patterns_queryset(self):
         pass
 
@@ -130,21 +166,28 @@ class _BasePatternDetailView(DetailView):
         pattern = self.object
         try:
 
-            context["preamble_text"] = pattern.render_preamble(
-                abridged=self.abridged_patterntext, for_pdf=self.for_pdf
-            )
-            context["instruction_text"] = pattern.render_instructions(
-                abridged=self.abridged_patterntext, for_pdf=self.for_pdf
-            )
-            context["postamble_text"] = pattern.render_postamble(
-                abridged=self.abridged_patterntext, for_pdf=self.for_pdf
-            )
-            context["chart_text"] = pattern.render_charts(
-                abridged=self.abridged_patterntext, for_pdf=self.for_pdf
-            )
-            context["pattern_text"] = pattern.render_pattern(
-                abridged=self.abridged_patterntext, for_pdf=self.for_pdf
-            )
+            if self.stream_patterntext:
+                # Rendered as the response is sent
+                context["pattern_text"] = mark_safe(PATTERNTEXT_PLACEHOLDER)
+            else:
+                with _profile_pattern_render(
+                    pattern, "patterntext:" + self.__class__.__name__
+                ):
+                    context["preamble_text"] = pattern.render_preamble(
+                        abridged=self.abridged_patterntext, for_pdf=self.for_pdf
+                    )
+                    context["instruction_text"] = pattern.render_instructions(
+                        abridged=self.abridged_patterntext, for_pdf=self.for_pdf
+                    )
+                    context["postamble_text"] = pattern.render_postamble(
+                        abridged=self.abridged_patterntext, for_pdf=self.for_pdf
+                    )
+                    context["chart_text"] = pattern.render_charts(
+                        abridged=self.abridged_patterntext, for_pdf=self.for_pdf
+                    )
+                    context["pattern_text"] = pattern.render_pattern(
+                        abridged=self.abridged_patterntext, for_pdf=self.for_pdf
+                    )
 
             # add the designer
             spec_source = pattern.get_spec_source()
@@ -169,6 +212,45 @@ class _BasePatternDetailView(DetailView):
             logger.error(error_msg)
             raise e_type(e_value).with_traceback(e_traceback)
 
+    def render_to_response(self, context, **response_kwargs):
+        response = super(_BasePatternDetailView, self).render_to_response(
+            context, **response_kwargs
+        )
+        if not self.stream_patterntext:
+            return response
+
+        # The page itself is rendered now, so that it sees the messages, CSRF token
+        # and so on before the middleware is done with them. Only the patterntext
+        # is left for later.
+        response.render()
+        page = response.content.decode(response.charset)
+        (head, tail) = page.split(PATTERNTEXT_PLACEHOLDER, 1)
+        return StreamingHttpResponse(
+            self._stream_page(head, tail),
+            content_type=response["Content-Type"],
+            status=response.status_code,
+        )
+
+    def _stream_page(self, head, tail):
+        yield head
+        pattern = self.object
+        try:
+            with _profile_pattern_render(
+                pattern, "patterntext:" + self.__class__.__name__
+            ):
+                yield from pattern.iter_pattern(
+                    abridged=self.abridged_patterntext, for_pdf=self.for_pdf
+                )
+        except Exception:
+            # Too late to send an error page: the best we can do is log it
+            logger.exception(
+                "Problem rendering pattern: user %s, pattern %s",
+                pattern.user.username,
+                pattern.id,
+            )
+            raise
+        yield tail
+
 
 class _BaseIndividualPatternDetailView(_BasePatternDetailView):
     model = IndividualPattern
@@ -183,6 +265,9 @@ class IndividualPatternDetailView(_BaseIndividualPatternDetailView):
     # subclasses can change these attributes
     abridged_patterntext = False
     for_pdf = False
+    # Long patterns take seconds to render on a cold cache. Better to show the
+    # page (and the preamble) while the rest is rendered.
+    stream_patterntext = True
 
     def get_context_data(self, **kwargs):
 
@@ -214,7 +299,34 @@ class IndividualPatternNoteUpdateView(UpdateView):
         return super(IndividualPatternNoteUpdateView, self).form_valid(form)
 
 
-class IndividualPatternPdfViewBase(MakePdfMixin, _BaseIndividualPatternDetailView):
+class _PatternPdfMixin(MakePdfMixin):
+    # What the PDF views of individual and graded patterns have in common
+
+    template_name = "patterns/individualpattern_pdf.html"
+    for_pdf = True
+
+    def get_cover_sheet(self):
+        cover_sheet = self.object.get_spec_source().get_cover_sheet()
+        return cover_sheet
+
+    def get_pdf_sections(self, context):
+        # Rendered and cached separately, so that (for example) a change to the
+        # preamble doesn't mean re-rendering the instructions. The instructions
+        # and postamble share a section, as they flow through the same columns.
+        # See individualpattern_pdf.html
+        sections = ["preamble", "instructions"]
+        if context["chart_text"].strip():
+            sections.append("charts")
+        return sections
+
+    def get_cache_fingerprint(self):
+        return self.object.get_fingerprint()
+
+    def profile_render(self, label):
+        return _profile_pattern_render(self.object, label)
+
+
+class IndividualPatternPdfViewBase(_PatternPdfMixin, _BaseIndividualPatternDetailView):
     """
     Produces a PDF version of a IndividualPatternDetailView,
     and returns it as a HttpResponse. Operates by embedding the same
@@ -227,12 +339,34 @@ class IndividualPatternPdfViewBase(MakePdfMixin, _BaseIndividualPatternDetailVie
 
     """
 
-    template_name = "patterns/individualpattern_pdf.html"
-    for_pdf = True
+    def load_or_render_pdf(self, render):
+        # The PDFs of approved patterns are kept in the database too, so that we
+        # don't have to re-render them after the cache is flushed.
+        if not self.object.approved:
+            return render()
+        return RenderedPatternContent.objects.get_or_render_pdf(
+            self.object, self._make_cache_key(), render
+        )
 
-    def get_cover_sheet(self):
-        cover_sheet = self.object.get_spec_source().get_cover_sheet()
-        return cover_sheet
+    def has_stored_pdf(self):
+        return self.object.approved and RenderedPatternContent.objects.has_pdf(
+            self.object, self._make_cache_key()
+        )
+
+    def queue_pdf_render(self):
+        # Imported here to avoid a circular import
+        from .tasks import render_pattern_pdf
+
+        try:
+            render_pattern_pdf.apply_async(
+                args=(self.object.id, self.request.user.id, self.abridged_patterntext),
+                priority=settings.PDF_DOWNLOAD_TASK_PRIORITY,
+            )
+        except Exception:
+            # Broker trouble shouldn't keep the user from their pattern
+            logger.exception("Could not queue PDF render; rendering in request")
+            return False
+        return True
 
 
 class IndividualPatternPdfView(IndividualPatternPdfViewBase):
@@ -277,6 +411,98 @@ class GradedPatternDetailView(_BasePatternDetailView):
         return self.model.objects.all()
 
 
+class GradedPatternPdfView(_PatternPdfMixin, GradedPatternDetailView):
+    """
+    Produces a PDF version of a GradedPatternDetailView, laid out as the PDFs of
+    individual patterns are. Graded patterns are only ever abridged.
+    """
+
+    # Graded garments have no PDF renderers: their PDFs are of the same
+    # patterntext as the web page
+    for_pdf = False
+
+    def make_file_name(self):
+        slug = django.utils.text.slugify(self.object.name)
+        return slug + ".pdf"
+
+    def get_context_data(self, **kwargs):
+        context = super(GradedPatternPdfView, self).get_context_data(**kwargs)
+        context["pattern_title"] = self.object.name
+        return context
+
+
+class RenderProfileReportView(TemplateView):
+    """
+    Staff-only summary of the render profiles kept while settings.RENDER_PROFILING
+    is on: the most recent ones, and the sections (and their templates) that took
+    longest on average. Can be narrowed to one design with ?design=<id>.
+    """
+
+    template_name = "patterns/render_profile_report.html"
+    profile_count = 100
+
+    def get_design(self):
+        design_id = self.request.GET.get("design")
+        if not design_id:
+            return None
+        try:
+            return Design.objects.get(pk=design_id)
+        except (Design.DoesNotExist, ValueError):
+            raise Http404
+
+    @staticmethod
+    def summarize_sections(records):
+        """
+        Return a list of dicts, one per section, of the section's name, the number of
+        renders it was in, its mean time per render, and the (name, mean time) of
+        its templates, slowest first. Slowest sections first, too.
+        """
+        sections = {}
+        for record in records:
+            for (name, timings) in record.data.get("sections", {}).items():
+                summary = sections.setdefault(
+                    name, {"name": name, "renders": 0, "time": 0.0, "templates": {}}
+                )
+                summary["renders"] += 1
+                summary["time"] += timings["time"]
+                templates = summary["templates"]
+                for (template_name, seconds) in timings["templates"].items():
+                    templates[template_name] = (
+                        templates.get(template_name, 0.0) + seconds
+                    )
+
+        summaries = []
+        for summary in sections.values():
+            renders = summary["renders"]
+            templates = [
+                (template_name, seconds / renders)
+                for (template_name, seconds) in summary["templates"].items()
+            ]
+            summaries.append(
+                {
+                    "name": summary["name"],
+                    "renders": renders,
+                    "mean_time": summary["time"] / renders,
+                    "templates": sorted(templates, key=lambda t: t[1], reverse=True),
+                }
+            )
+        return sorted(summaries, key=lambda s: s["mean_time"], reverse=True)
+
+    def get_context_data(self, **kwargs):
+        context = super(RenderProfileReportView, self).get_context_data(**kwargs)
+        design = self.get_design()
+        records = RenderProfileRecord.objects.select_related("design")
+        if design is not None:
+            records = records.filter(design=design)
+        records = list(records[: self.profile_count])
+
+        context["design"] = design
+        context["profiling_enabled"] = getattr(settings, "RENDER_PROFILING", False)
+        context["records"] = records
+        context["sections"] = self.summarize_sections(records)
+        return context
+
+
 class IndividualPatternAction(View):
     """
     Superclass for functionality shared by ArchiveAction and UnarchiveAction.
@@ -6,7 +6,9 @@ from django.core.exceptions import ValidationError
 from django.db import models
 from polymorphic.models import PolymorphicModel
 
+from customfit.helpers.cache_helpers import make_digest, model_fingerprint
 from customfit.helpers.math_helpers import ROUND_UP, CompoundResult, round
+from customfit.helpers.memo_helpers import DerivedValuesMixin, memoized
 from customfit.schematics.models import (
     ConstructionSchematic,
     GradedConstructionSchematic,
@@ -18,13 +20,16 @@ logger = logging.getLogger(__name__)
 # Create your models here.
 
 
-class AreaMixin(object):
+class AreaMixin(DerivedValuesMixin):
     # A mixin-class for things that have area-- either an individual pattern pieces, or
     # a grade of a graded pattern pieces. Subclasses must implement
     #
     # sub_pieces()
     # _trim_area()
+    #
+    # The area is memoized, as weight(), hanks(), yards() and so on all need it.
 
+    @memoized
     def area(self):
         def f(piece):
             return piece.area()
@@ -49,6 +54,15 @@ class _BasePatternPieces(PolymorphicModel):
         return self.schematic.get_spec_source()
 
 
+def _pieces_hash(pattern_pieces, sub_pieces):
+    # Links from the pieces (to their swatch, say) are described by the values of
+    # the linked objects, not their ids.
+    memo = {}
+    fingerprints = [pattern_pieces.__class__.__name__]
+    fingerprints += [model_fingerprint(piece, memo=memo) for piece in sub_pieces]
+    return make_digest(*fingerprints)
+
+
 class PatternPieces(AreaMixin, _BasePatternPieces):
     # Subclasses need to implement
     #
@@ -118,6 +132,14 @@ class PatternPieces(AreaMixin, _BasePatternPieces):
             # schematic. Which is fine-- that's what we wanted in the first place.
             pass
 
+    def content_hash(self):
+        """
+        Return a hex digest of the computed pieces. Pieces with the same values
+        (whatever their ids) have the same hash, and a redo (which makes new
+        pieces) almost always changes it.
+        """
+        return _pieces_hash(self, self.sub_pieces())
+
     def weight(self):
         swatch = self.get_spec_source().swatch
         square_inches = self.area()
@@ -164,6 +186,13 @@ class GradedPatternPieces(_BasePatternPieces):
     def all_pieces(self):
         return self.gradedpatternpiece_set.all()
 
+    def content_hash(self):
+        """
+        Return a hex digest of the computed pieces of all grades. See
+        PatternPieces.content_hash().
+        """
+        return _pieces_hash(self, self.all_pieces.order_by("pk"))
+
     class Meta:
         pass
 
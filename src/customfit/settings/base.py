@@ -424,6 +424,41 @@ ERROR_PAGE_URL = os.environ.get("ERROR_PAGE_URL", DEFAULT_ERROR_PAGE)
 MAX_PICTURES = 10
 
 
+# How many processes should be used to compute the grades of a graded pattern?
+# (See customfit.helpers.parallel_helpers.) 1 means 'compute them serially, in this
+# process'. Only worth raising on dedicated workers with cores to spare.
+GRADED_PATTERN_PROCESSES = int(str_from_env("GRADED_PATTERN_PROCESSES", "1"))
+
+
+# How many results should each of the (memoized) shaping solvers keep per process?
+# (See customfit.sweaters.models.pieces.base_piece.) 0 disables the caches.
+SHAPING_CACHE_SIZE = int(str_from_env("SHAPING_CACHE_SIZE", "4096"))
+
+
+# How many compiled templates should the patterntext renderers keep per process? And
+# which template directories should a worker compile when it starts? (See
+# customfit.helpers.template_helpers.)
+TEMPLATE_CACHE_SIZE = int(str_from_env("TEMPLATE_CACHE_SIZE", "1024"))
+RENDERER_TEMPLATE_DIRS = [
+    "patterns/renderer_templates",
+    "sweaters/sweater_renderer_templates",
+    "cowls/patterntext_templates",
+    "stitches/default_templates",
+]
+
+# How many bytes of fetched assets (fonts, CSS, images) should the PDF renderer keep
+# per process? 0 disables the cache. (See customfit.helpers.asset_helpers.)
+PDF_ASSET_CACHE_BYTES = int(
+    str_from_env("PDF_ASSET_CACHE_BYTES", str(32 * 1024 * 1024))
+)
+
+# Should pattern renders be profiled? Each render of a pattern's patterntext or PDF
+# is then logged, with where its time went, and kept for the staff-only report at
+# patterns:render_profile_report. (See customfit.helpers.profile_helpers.) Costs a
+# little time and a database row per render, so off by default.
+RENDER_PROFILING = bool_from_env("RENDER_PROFILING", False)
+
+
 # Enables @secure_required in src/customfit/decorators.py.
 # Should be True in production. May be false elsewhere.
 # We could require https everywhere, but should not do so unless we can verify
@@ -443,6 +478,25 @@ CELERY_TASK_ALWAYS_EAGER = (
 )
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# Rendering PDFs (WeasyPrint) is slow and memory-hungry, so those tasks get a queue
+# of their own, served by its own worker. See Procfile and doc/procfile_comments.md.
+CELERY_TASK_ROUTES = {
+    "customfit.design_wizard.views.caching._cache_pattern": {"queue": "pdf"},
+    "customfit.patterns.tasks.render_pattern_pdf": {"queue": "pdf"},
+}
+
+# Within the pdf queue, PDFs that users are waiting to download go ahead of the
+# ones we render speculatively when patterns are approved. (With the Redis broker,
+# 0 is the highest priority.)
+PDF_DOWNLOAD_TASK_PRIORITY = 0
+PDF_PREFILL_TASK_PRIORITY = 9
+
+# How long (in seconds), all told, a download will wait for its PDF to be rendered
+# (by a worker, or by another request) before asking the user to try again. Should
+# be well under gunicorn's timeout (see Procfile), to leave time for the rest of
+# the request.
+PDF_DOWNLOAD_WAIT_SECONDS = float(str_from_env("PDF_DOWNLOAD_WAIT_SECONDS", "10"))
+
 
 # EASY THUMBNAILS CONFIGURATION
 # ------------------------------------------------------------------------------
@@ -80,6 +80,12 @@ CELERY_TASK_DEFAULT_RATE_LIMIT = "10/s"
 # over-write this in the Heroku server settings files just to
 # be safe.
 CELERY_REDIS_MAX_CONNECTIONS = 50
+# Let Redis honor the task priorities (see PDF_DOWNLOAD_TASK_PRIORITY in base.py)
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
 
 
 # GENERAL CONFIGURATION
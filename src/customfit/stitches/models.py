@@ -1,13 +1,13 @@
 import os.path
 import uuid
 
-import django.template
 from dbtemplates.models import Template
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.urls import reverse
 
 import customfit.designs.helpers.design_choices as DC
+from customfit.helpers.template_helpers import get_db_template, get_file_template
 
 # 'Empty' models for the various kinds of templates.
 
@@ -424,14 +424,11 @@ class Stitch(models.Model):
         template for this stitch.
         """
         if field:
-            return django.template.Template(
-                field.content,
-                # Why do we add this? For testing
-                name=field.name,
-            )
+            # The name is there for testing
+            return get_db_template(field)
         else:
             template_path = os.path.join(DEFAULT_TEMPLATE_DIR, template_filename)
-            return django.template.loader.get_template(template_path)
+            return get_file_template(template_path)
 
     @property
     def waist_hem_stitch_template(self):
@@ -545,7 +542,7 @@ class Stitch(models.Model):
         """
         from customfit.designs.models import Design
 
-        all_designs = [d for d in Design.objects.all() if d.uses_stitch(self)]
+        all_designs = list(Design.objects.filter(stitch_index__stitch=self))
         return all_designs
 
     def get_public_designs(self):
@@ -557,7 +554,5 @@ class Stitch(models.Model):
         # with the designs app
         from customfit.designs.models import Design
 
-        designs_using = self._get_designs()
-        listable = Design.listable.all()
-        listable_using = [d for d in designs_using if d in listable]
+        listable_using = list(Design.listable.filter(stitch_index__stitch=self))
         return listable_using
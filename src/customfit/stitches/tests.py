@@ -1,13 +1,22 @@
+import importlib
+import io
+
 import django.test
+from django.apps import apps
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.urls import resolve, reverse
 
 import customfit.designs.helpers.design_choices as DC
 import customfit.sweaters.helpers.sweater_design_choices as SDC
 from customfit.designs.factories import DesignerFactory
+from customfit.designs.models import DesignStitch
 from customfit.stitches import models
 from customfit.stitches.factories import StitchFactory
-from customfit.sweaters.factories import SweaterDesignFactory
+from customfit.sweaters.factories import (
+    AdditionalBackElementFactory,
+    SweaterDesignFactory,
+)
 
 
 class RepeatsSpecTestCase(django.test.TestCase):
@@ -359,3 +368,52 @@ class StitchViewTestCase(django.test.TestCase):
         self.assertNotIn(design2, designs)
         self.assertIn(design3, designs)
         self.assertIn(design4, designs)
+
+    def test_list_page_contains_designs(self):
+        SweaterDesignFactory(back_allover_stitch=self.stitch, name="Listed Design")
+        SweaterDesignFactory(
+            back_allover_stitch=self.stitch,
+            name="Private Design",
+            visibility=DC.PRIVATE,
+        )
+        url = reverse("stitch_models:stitch_list_view")
+        response = self.client.get(url)
+        self.assertContains(response, "Listed Design")
+        self.assertNotContains(response, "Private Design")
+
+    def test_design_index(self):
+        design = SweaterDesignFactory(back_allover_stitch=self.stitch)
+        self.assertEqual(self.stitch._get_designs(), [design])
+
+        # Additional elements count too, until they are deleted
+        other_stitch = StitchFactory()
+        element = AdditionalBackElementFactory(design=design, stitch=other_stitch)
+        self.assertEqual(other_stitch._get_designs(), [design])
+        element.delete()
+        self.assertEqual(other_stitch._get_designs(), [])
+
+        # and stitches the design stops using are dropped
+        design.back_allover_stitch = other_stitch
+        design.save()
+        self.assertEqual(self.stitch._get_designs(), [])
+        self.assertEqual(other_stitch._get_designs(), [design])
+
+        # Deleting the design deletes it from the index
+        design.delete()
+        self.assertFalse(DesignStitch.objects.exists())
+
+    def test_rebuild_design_index(self):
+        design = SweaterDesignFactory(back_allover_stitch=self.stitch)
+        DesignStitch.objects.all().delete()
+        self.assertEqual(self.stitch._get_designs(), [])
+        call_command("index_design_stitches", stdout=io.StringIO())
+        self.assertEqual(self.stitch._get_designs(), [design])
+
+    def test_backfill_design_index_migration(self):
+        design = SweaterDesignFactory(back_allover_stitch=self.stitch)
+        DesignStitch.objects.all().delete()
+        migration = importlib.import_module(
+            "customfit.designs.migrations.0003_backfill_designstitch"
+        )
+        migration.backfill_stitch_index(apps, None)
+        self.assertEqual(self.stitch._get_designs(), [design])
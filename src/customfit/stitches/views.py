@@ -24,21 +24,24 @@ class StitchListView(ListView):
         context_data = super(StitchListView, self).get_context_data(**kwargs)
 
         # To optimize a slow view, we're going to pre-fetch Designs and match stitches to their designs
-        # manually, rather than using stitch.get_public_designs()
+        # manually (through the DesignStitch index), rather than using
+        # stitch.get_public_designs() for each stitch
 
-        from customfit.designs.models import Design
+        from customfit.designs.models import Design, DesignStitch
 
+        designs = {design.id: design for design in Design.listable.all()}
         stitch_to_design_dict = defaultdict(set)
-        for design in Design.listable.all():
-            stitches = set(design.stitches_used())
-            for stitch in stitches:
-                stitch_to_design_dict[stitch].add(design)
+        design_stitch_ids = DesignStitch.objects.filter(
+            design_id__in=designs
+        ).values_list("stitch_id", "design_id")
+        for (stitch_id, design_id) in design_stitch_ids:
+            stitch_to_design_dict[stitch_id].add(designs[design_id])
 
         stitch_list = context_data["stitch_list"]
 
         stitches_with_designs = []
         for stitch in stitch_list:
-            l = stitch_to_design_dict[stitch]
+            l = stitch_to_design_dict[stitch.id]
             l = sorted(l, key=lambda des: des.name)
             sl_tuple = (stitch, l)
             stitches_with_designs.append(sl_tuple)
@@ -10,6 +10,7 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
 from django.forms.models import model_to_dict
 from django.urls import reverse
 
@@ -34,7 +35,37 @@ from .helpers import area_to_yards_of_yarn_estimate
 logger = logging.getLogger(__name__)
 
 
-class UnarchivedSwatchManager(models.Manager):
+class SwatchQuerySet(models.QuerySet):
+
+    def compatible_with_stitches(self, stitches):
+        """
+        Filter down to the swatches whose allover stitch (see Swatch.get_stitch())
+        is compatible with every one of `stitches` (which may include None), as
+        Stitch.is_compatible() decides it-- but in the database, rather than one
+        swatch at a time.
+        """
+        # Only stitches that use repeats can rule out a swatch, and then only those
+        # swatches that use different repeats
+        repeats = {
+            (stitch.repeats_x_mod, stitch.repeats_mod_y)
+            for stitch in stitches
+            if stitch is not None and stitch.use_repeats
+        }
+        if not repeats:
+            return self.all()
+        no_repeats = Q(use_repeats=False) | Q(
+            additional_stitches=0, stitches_per_repeat=1
+        )
+        if len(repeats) > 1:
+            # No one set of repeats can match them all
+            return self.filter(no_repeats)
+        [(x_mod, mod_y)] = repeats
+        return self.filter(
+            no_repeats | Q(additional_stitches=x_mod, stitches_per_repeat=mod_y)
+        )
+
+
+class UnarchivedSwatchManager(models.Manager.from_queryset(SwatchQuerySet)):
     """
     This class will act as the default manager for the Swatch model. If differs
     from the standard manager only in that its initial query set filters out
@@ -157,25 +188,12 @@ class Swatch(models.Model):
     @property
     def patterns(self):
         # putting this import at the top level was throwing ImportErrors
-        # The simplest way to do this is
-        #   patterns = [pattern for pattern in IP.objects.all() if pattern.get_spec_source().swatch == self]
-        # But this is way too slow. So we need to push this to the database and get those patterns where
-        #
-        # 1) self is the swatch in the patterns original patternspec and it hasn't been redone, or
-        # 2) the pattern has been redone and self is the swatch of the redo
-        from django.db.models import Q
-
         from customfit.patterns.models import IndividualPattern as IP
 
-        # self is the swatch of the pattern's current spec_source and it hasnt been redone
-        q_pspec = Q(
-            pieces__schematic__individual_garment_parameters__pattern_spec__swatch=self
-        )
-
-        # self is the swatch of the pattern's current spec_source and it has been redone
-        q_redo = Q(pieces__schematic__individual_garment_parameters__redo__swatch=self)
-
-        patterns = IP.objects.filter(q_pspec | q_redo).all()
+        # The swatch of each pattern's current spec source (the redo, if it has been
+        # redone) is denormalized onto the pattern. See
+        # IndividualPattern.update_spec_source_fields()
+        patterns = IP.objects.filter(spec_source_swatch=self).all()
 
         return patterns
 
@@ -505,7 +523,7 @@ class Swatch(models.Model):
     #
     # See https://docs.djangoproject.com/en/1.8/topics/db/managers/#default-managers for more information
     objects = UnarchivedSwatchManager()
-    even_archived = models.Manager()
+    even_archived = SwatchQuerySet.as_manager()
 
     class Meta:
         app_label = "swatches"
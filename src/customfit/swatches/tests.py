@@ -11,6 +11,7 @@ from customfit.patterns.factories import (
     IndividualPatternFactory,
 )
 from customfit.patterns.models import IndividualPattern
+from customfit.stitches.factories import StitchFactory
 from customfit.test_garment.factories import (
     TestApprovedIndividualPatternFactory,
     TestPatternSpecFactory,
@@ -629,6 +630,58 @@ class SwatchMethodTests(TestCase):
         self.assertIsNone(swatch_stitch._button_band_veeneck_template)
         self.assertIsNone(swatch_stitch.extra_finishing_instructions)
 
+    def test_compatible_with_stitches(self):
+        user = UserFactory()
+        swatches = [
+            SwatchFactory(user=user),
+            SwatchFactory(
+                user=user,
+                use_repeats=True,
+                stitches_per_repeat=1,
+                additional_stitches=0,
+            ),
+            SwatchFactory(
+                user=user,
+                use_repeats=True,
+                stitches_per_repeat=7,
+                additional_stitches=3,
+            ),
+            SwatchFactory(
+                user=user,
+                use_repeats=True,
+                stitches_per_repeat=4,
+                additional_stitches=2,
+            ),
+        ]
+        stitch_lists = [
+            [],
+            [None],
+            [StitchFactory()],
+            [StitchFactory(repeats_x_mod=3, repeats_mod_y=7), None],
+            [
+                StitchFactory(repeats_x_mod=3, repeats_mod_y=7),
+                StitchFactory(repeats_x_mod=3, repeats_mod_y=7),
+            ],
+            [
+                StitchFactory(repeats_x_mod=3, repeats_mod_y=7),
+                StitchFactory(repeats_x_mod=2, repeats_mod_y=4),
+            ],
+        ]
+        for stitches in stitch_lists:
+            # Should agree with Stitch.is_compatible()
+            goal = [
+                swatch
+                for swatch in swatches
+                if all(swatch.get_stitch().is_compatible(s) for s in stitches)
+            ]
+            with self.assertNumQueries(1):
+                compatible = list(
+                    Swatch.objects.filter(user=user)
+                    .compatible_with_stitches(stitches)
+                    .order_by("id")
+                )
+            self.assertEqual(compatible, goal)
+
     def test_get_stitch2(self):
         swatch = SwatchFactory(
             use_repeats=True, stitches_per_repeat=7, additional_stitches=3
@@ -438,7 +438,7 @@ class SweaterPatternAdmin(admin.ModelAdmin):
     user_view.allow_tags = True
 
     def approved(self, instance):
-        return bool(instance.transactions.filter(approved=True))
+        return instance.approved
 
     approved.short_description = "Approved"
 
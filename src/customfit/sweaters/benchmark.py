@@ -0,0 +1,344 @@
+"""
+A benchmark of the whole sweater pipeline, from pattern spec to PDF.
+
+For each case in a matrix of silhouettes, constructions, necklines, fits and
+individual vs. graded patterns, run_benchmark() makes a pattern spec with the
+factories and then times each stage of turning it into a pattern-- garment
+parameters, schematic, pieces, pattern, patterntext and (for individual patterns)
+PDF-- and counts the database queries made by each. The stages are run as the
+design and graded wizards run them. Results are plain dicts, meant to be written
+out as JSON and compared (see compare_results()) with those of another commit to
+catch regressions. See the benchmark_pipeline management command.
+
+Everything is done inside a transaction that is rolled back at the end, and with a
+private, empty, cache (so that the patterntext and PDFs are really rendered). The
+in-process shaping memos are emptied before each run too, so that every run
+really computes its shaping. The compiled templates are warmed first, as they are
+in a running worker.
+"""
+
+import collections
+import datetime
+import itertools
+import platform
+import statistics
+import subprocess
+import time
+
+import django
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from customfit.design_wizard.views.caching import MockRequest
+from customfit.helpers.template_helpers import warm_template_cache
+from customfit.patterns.models import GradedPattern, IndividualPattern
+from customfit.patterns.views import IndividualPatternPdfView
+from customfit.userauth.factories import UserFactory
+
+from .factories import GradedSweaterPatternSpecFactory, SweaterPatternSpecFactory
+from .helpers import sweater_design_choices as SDC
+from .models.pieces.base_piece import clear_shaping_caches
+from .views.helpers import (
+    _make_IPP_from_IPS,
+    _make_IPS_from_IGP,
+    _make_pattern_from_IPP,
+)
+
+INDIVIDUAL = "individual"
+GRADED = "graded"
+KINDS = [INDIVIDUAL, GRADED]
+
+SILHOUETTES = [silhouette for (silhouette, _) in SDC.SUPPORTED_SILHOUETTES]
+CONSTRUCTIONS = [construction for (construction, _) in SDC.SUPPORTED_CONSTRUCTIONS]
+NECKLINES = [SDC.NECK_VEE, SDC.NECK_CREW, SDC.NECK_SCOOP, SDC.NECK_BOAT]
+
+# Hourglass silhouettes need hourglass fits, so fits are given by ease and
+# translated for the silhouette
+FITS = ["tight", "average", "relaxed", "oversized"]
+_HOURGLASS_FITS = {
+    "tight": SDC.FIT_HOURGLASS_TIGHT,
+    "average": SDC.FIT_HOURGLASS_AVERAGE,
+    "relaxed": SDC.FIT_HOURGLASS_RELAXED,
+    "oversized": SDC.FIT_HOURGLASS_OVERSIZED,
+}
+_WOMENS_FITS = {
+    "tight": SDC.FIT_WOMENS_TIGHT,
+    "average": SDC.FIT_WOMENS_AVERAGE,
+    "relaxed": SDC.FIT_WOMENS_RELAXED,
+    "oversized": SDC.FIT_WOMENS_OVERSIZED,
+}
+
+STAGES = ["igp", "schematic", "pieces", "pattern", "patterntext", "pdf"]
+
+# Version of the format of the results, in case we need to change it
+RESULTS_FORMAT = 1
+
+_BENCHMARK_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "customfit-benchmark",
+    }
+}
+
+
+class BenchmarkCase(
+    collections.namedtuple(
+        "BenchmarkCase", ["kind", "silhouette", "construction", "neckline", "fit"]
+    )
+):
+
+    @property
+    def case_id(self):
+        return "/".join(self)
+
+    def get_pattern_spec_kwargs(self):
+        if self.silhouette in [SDC.SILHOUETTE_HOURGLASS, SDC.SILHOUETTE_HALF_HOURGLASS]:
+            garment_fit = _HOURGLASS_FITS[self.fit]
+        else:
+            garment_fit = _WOMENS_FITS[self.fit]
+        if self.construction == SDC.CONSTRUCTION_DROP_SHOULDER:
+            armhole_depth = SDC.DROP_SHOULDER_ADDITIONAL_ARMHOLE_DEPTH_AVERAGE
+        else:
+            armhole_depth = None
+        return {
+            "silhouette": self.silhouette,
+            "construction": self.construction,
+            "drop_shoulder_additional_armhole_depth": armhole_depth,
+            "neckline_style": self.neckline,
+            "garment_fit": garment_fit,
+        }
+
+
+def make_cases(
+    kinds=None, silhouettes=None, constructions=None, necklines=None, fits=None
+):
+    """
+    Return the BenchmarkCases of the full matrix, optionally narrowed to the given
+    values along each axis, in a fixed order.
+    """
+    return [
+        BenchmarkCase(*values)
+        for values in itertools.product(
+            kinds or KINDS,
+            silhouettes or SILHOUETTES,
+            constructions or CONSTRUCTIONS,
+            necklines or NECKLINES,
+            fits or FITS,
+        )
+    ]
+
+
+class _Stage(object):
+    # Times the body of a `with` statement, and counts its queries, into
+    # timings[name]
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+        self.queries = 0
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.wrapper = connection.execute_wrapper(self._count_query)
+        self.wrapper.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        self.wrapper.__exit__(*exc_info)
+        self.timings[self.name] = {"seconds": seconds, "queries": self.queries}
+
+
+def _run_individual(user, pspec, timings):
+    igp_class = pspec.get_igp_class()
+    with _Stage(timings, "igp"):
+        igp = igp_class.make_from_patternspec(user, pspec)
+    with _Stage(timings, "schematic"):
+        ips = _make_IPS_from_IGP(user, igp)
+    with _Stage(timings, "pieces"):
+        ipp = _make_IPP_from_IPS(ips)
+    with _Stage(timings, "pattern"):
+        pattern = _make_pattern_from_IPP(user, ipp)
+        pattern.pieces.schematic.save()
+        pattern.pieces.save()
+        pattern.save()
+    # The patterntext and PDF are rendered by later requests (or tasks), which
+    # start from the database rather than the objects we have in hand
+    pattern = IndividualPattern.even_unapproved.get(pk=pattern.pk)
+    with _Stage(timings, "patterntext"):
+        pattern.render_pattern()
+    pattern = IndividualPattern.even_unapproved.get(pk=pattern.pk)
+    with _Stage(timings, "pdf"):
+        view = IndividualPatternPdfView(object=pattern, request=MockRequest(user, {}))
+        view.make_pdf()
+
+
+def _run_graded(user, pspec, timings):
+    # As customfit.graded_wizard.helpers.make_graded_pattern()
+    igp_class = pspec.get_igp_class()
+    with _Stage(timings, "igp"):
+        igp = igp_class.make_from_patternspec(user, pspec)
+        igp.full_clean()
+    with _Stage(timings, "schematic"):
+        schematic = igp.get_schematic_class().make_from_garment_parameters(igp)
+        schematic.full_clean()
+    with _Stage(timings, "pieces"):
+        pieces = schematic.get_pieces_class().make_from_schematic(schematic)
+        pieces.full_clean()
+    with _Stage(timings, "pattern"):
+        pattern = pieces.get_pattern_class().make_from_graded_pattern_pieces(pieces)
+        pattern.full_clean()
+        pattern.save()
+    # Graded patterns are only shown on the web, abridged. (No PDF.)
+    pattern = GradedPattern.objects.get(pk=pattern.pk)
+    with _Stage(timings, "patterntext"):
+        pattern.render_pattern(abridged=True)
+
+
+def run_case(case, user):
+    """
+    Run the pipeline once for `case`, and return a dict of the seconds and queries
+    taken by each stage.
+    """
+    timings = {}
+    pspec_kwargs = case.get_pattern_spec_kwargs()
+    if case.kind == GRADED:
+        pspec = GradedSweaterPatternSpecFactory(user=user, **pspec_kwargs)
+        _run_graded(user, pspec, timings)
+    else:
+        pspec = SweaterPatternSpecFactory(user=user, **pspec_kwargs)
+        _run_individual(user, pspec, timings)
+    return timings
+
+
+def _summarize(case, runs):
+    stages = {}
+    for stage in STAGES:
+        stage_runs = [run[stage] for run in runs if stage in run]
+        if not stage_runs:
+            continue
+        seconds = [stage_run["seconds"] for stage_run in stage_runs]
+        stages[stage] = {
+            "seconds": statistics.median(seconds),
+            "min_seconds": min(seconds),
+            "runs": seconds,
+            "queries": max(stage_run["queries"] for stage_run in stage_runs),
+        }
+    result = dict(case._asdict())
+    result.update({"id": case.case_id, "stages": stages, "error": None})
+    return result
+
+
+def _git_commit():
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def run_benchmark(cases, repeat=3, warmup=1, progress=None):
+    """
+    Run each of `cases` `repeat` times (after `warmup` untimed runs of the first
+    one, so that the first case doesn't pay for importing and compiling everything)
+    and return the results: the median and minimum seconds, and the queries, of
+    each stage of each case. Cases that fail are reported with their error rather
+    than timings. progress(case, result), if given, is called after each case.
+    """
+    results = {
+        "format": RESULTS_FORMAT,
+        "environment": {
+            "commit": _git_commit(),
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "repeat": repeat,
+        },
+        "cases": [],
+    }
+
+    warm_template_cache()
+    with override_settings(CACHES=_BENCHMARK_CACHES):
+        with transaction.atomic():
+            user = UserFactory()
+            for _ in range(warmup if cases else 0):
+                try:
+                    with transaction.atomic():
+                        run_case(cases[0], user)
+                except Exception:
+                    # Reported when the case itself is run
+                    pass
+            for case in cases:
+                runs = []
+                try:
+                    for _ in range(repeat):
+                        cache.clear()
+                        clear_shaping_caches()
+                        # Each run in its own savepoint, so that a failure doesn't
+                        # spoil the transaction for the cases after it
+                        with transaction.atomic():
+                            runs.append(run_case(case, user))
+                except Exception as e:
+                    result = dict(case._asdict())
+                    result.update({"id": case.case_id, "stages": {}, "error": repr(e)})
+                else:
+                    result = _summarize(case, runs)
+                results["cases"].append(result)
+                if progress is not None:
+                    progress(case, result)
+            # Leave the database as we found it
+            transaction.set_rollback(True)
+        cache.clear()
+
+    return results
+
+
+def compare_results(baseline, current, threshold=0.25, min_seconds=0.005):
+    """
+    Compare two sets of results from run_benchmark(), and return a list of
+    descriptions of the regressions: stages that made more queries, or took more than
+    `threshold` (as a fraction) longer. Stages that took less than `min_seconds` are
+    too noisy to time, and only their queries are compared. Cases that are in only
+    one of the two are ignored.
+    """
+    baseline_cases = {case["id"]: case for case in baseline["cases"]}
+    regressions = []
+    for case in current["cases"]:
+        baseline_case = baseline_cases.get(case["id"])
+        if baseline_case is None:
+            continue
+        if case["error"] and not baseline_case["error"]:
+            regressions.append("%s: now fails with %s" % (case["id"], case["error"]))
+            continue
+        for (stage, timing) in case["stages"].items():
+            baseline_timing = baseline_case["stages"].get(stage)
+            if baseline_timing is None:
+                continue
+            if timing["queries"] > baseline_timing["queries"]:
+                regressions.append(
+                    "%s: %s made %s queries (was %s)"
+                    % (
+                        case["id"],
+                        stage,
+                        timing["queries"],
+                        baseline_timing["queries"],
+                    )
+                )
+            old = baseline_timing["seconds"]
+            new = timing["seconds"]
+            if max(old, new) >= min_seconds and new > old * (1 + threshold):
+                regressions.append(
+                    "%s: %s took %.4fs (was %.4fs)" % (case["id"], stage, new, old)
+                )
+    return regressions
@@ -19,7 +19,6 @@ from customfit.design_wizard.forms import (
 from customfit.helpers.form_helpers import add_help_circles_to_labels
 from customfit.patterns.models import GradedPattern, IndividualPattern
 from customfit.patterns.templatetags.pattern_conventions import length_fmt
-from customfit.swatches.models import Swatch
 from customfit.sweaters.helpers.magic_constants import (
     DROP_SHOULDER_ARMHOLE_DEPTH_INCHES,
 )
@@ -50,14 +49,9 @@ class PersonalizeDesignForm(
 
     # Helper methods for limiting bodies and swatches.
     # --------------------------------------------------------------------------
-    @staticmethod
-    def extract_compatible_swatches(swatches, design):
-        return [swatch for swatch in swatches if design.compatible_swatch(swatch)]
-
     def filter_compatible_swatches(self, swatches):
-        compatible_swatches = self.extract_compatible_swatches(swatches, self.instance)
-        compatible_swatch_pks = [swatch.pk for swatch in compatible_swatches]
-        return Swatch.objects.filter(pk__in=compatible_swatch_pks).order_by("name")
+        compatible_swatches = self.instance.compatible_swatches(swatches)
+        return compatible_swatches.order_by("name")
 
     # Limit drop-down choices to those compatible with the design.
     # --------------------------------------------------------------------------
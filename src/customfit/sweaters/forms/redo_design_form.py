@@ -14,7 +14,6 @@ from customfit.design_wizard.forms import (
     _make_create_link_layout,
 )
 from customfit.helpers.form_helpers import add_help_circles_to_labels, wrap_with_units
-from customfit.swatches.models import Swatch
 
 from ..helpers import sweater_design_choices as SDC
 from ..models import SweaterRedo
@@ -133,13 +132,10 @@ class SweaterRedoForm(forms.ModelForm, _BodyOptionsMixin, _IndividualQuerysetMix
     def filter_compatible_swatches(self, swatch_queryset):
         design = self.pattern.get_design()
         compatible_swatches = (
-            [s for s in swatch_queryset if design.compatible_swatch(s)]
-            if design
-            else swatch_queryset
+            design.compatible_swatches(swatch_queryset) if design else swatch_queryset
         )
-        compatible_swatch_pks = [swatch.pk for swatch in compatible_swatches]
         # Note: we need to return a queryset
-        return Swatch.objects.filter(pk__in=compatible_swatch_pks).order_by("name")
+        return compatible_swatches.order_by("name")
 
     def filter_compatible_fits(self):
         pspec = self.pattern.get_spec_source()
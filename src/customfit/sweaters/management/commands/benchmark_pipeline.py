@@ -0,0 +1,100 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Times each stage of the sweater pipeline (spec to PDF) over a matrix of "
+        "designs, and writes the results as JSON. Runs in a transaction that is "
+        "rolled back, but is best run against a development database."
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            "--output",
+            dest="output",
+            default=None,
+            help="File to write the results to (default: stdout)",
+        )
+
+        parser.add_argument(
+            "--compare",
+            dest="compare",
+            default=None,
+            help="Results of an earlier run to compare against. Fails if any stage "
+            "got slower (see --threshold) or made more queries.",
+        )
+
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            dest="threshold",
+            default=0.25,
+            help="Slow-down, as a fraction, that counts as a regression",
+        )
+
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            dest="repeat",
+            default=3,
+            help="Number of times to run each case",
+        )
+
+        for (option, choices) in [
+            ("kind", benchmark.KINDS),
+            ("silhouette", benchmark.SILHOUETTES),
+            ("construction", benchmark.CONSTRUCTIONS),
+            ("neckline", benchmark.NECKLINES),
+            ("fit", benchmark.FITS),
+        ]:
+            parser.add_argument(
+                "--" + option,
+                action="append",
+                choices=choices,
+                dest=option,
+                help="Only run cases with this %s (may be repeated)" % option,
+            )
+
+    def handle(self, *args, **options):
+        cases = benchmark.make_cases(
+            kinds=options["kind"],
+            silhouettes=options["silhouette"],
+            constructions=options["construction"],
+            necklines=options["neckline"],
+            fits=options["fit"],
+        )
+        self.stderr.write("Running %d cases" % len(cases))
+
+        def progress(case, result):
+            if result["error"]:
+                self.stderr.write("  %s: %s" % (case.case_id, result["error"]))
+            else:
+                total = sum(stage["seconds"] for stage in result["stages"].values())
+                self.stderr.write("  %s: %.3fs" % (case.case_id, total))
+
+        results = benchmark.run_benchmark(
+            cases, repeat=options["repeat"], progress=progress
+        )
+
+        output = json.dumps(results, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = json.load(f)
+            regressions = benchmark.compare_results(
+                baseline, results, threshold=options["threshold"]
+            )
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError("%d regressions" % len(regressions))
@@ -869,12 +869,21 @@ class SweaterDesignBase(models.Model):
         stitch is compatible with the allover stitches of this design.
         """
         swatch_stitch = swatch.get_stitch()
-        allover_stitches = [
+        return all(swatch_stitch.is_compatible(x) for x in self._allover_stitches())
+
+    def compatible_swatches(self, swatches):
+        """
+        Filter the `swatches` queryset down to those compatible with this design
+        (see compatible_swatch()), in the database.
+        """
+        return swatches.compatible_with_stitches(self._allover_stitches())
+
+    def _allover_stitches(self):
+        return [
             self.front_allover_stitch,
             self.back_allover_stitch,
             self.sleeve_allover_stitch,
         ]
-        return all(swatch_stitch.is_compatible(x) for x in allover_stitches)
 
     # There is not a compatible_body method here; see instead
     # missing_body_entries() in garment_parameters.py.
@@ -1,6 +1,10 @@
 import abc
+import copy
+import functools
+import inspect
 import logging
 
+from django.conf import settings
 from django.db import models
 
 from customfit.helpers.magic_constants import FLOATING_POINT_NOISE
@@ -11,6 +15,7 @@ from customfit.helpers.math_helpers import (
     height_and_gauge_to_row_count,
     round,
 )
+from customfit.helpers.memo_helpers import LRUMemo
 from customfit.pieces.models import GradedPatternPiece, PatternPiece
 from customfit.swatches.models import Swatch
 
@@ -20,6 +25,64 @@ from ..garment_parameters import SweaterGradedGarmentParametersGrade
 logger = logging.getLogger(__name__)
 
 
+# The shaping solvers below are pure functions of their inputs (the only thing they
+# use from the gauge is gauge.rows) and are called repeatedly with the same inputs:
+# by the waist/bust retry loops, across the grades of a graded pattern, and across
+# the patterns built by one worker. So we memoize them. See shaping_cache_info().
+_shaping_memos = {}
+
+
+def _make_shaping_memo(name):
+    memo = LRUMemo(getattr(settings, "SHAPING_CACHE_SIZE", 4096))
+    _shaping_memos[name] = memo
+    return memo
+
+
+def _normalize_shaping_arg(name, value):
+    if name == "gauge":
+        return ("gauge", float(value.rows))
+    # Keep the type in the key, so that (say) 20 and 20.0 are not conflated: the
+    # results would be equal but not identically-typed.
+    return (type(value), value)
+
+
+def _memoize_shaping(method):
+    """
+    Decorator for the compute_shaping classmethods of the ShapingResult classes.
+    Results are keyed on the class and the (normalized) arguments, defaults
+    included, and each caller gets its own copy of the stored result (callers,
+    like compute_shaping_full, may modify what they are given).
+    """
+    signature = inspect.signature(method)
+    memo = _make_shaping_memo(method.__qualname__)
+
+    @functools.wraps(method)
+    def wrapper(cls, *args, **kwargs):
+        bound = signature.bind(cls, *args, **kwargs)
+        bound.apply_defaults()
+        key = (cls,) + tuple(
+            _normalize_shaping_arg(name, value)
+            for (name, value) in list(bound.arguments.items())[1:]
+        )
+        result = memo.get_or_compute(key, lambda: method(cls, *args, **kwargs))
+        return copy.copy(result)
+
+    return wrapper
+
+
+def shaping_cache_info():
+    """
+    Return a dict mapping the name of each memoized shaping solver to the
+    MemoInfo (hits, misses, maxsize, currsize) of its cache.
+    """
+    return {name: memo.info() for (name, memo) in _shaping_memos.items()}
+
+
+def clear_shaping_caches():
+    for memo in _shaping_memos.values():
+        memo.clear()
+
+
 class _BaseShapingResult(metaclass=abc.ABCMeta):
     """
     Base class for all shaping-result objects, which (in turn) should only be used
@@ -152,6 +215,7 @@ class EdgeShapingResult(_BaseEdgeShapingResult):
             assert self.rows_between_standard_shaping_rows >= 0
 
     @classmethod
+    @_memoize_shaping
     def compute_shaping_partial(
         cls,
         larger_stitches,
@@ -279,6 +343,7 @@ class EdgeShapingResult(_BaseEdgeShapingResult):
         return shaping_result
 
     @classmethod
+    @_memoize_shaping
     def compute_shaping_full(
         cls,
         larger_stitches,
@@ -415,6 +480,7 @@ class EdgeCompoundShapingResult(_BaseEdgeShapingResult):
                 )
 
     @classmethod
+    @_memoize_shaping
     def compute_shaping(
         cls, larger_stitches, smaller_stitches, max_vertical_height, gauge
     ):
@@ -667,6 +733,7 @@ class TorsoShapingResult(_BaseShapingResult):
     #         assert self.num_triple_dart_shaping_rows is None
 
     @classmethod
+    @_memoize_shaping
     def compute_shaping(
         cls,
         larger_stitches,
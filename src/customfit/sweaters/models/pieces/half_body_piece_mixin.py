@@ -23,6 +23,11 @@ from customfit.helpers.math_helpers import (
     round,
     trapezoid_area,
 )
+from customfit.helpers.memo_helpers import (
+    DerivedValuesMixin,
+    memoized,
+    memoized_property,
+)
 from customfit.helpers.row_parities import RS, WS, reverse_parity
 
 from ...helpers.magic_constants import (
@@ -40,7 +45,92 @@ logger = logging.getLogger(__name__)
 parities = parities["pullover"]
 
 
-class BaseHalfBodyPieceMixin(models.Model):
+def _first_with_constraints_met(candidates, compute_shaping):
+    """
+    Return (candidate, compute_shaping(candidate)) for the first of the candidates
+    whose shaping meets its constraints, or for the last candidate if none do.
+
+    The candidates must be ordered by increasing vertical distance. More room can
+    only make a shaping easier to achieve, so once one candidate meets its
+    constraints all later ones will too, and we can bisect for the first one
+    instead of trying each in turn. (The first candidate is almost always the
+    answer, though, so we try it before bisecting.)
+    """
+    shapings = {}
+
+    def constraints_met(index):
+        if index not in shapings:
+            shapings[index] = compute_shaping(candidates[index])
+        return shapings[index].constraints_met
+
+    last = len(candidates) - 1
+    if constraints_met(0):
+        found = 0
+    elif not constraints_met(last):
+        found = last
+    else:
+        # Invariant: candidates[low] fails and candidates[high] succeeds
+        low, high = (0, last)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if constraints_met(middle):
+                high = middle
+            else:
+                low = middle
+        found = high
+    return (candidates[found], shapings[found])
+
+
+def _find_waist_and_bust_shaping(
+    compute_shaping,
+    cast_ons,
+    waist_stitches,
+    bust_stitches,
+    waist_shaping_vert_possibilities,
+    bust_shaping_vert_dists,
+):
+    """
+    Find the most desirable waist shaping (the first of the (begin-height,
+    top-height) pairs in waist_shaping_vert_possibilities that works) and then
+    the most desirable bust shaping (the first of the distances in
+    bust_shaping_vert_dists that works). If none of the candidates work, the
+    last (largest) one is used. compute_shaping(larger_stitches,
+    smaller_stitches, max_vertical_height) should return a TorsoShapingResult.
+
+    Returns (begin_decreases_height, max_waist_shaping_distance, waist_shaping,
+    max_bust_shaping_distance, bust_shaping).
+    """
+    # Candidates that leave no room at all are skipped.
+    waist_shaping_vert_possibilities = [
+        (begin_height, top_height)
+        for (begin_height, top_height) in waist_shaping_vert_possibilities
+        if top_height >= begin_height
+    ]
+    assert waist_shaping_vert_possibilities, "No room for waist shaping"
+
+    (begin_decreases_height, top_height), waist_shaping = _first_with_constraints_met(
+        waist_shaping_vert_possibilities,
+        lambda heights: compute_shaping(
+            cast_ons, waist_stitches, heights[1] - heights[0]
+        ),
+    )
+    max_waist_shaping_distance = top_height - begin_decreases_height
+
+    max_bust_shaping_distance, bust_shaping = _first_with_constraints_met(
+        bust_shaping_vert_dists,
+        lambda distance: compute_shaping(bust_stitches, waist_stitches, distance),
+    )
+
+    return (
+        begin_decreases_height,
+        max_waist_shaping_distance,
+        waist_shaping,
+        max_bust_shaping_distance,
+        bust_shaping,
+    )
+
+
+class BaseHalfBodyPieceMixin(DerivedValuesMixin, models.Model):
     """
     This model contains the fields and validation logic common to all
     half-body pieces: SweaterBack, SweaterFront, VestBack and VestFront.
@@ -794,58 +884,31 @@ class BaseHalfBodyPieceMixin(models.Model):
             bust_shaping_vert_dists.append(vert_dist)
 
         # Now that we have the possibilities, find the best viable one (if it
-        # exists). Specifically, loop until we find settings that work or
-        # we run out of options
-        waist_shaping = None
-        bust_shaping = None
-        while (
-            (waist_shaping is None)
-            or (bust_shaping is None)
-            or (
-                (not waist_shaping.constraints_met) and waist_shaping_vert_possibilities
+        # exists).
+        def compute_shaping(larger_stitches, smaller_stitches, max_vertical_height):
+            return self.compute_marker_shaping(
+                larger_stitches,
+                smaller_stitches,
+                max_vertical_height,
+                gauge,
+                allow_double_darts=allow_double_darts,
+                allow_triple_darts=allow_triple_darts,
             )
-            or ((not bust_shaping.constraints_met) and bust_shaping_vert_dists)
-        ):
-
-            # First, get a new shaping result for the waist, if
-            # we need it
-            if (waist_shaping is None) or (
-                (not waist_shaping.constraints_met) and waist_shaping_vert_possibilities
-            ):
-
-                (begin_decreases_height, top_height) = (
-                    waist_shaping_vert_possibilities.pop(0)
-                )
-
-                max_waist_shaping_distance = top_height - begin_decreases_height
-                if max_waist_shaping_distance < 0:
-                    continue
-
-                waist_shaping = self.compute_marker_shaping(
-                    cast_ons,
-                    waist_stitches,
-                    max_waist_shaping_distance,
-                    gauge,
-                    allow_double_darts=allow_double_darts,
-                    allow_triple_darts=allow_triple_darts,
-                )
 
-            else:
-                # Waists must be fine, so let's move on to the bust
-
-                max_bust_shaping_distance = bust_shaping_vert_dists.pop(0)
-
-                bust_shaping = self.compute_marker_shaping(
-                    bust_stitches,
-                    waist_stitches,
-                    max_bust_shaping_distance,
-                    gauge,
-                    allow_double_darts=allow_double_darts,
-                    allow_triple_darts=allow_triple_darts,
-                )
-
-            # endif
-        # endwhile
+        (
+            begin_decreases_height,
+            max_waist_shaping_distance,
+            waist_shaping,
+            max_bust_shaping_distance,
+            bust_shaping,
+        ) = _find_waist_and_bust_shaping(
+            compute_shaping,
+            cast_ons,
+            waist_stitches,
+            bust_stitches,
+            waist_shaping_vert_possibilities,
+            bust_shaping_vert_dists,
+        )
 
         # Now we need to check whether or not we acutally met the constraints
         # or just ran out of options. If the later, we need to let the waist
@@ -1541,7 +1604,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return x + 1
 
-    @property
+    @memoized_property
     def has_waist_decreases(self):
         """
         True if there are any waist decreases of any kind.
@@ -1685,7 +1748,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return x - 1
 
-    @property
+    @memoized_property
     def has_bust_increases(self):
         """
         True if there are any bust_increases of any kind.
@@ -2055,8 +2118,11 @@ class BaseHalfBodyPieceMixin(models.Model):
     #  {% if piece.row_count_method %}
     #      Blah blah blah {{ piece.row_count_method }}.
     #  {% endif %}
+    #
+    # The templates ask for these (and they ask each other) over and over, so
+    # they are memoized: see customfit.helpers.memo_helpers.
 
-    @property
+    @memoized_property
     def waist_hem_height_in_rows(self):
         """
         Returns row-count of last WS row in waist hem. Always defined and
@@ -2066,7 +2132,7 @@ class BaseHalfBodyPieceMixin(models.Model):
             self.waist_hem_height, parities["waist_hem_height"]
         )
 
-    @property
+    @memoized_property
     def begin_decreases_height_in_rows(self):
         """
         Returns row-count of WS row before first decrease row. Returns None
@@ -2079,7 +2145,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return None
 
-    @property
+    @memoized_property
     def decrease_marker_placement_height_in_rows(self):
         """
         Returns row-count of RS row before decrease marker-placement row (which is also the row
@@ -2090,7 +2156,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return None
 
-    @property
+    @memoized_property
     def begin_increases_height_in_rows(self):
         """
         Returns row-count of row before first decrease row. Returns None
@@ -2101,7 +2167,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return self._first_increase_row - 1
 
-    @property
+    @memoized_property
     def hem_to_waist_in_rows(self):
         """
         Returns row-count of last WS row at the top of the waist-straight.
@@ -2121,7 +2187,7 @@ class BaseHalfBodyPieceMixin(models.Model):
     ###################################################
     # Helper functions for later *_in_rows properties
 
-    @property
+    @memoized_property
     def _first_decrease_row(self):
         """
         Note: row-count of the first decrease row itself. Will be None if
@@ -2132,6 +2198,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return None
 
+    @memoized
     def _rows_in_decreases(self):
         """
         Note: includes both first *and* last decrease. Will be zero if there
@@ -2161,7 +2228,7 @@ class BaseHalfBodyPieceMixin(models.Model):
 
             return int(rows_in_decrease)
 
-    @property
+    @memoized_property
     def last_decrease_row(self):
         """
         Note: row-count of last decrease-row itself. Will be None if there
@@ -2173,7 +2240,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return None
 
-    @property
+    @memoized_property
     def _first_increase_row(self):
         """
         Note: row-count of the first increase_row itself. Will be None if
@@ -2190,6 +2257,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return None
 
+    @memoized
     def _rows_in_increases(self):
         """
         Note: includes both first and last increase row. Will be zero
@@ -2217,7 +2285,7 @@ class BaseHalfBodyPieceMixin(models.Model):
                 rows = 1
             return int(rows)
 
-    @property
+    @memoized_property
     def last_increase_row(self):
         """
         Note: Will be none if there are no increase, and will be the same
@@ -2246,7 +2314,7 @@ class BaseHalfBodyPieceMixin(models.Model):
     # More 'real' properties. These properties, however, depend on the parity
     # of one or more rows.
 
-    @property
+    @memoized_property
     def last_decrease_to_waist_in_rows(self):
         """
         Includes the rows between last decrease and first increase,
@@ -2258,6 +2326,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return None
 
+    @memoized
     def hem_to_neckline_in_rows(self, pre_neckline_row_parity):
         """
         Returns the row-count of the row BEFORE the first neckline-row given
@@ -2267,6 +2336,7 @@ class BaseHalfBodyPieceMixin(models.Model):
             self.hem_to_neckline_shaping_start, pre_neckline_row_parity
         )
 
+    @memoized
     def last_increase_to_neckline_in_rows(self, pre_neckline_row_parity):
         """
         Returns the number of rows between the last increase row and the first
@@ -2286,6 +2356,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return None
 
+    @memoized
     def last_decrease_to_neckline_in_rows(self, pre_neckline_row_parity):
         """
         Returns the number of rows between the last decrease row and the first
@@ -2305,6 +2376,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return None
 
+    @memoized
     def hem_to_armhole_in_rows(self, pre_armhole_parity):
         """
         Returns the row-count of the row just before the armhole-shaping.
@@ -2323,7 +2395,7 @@ class BaseHalfBodyPieceMixin(models.Model):
                 self.hem_to_armhole_shaping_start, pre_armhole_parity
             )
 
-    @property
+    @memoized_property
     def hem_to_first_armhole_in_rows(self):
         """
         Returns the row-count of the row just before the *first* armhole
@@ -2331,6 +2403,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         """
         return self._find_first_row_count(self.hem_to_armhole_in_rows)
 
+    @memoized
     def last_increase_to_armhole_in_rows(self, pre_armhole_parity):
         """
         Number of rows between last increase row and armhole bindoff-row
@@ -2345,7 +2418,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return None
 
-    @property
+    @memoized_property
     def last_increase_to_first_armhole_in_rows(self):
         """
         Number of rows between last increase row and first
@@ -2354,6 +2427,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         """
         return self._find_first_row_count(self.last_increase_to_armhole_in_rows)
 
+    @memoized
     def last_decrease_to_armhole_in_rows(self, pre_armhole_parity):
         """
         Number of rows between last decrease row and armhole bindoff-row
@@ -2368,7 +2442,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         else:
             return None
 
-    @property
+    @memoized_property
     def last_decrease_to_first_armhole_in_rows(self):
         """
         Number of rows between last decrease and first armhole bind-off
@@ -2377,6 +2451,7 @@ class BaseHalfBodyPieceMixin(models.Model):
         """
         return self._find_first_row_count(self.last_decrease_to_armhole_in_rows)
 
+    @memoized
     def hem_to_shoulders_in_rows(self, pre_shoulder_parity):
         """
         Row-count of row *before* first shoulder bindoffs.
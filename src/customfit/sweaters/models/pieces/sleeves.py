@@ -40,7 +40,7 @@ from ...helpers.secret_sauce import (
     minimum_sleeve_straights_below_cap,
 )
 from ..schematics import GradedSleeveSchematic, SleeveSchematic
-from .base_piece import GradedSweaterPiece, SweaterPiece
+from .base_piece import GradedSweaterPiece, SweaterPiece, _make_shaping_memo
 
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
@@ -74,6 +74,67 @@ ArmcapShapingResult = collections.namedtuple(
 )
 
 
+def _distribute_beads(stitches, rows):
+    """
+    Decrease `stitches` stitches over `rows` rows. Decreases to come in the
+    following order:
+
+    1) zero or more 'decrease every 6 rows',
+    2) zero or one 'decrease every 4th row',
+    3) zero or more 'decrease every other row', and
+    4) zero or more 'decrease every row'.
+
+    Furthermore, she'd like as many 'every other row' as possible. To find a
+    solution, imagine every stitch-decrease is a bead on a wire. At the
+    beginning, they are all on the left, representing an 'every row' decrease.
+    We add up the number of rows this represents. If this isn't enough, we move
+    one bead from the 'every row' slot into the 'every other row' slot. If
+    that's still not enough, we keep moving the beads, but we change it up a
+    little. We move one bead from the 'every other row' slot into the 'every
+    4th row' slot . Still not enough? We move *the same bead* again to the
+    right, representing 'every 6th row'. Still not enough? Do it again with the
+    next bead. Keep going until you get enough rows, or move all the beads over
+    (which is an error).
+
+    Every move adds one row (while there are 'every row' beads left) and then
+    two rows, so rather than moving the beads one at a time we can work out
+    directly where they end up: `stitches` to `2 * stitches` rows are covered by
+    the first kind of move, and `2 * stitches` to `6 * stitches` rows (in steps
+    of two) by the second.
+
+    Returns (one_count_beads, two_count_beads, four_count_beads, six_count_beads),
+    or None if there is no solution.
+    """
+    if 0 < stitches <= rows <= 2 * stitches:
+        moves = int(rows - stitches)
+        beads = (stitches - moves, moves, 0, 0)
+    elif 0 < stitches and 2 * stitches < rows <= 6 * stitches:
+        moves = int(rows - 2 * stitches) // 2
+        six_count_beads = moves // 2
+        four_count_beads = moves % 2
+        two_count_beads = int(stitches) - six_count_beads - four_count_beads
+        beads = (
+            stitches - stitches,
+            two_count_beads,
+            four_count_beads,
+            six_count_beads,
+        )
+    else:
+        # No beads to move
+        beads = (stitches, 0, 0, 0)
+
+    (one_count_beads, two_count_beads, four_count_beads, six_count_beads) = beads
+    row_count = sum(
+        [
+            one_count_beads,
+            two_count_beads * 2,
+            four_count_beads * 4,
+            six_count_beads * 6,
+        ]
+    )
+    return beads if row_count == rows else None
+
+
 def _bead_game(
     gauge,
     bicep_stitches,
@@ -139,61 +200,14 @@ def _bead_game(
                 armscye_c += 2
 
         # Okay, now we play the bead game. We need to add armscye_e_stitches
-        # stitches, over armscye_e_rows rows. (The number of rows should be
-        # even.) Decreses to come in the following order:
-        #
-        # 1) zero or more 'decrease every 6 rows',
-        # 2) zero or one 'decrease every 4th row',
-        # 3) zero or more 'decrease every other row', and
-        # 4) zero or more 'decrease every row'.
-        #
-        # Furthermore, she'd like as many 'every other row' as possible. To
-        # find a solution, imagine every stitch-decrease is a bead on a
-        # wire. At the beginning, they are all on the left, representing an
-        # 'every row' decrease. We add up the number of rows this
-        # represents. If this isn't enough, we move one bead from the 'every
-        # row' slot into the 'every other row' slot. If that's still not
-        # enough, we keep moving the beads, but we change it up a little. We
-        # move one bead from the 'every other row' slot into the 'every 4th
-        # row' slot . Still not enough? We move *the same bead* again to the
-        # right, representing 'every 6th row'. Still not enough? Do it again
-        # with the next bead. Keep going until you get enough rows, or move
-        # all the beads over (which is an error).
-
-        one_count_beads = armscye_e_stitches
-        two_count_beads = 0
-        four_count_beads = 0
-        six_count_beads = 0
-
-        while True:
-
-            # Okay, have we found a solution?
-            current_row_count = sum(
-                [
-                    one_count_beads,
-                    two_count_beads * 2,
-                    four_count_beads * 4,
-                    six_count_beads * 6,
-                ]
-            )
+        # stitches, over armscye_e_rows rows. See _distribute_beads.
 
-            if current_row_count == armscye_e_rows:
-                solution_found = True
-                break  # inner while
-            if not any(
-                [one_count_beads > 0, two_count_beads > 0, four_count_beads == 1]
-            ):
-                break
-            # There is a bead to move. Move it
-            if one_count_beads > 0:
-                one_count_beads -= 1
-                two_count_beads += 1
-            elif four_count_beads == 1:
-                four_count_beads = 0
-                six_count_beads += 1
-            else:
-                two_count_beads -= 1
-                four_count_beads = 1
+        beads = _distribute_beads(armscye_e_stitches, armscye_e_rows)
+        solution_found = beads is not None
+        if solution_found:
+            (one_count_beads, two_count_beads, four_count_beads, six_count_beads) = (
+                beads
+            )
 
         # Okay, either we found a solution, or we didn't. IF we found
         # a solution, all is well. The outer while loop will terminate.
@@ -228,9 +242,30 @@ def _bead_game(
     return return_me
 
 
+# Armcaps are computed for every sleeve (and every grade of a graded sleeve) and by
+# the armcap calculator, often for the same inputs. See shaping_cache_info().
+_armcap_memo = _make_shaping_memo("compute_armcap_shaping")
+
+
 def compute_armcap_shaping(
     gauge, armhole_x, armhole_y, armhole_circumference, bicep_stitches
 ):
+    # Keep the types in the key, as in _normalize_shaping_arg
+    key = (float(gauge.stitches), float(gauge.rows)) + tuple(
+        (type(value), value)
+        for value in [armhole_x, armhole_y, armhole_circumference, bicep_stitches]
+    )
+    return _armcap_memo.get_or_compute(
+        key,
+        lambda: _compute_armcap_shaping(
+            gauge, armhole_x, armhole_y, armhole_circumference, bicep_stitches
+        ),
+    )
+
+
+def _compute_armcap_shaping(
+    gauge, armhole_x, armhole_y, armhole_circumference, bicep_stitches
+):
 
     bicep_width = bicep_stitches / gauge.stitches
     armscye_c_targets = ARMSCYE_C_RATIO * bicep_width
@@ -1141,7 +1176,8 @@ class Sleeve(_BaseSleeve, SweaterPiece):
         p.schematic = schematic
 
         p._compute_values(sl_roundings, ease_tolerances, sweater_back, spec_source)
-        p.full_clean()
+        # The schematic may not have been saved yet
+        p.full_clean(exclude=["schematic"])
         return p
 
 
@@ -1162,7 +1198,12 @@ class GradedSleeve(_BaseSleeve, GradedSweaterPiece):
         p.sort_key = sweater_back.sort_key
 
         p._compute_values(sl_roundings, ease_tolerances, sweater_back, spec_source)
-        p.full_clean()
+        # Validating the foreign keys and uniqueness would mean querying the database,
+        # which we can't do from map_over_grades' worker processes. The pieces are
+        # validated in full before they are saved.
+        p.full_clean(
+            exclude=["schematic", "graded_pattern_pieces"], validate_unique=False
+        )
         return p
 
     def get_spec_source(self):
@@ -1,6 +1,6 @@
 import logging
 
-from django.db import models
+from django.db import models, transaction
 
 from customfit.helpers.math_helpers import (
     ROUND_ANY_DIRECTION,
@@ -10,6 +10,7 @@ from customfit.helpers.math_helpers import (
     is_even,
     round,
 )
+from customfit.helpers.parallel_helpers import map_over_grades
 from customfit.patterns.renderers import PieceList
 from customfit.pieces.models import AreaMixin, GradedPatternPieces, PatternPieces
 
@@ -24,8 +25,6 @@ from ...helpers.secret_sauce import rounding_directions as _rounding_directions
 from ..schematics import (
     GradedCardiganSleevedSchematic,
     GradedCardiganVestSchematic,
-    GradedSweaterFrontSchematic,
-    GradedVestFrontSchematic,
 )
 from .back_pieces import GradedSweaterBack, GradedVestBack, SweaterBack, VestBack
 from .front_pieces import (
@@ -586,105 +585,156 @@ class GradedSweaterPatternPieces(BaseSweaterPatternPieces, GradedPatternPieces):
         roundings = _rounding_directions[fit]
         ease_tolerances = _ease_tolerances[fit]
 
-        for sb_sch in graded_construction_schematic.sweater_back_schematics:
-            sb = GradedSweaterBack.make(return_me, sb_sch, roundings, ease_tolerances)
+        # The grades are independent of each other until they are saved, so we first
+        # compute all of them (possibly in parallel: see map_over_grades) and only then
+        # save them. We gather all the schematics up front, and make sure that they carry
+        # everything the computation needs with them, so that the computation itself
+        # need not go back to the database.
+        def _by_grade(schematics):
+            return_dict = {}
+            for sch in schematics.select_related("gp_grade"):
+                sch.construction_schematic = graded_construction_schematic
+                return_dict[sch.gp_grade.grade_id] = sch
+            return return_dict
+
+        sweater_front_schematics = _by_grade(
+            graded_construction_schematic.sweater_front_schematics
+        )
+        cardigan_sleeved_schematics = _by_grade(
+            graded_construction_schematic.cardigan_sleeved_schematics
+        )
+        sleeve_schematics = _by_grade(graded_construction_schematic.sleeve_schematics)
+        vest_front_schematics = _by_grade(
+            graded_construction_schematic.vest_front_schematics
+        )
+        cardigan_vest_schematics = _by_grade(
+            graded_construction_schematic.cardigan_vest_schematics
+        )
 
-            try:
-                sf_sch = graded_construction_schematic.sweater_front_schematics.get(
-                    GradedSweaterFrontSchematic___gp_grade__grade=sb_sch.gp_grade.grade
-                )
-                front_piece = GradedSweaterFront.make(
-                    sf_sch, sb, roundings, ease_tolerances
+        grade_args = []
+        for sb_sch in _by_grade(
+            graded_construction_schematic.sweater_back_schematics
+        ).values():
+            grade_id = sb_sch.gp_grade.grade_id
+            grade_args.append(
+                (
+                    _make_sleeved_grade,
+                    (
+                        return_me,
+                        sb_sch,
+                        sweater_front_schematics.get(grade_id),
+                        cardigan_sleeved_schematics.get(grade_id),
+                        sleeve_schematics[grade_id],
+                        roundings,
+                        ease_tolerances,
+                        spec_source,
+                    ),
                 )
-                bust_circ = sb.actual_bust + front_piece.actual_bust
-            except GradedSweaterFrontSchematic.DoesNotExist:
-                cs_sch = graded_construction_schematic.cardigan_sleeved_schematics.get(
-                    GradedCardiganSleevedSchematic___gp_grade__grade=sb_sch.gp_grade.grade
-                )
-                front_piece = GradedCardiganSleeved.make(
-                    cs_sch, sb, roundings, ease_tolerances
-                )
-                bust_circ = sb.actual_bust + front_piece.total_front_finished_bust
-
-            # If you ever change the computation of sort_key, change GradedHBPM.finished_full_bust
-            # and GradedCardgian.finsihed_full_bust
-            sb.sort_key = bust_circ
-            sb.full_clean()
-            sb.save()
-            front_piece.sort_key = bust_circ
-            front_piece.full_clean()
-            front_piece.save()
-
-            # Must come after the front-piece creation and sort-key re-computation so that
-            # sleeves inherit the final sort-key from the backs
-            sl_sch = graded_construction_schematic.sleeve_schematics.get(
-                GradedSleeveSchematic___gp_grade__grade=sb_sch.gp_grade.grade
             )
-            sleeve = GradedSleeve.make(
-                sl_sch, sb, roundings, ease_tolerances, spec_source
+        for vb_sch in _by_grade(
+            graded_construction_schematic.vest_back_schematics
+        ).values():
+            grade_id = vb_sch.gp_grade.grade_id
+            grade_args.append(
+                (
+                    _make_vest_grade,
+                    (
+                        return_me,
+                        vb_sch,
+                        vest_front_schematics.get(grade_id),
+                        cardigan_vest_schematics.get(grade_id),
+                        roundings,
+                        ease_tolerances,
+                    ),
+                )
             )
-            sleeve.full_clean()
-            sleeve.save()
 
-        for vb_sch in graded_construction_schematic.vest_back_schematics:
-            vb = GradedVestBack.make(return_me, vb_sch, roundings, ease_tolerances)
-
-            try:
-                vf = graded_construction_schematic.vest_front_schematics.get(
-                    GradedVestFrontSchematic___gp_grade__grade=vb_sch.gp_grade.grade
-                )
-                front_piece = GradedVestFront.make(vf, vb, roundings, ease_tolerances)
-                bust_circ = vb.actual_bust + front_piece.actual_bust
-            except GradedVestFrontSchematic.DoesNotExist:
-                cv = graded_construction_schematic.cardigan_vest_schematics.get(
-                    GradedCardiganVestSchematic___gp_grade__grade=vb_sch.gp_grade.grade
-                )
-                front_piece = GradedCardiganVest.make(
-                    cv, vb, roundings, ease_tolerances
-                )
-                bust_circ = vb.actual_bust + front_piece.total_front_finished_bust
+        grades = map_over_grades(_make_grade, grade_args)
 
-            # If you ever change the computation of sort_key, change GradedHBPM.finished_full_bust
-            # and GradedCardgian.finsihed_full_bust
-            vb.sort_key = bust_circ
-            vb.full_clean()
-            vb.save()
-            front_piece.sort_key = bust_circ
-            front_piece.full_clean()
-            front_piece.save()
+        with transaction.atomic():
+            for grade_pieces in grades:
+                for piece in grade_pieces:
+                    if piece is not None:
+                        # Re-attach to *this* GradedPatternPieces (rather than to a copy
+                        # made by a worker process) before saving
+                        piece.graded_pattern_pieces = return_me
+                        piece.full_clean()
+                        piece.save()
 
         return return_me
 
+    # Every kind of piece a GradedSweaterPatternPieces can hold, keyed by the name used
+    # for it in the grade-dicts of _make_grades()
+    _piece_classes = [
+        ("sweater_back", GradedSweaterBack),
+        ("vest_back", GradedVestBack),
+        ("sweater_front", GradedSweaterFront),
+        ("vest_front", GradedVestFront),
+        ("sleeve", GradedSleeve),
+        ("cardigan_vest", GradedCardiganVest),
+        ("cardigan_sleeved", GradedCardiganSleeved),
+    ]
+
+    # Filled in by get_pieces_by_type()
+    _pieces_by_type_cache = None
+
+    def refresh_from_db(self, *args, **kwargs):
+        self._pieces_by_type_cache = None
+        super(GradedSweaterPatternPieces, self).refresh_from_db(*args, **kwargs)
+
+    def get_pieces_by_type(self):
+        """
+        Bulk-load every piece of this GradedSweaterPatternPieces. Returns a dict mapping
+        each name in _piece_classes to a list of pieces of that type, sorted by sort_key
+        (and so by grade). This costs one query per piece-type no matter how many grades
+        there are, and the result is cached on this instance. Each piece comes back with
+        its schematic and with graded_pattern_pieces pointing at this very instance, so
+        that the renderers can walk them without going back to the database.
+        """
+        if self._pieces_by_type_cache is None:
+            return_me = {}
+            for name, piece_class in self._piece_classes:
+                pieces = list(
+                    piece_class.objects.filter(graded_pattern_pieces=self)
+                    .select_related("schematic__gp_grade")
+                    .all()
+                )
+                for piece in pieces:
+                    piece.graded_pattern_pieces = self
+                return_me[name] = pieces
+            self._pieces_by_type_cache = return_me
+        return self._pieces_by_type_cache
+
     # For the following: no need to sort-- GradedPatternPiece's are automatically
     # sorted by sort_key
 
     @property
     def sweater_backs(self):
-        return GradedSweaterBack.objects.filter(graded_pattern_pieces=self).all()
+        return self.get_pieces_by_type()["sweater_back"]
 
     @property
     def sweater_fronts(self):
-        return GradedSweaterFront.objects.filter(graded_pattern_pieces=self).all()
+        return self.get_pieces_by_type()["sweater_front"]
 
     @property
     def vest_backs(self):
-        return GradedVestBack.objects.filter(graded_pattern_pieces=self).all()
+        return self.get_pieces_by_type()["vest_back"]
 
     @property
     def vest_fronts(self):
-        return GradedVestFront.objects.filter(graded_pattern_pieces=self).all()
+        return self.get_pieces_by_type()["vest_front"]
 
     @property
     def sleeves(self):
-        return GradedSleeve.objects.filter(graded_pattern_pieces=self).all()
+        return self.get_pieces_by_type()["sleeve"]
 
     @property
     def cardigan_vests(self):
-        return GradedCardiganVest.objects.filter(graded_pattern_pieces=self).all()
+        return self.get_pieces_by_type()["cardigan_vest"]
 
     @property
     def cardigan_sleeveds(self):
-        return GradedCardiganSleeved.objects.filter(graded_pattern_pieces=self).all()
+        return self.get_pieces_by_type()["cardigan_sleeved"]
 
     def get_back_pieces(self):
         if self.sweater_backs:
@@ -711,61 +761,24 @@ class GradedSweaterPatternPieces(BaseSweaterPatternPieces, GradedPatternPieces):
         return grades
 
     def _make_grades(self):
-        if self.sweater_backs:
-            sorted_pre_dicts = [
-                (sb, {"sweater_back": sb, "vest_back": None})
-                for sb in self.sweater_backs
-            ]
-        else:
-            sorted_pre_dicts = [
-                (vb, {"sweater_back": None, "vest_back": vb}) for vb in self.vest_backs
-            ]
+        # Group the (bulk-loaded) pieces by grade. All pieces of a grade share the
+        # same GradedGarmentParametersGrade, so we can use that to match them up.
+        pieces_by_grade = {}
+        for name, pieces in self.get_pieces_by_type().items():
+            for piece in pieces:
+                grade_dict = pieces_by_grade.setdefault(
+                    piece.schematic.gp_grade_id,
+                    {n: None for n, _ in self._piece_classes},
+                )
+                grade_dict[name] = piece
+
+        back_pieces = self.sweater_backs if self.sweater_backs else self.vest_backs
 
         return_me = []
 
-        for back_piece, new_dict in sorted_pre_dicts:
-
-            grade = back_piece.schematic.gp_grade.grade
-
-            try:
-                sf = GradedSweaterFront.objects.filter(
-                    graded_pattern_pieces=self, schematic__gp_grade__grade=grade
-                ).get()
-                new_dict["sweater_front"] = sf
-            except GradedSweaterFront.DoesNotExist:
-                new_dict["sweater_front"] = None
-
-            try:
-                vf = GradedVestFront.objects.filter(
-                    graded_pattern_pieces=self, schematic__gp_grade__grade=grade
-                ).get()
-                new_dict["vest_front"] = vf
-            except GradedVestFront.DoesNotExist:
-                new_dict["vest_front"] = None
-
-            try:
-                sl = GradedSleeve.objects.filter(
-                    graded_pattern_pieces=self, schematic__gp_grade__grade=grade
-                ).get()
-                new_dict["sleeve"] = sl
-            except GradedSleeve.DoesNotExist:
-                new_dict["sleeve"] = None
-
-            try:
-                cv = GradedCardiganVest.objects.filter(
-                    graded_pattern_pieces=self, schematic__gp_grade__grade=grade
-                ).get()
-                new_dict["cardigan_vest"] = cv
-            except GradedCardiganVest.DoesNotExist:
-                new_dict["cardigan_vest"] = None
-
-            try:
-                cs = GradedCardiganSleeved.objects.filter(
-                    graded_pattern_pieces=self, schematic__gp_grade__grade=grade
-                ).get()
-                new_dict["cardigan_sleeved"] = cs
-            except GradedCardiganSleeved.DoesNotExist:
-                new_dict["cardigan_sleeved"] = None
+        for back_piece in back_pieces:
+
+            new_dict = pieces_by_grade[back_piece.schematic.gp_grade_id]
 
             # santiy-check the grades
             assert (
@@ -912,3 +925,65 @@ class GradedSweaterPatternPieces(BaseSweaterPatternPieces, GradedPatternPieces):
     #   * vest back, front
     #   * sweater back, cardi_sleeved, sleeve
     #   * vest back, cardi vest front
+
+
+# Per-grade computation for GradedSweaterPatternPieces.make_from_schematic(). These
+# are module-level functions so that they can be sent to worker processes. They compute,
+# but do not save, the pieces for a single grade.
+
+
+def _make_grade(grade_function, args):
+    return grade_function(*args)
+
+
+def _make_sleeved_grade(
+    graded_pattern_pieces,
+    sb_sch,
+    sf_sch,
+    cs_sch,
+    sl_sch,
+    roundings,
+    ease_tolerances,
+    spec_source,
+):
+    sb = GradedSweaterBack.make(
+        graded_pattern_pieces, sb_sch, roundings, ease_tolerances
+    )
+
+    if sf_sch is not None:
+        front_piece = GradedSweaterFront.make(sf_sch, sb, roundings, ease_tolerances)
+        bust_circ = sb.actual_bust + front_piece.actual_bust
+    else:
+        front_piece = GradedCardiganSleeved.make(cs_sch, sb, roundings, ease_tolerances)
+        bust_circ = sb.actual_bust + front_piece.total_front_finished_bust
+
+    # If you ever change the computation of sort_key, change GradedHBPM.finished_full_bust
+    # and GradedCardgian.finsihed_full_bust
+    sb.sort_key = bust_circ
+    front_piece.sort_key = bust_circ
+
+    # Must come after the front-piece creation and sort-key re-computation so that
+    # sleeves inherit the final sort-key from the backs
+    sleeve = GradedSleeve.make(sl_sch, sb, roundings, ease_tolerances, spec_source)
+
+    return (sb, front_piece, sleeve)
+
+
+def _make_vest_grade(
+    graded_pattern_pieces, vb_sch, vf_sch, cv_sch, roundings, ease_tolerances
+):
+    vb = GradedVestBack.make(graded_pattern_pieces, vb_sch, roundings, ease_tolerances)
+
+    if vf_sch is not None:
+        front_piece = GradedVestFront.make(vf_sch, vb, roundings, ease_tolerances)
+        bust_circ = vb.actual_bust + front_piece.actual_bust
+    else:
+        front_piece = GradedCardiganVest.make(cv_sch, vb, roundings, ease_tolerances)
+        bust_circ = vb.actual_bust + front_piece.total_front_finished_bust
+
+    # If you ever change the computation of sort_key, change GradedHBPM.finished_full_bust
+    # and GradedCardgian.finsihed_full_bust
+    vb.sort_key = bust_circ
+    front_piece.sort_key = bust_circ
+
+    return (vb, front_piece, None)
@@ -4,8 +4,8 @@ import os.path
 
 import django.template
 import django.utils
-from django.template import Template
 
+from customfit.helpers.template_helpers import get_db_template
 from customfit.patterns.renderers import (
     Element,
     FinishingSubSection,
@@ -116,7 +116,7 @@ class FinishingRenderer(InstructionSection):
                     extra_end_instructions += stitch.extra_finishing_instructions
 
         if spec_source.get_extra_finishing_template():
-            template = Template(spec_source.get_extra_finishing_template().content)
+            template = get_db_template(spec_source.get_extra_finishing_template())
             html = render_template(template, end_context)
             extra_end_instructions += html
 
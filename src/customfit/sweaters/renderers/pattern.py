@@ -191,14 +191,16 @@ class SweaterPatternCachePrefillRenderer(PatternRendererBase):
 class GradedSweaterPatternRendererWebFull(PatternRendererBase):
 
     def _make_instruction_piece_list(self, pattern):
+        # Load all the pieces of all the grades at once, rather than piece by piece
+        pieces_by_type = pattern.pieces.get_pieces_by_type()
         maybe_piece_sections = [
-            (pattern.pieces.sweater_backs, SweaterbackRenderer),
-            (pattern.pieces.vest_backs, VestbackRenderer),
-            (pattern.pieces.sweater_fronts, SweaterfrontRenderer),
-            (pattern.pieces.vest_fronts, VestfrontRenderer),
-            (pattern.pieces.cardigan_vests, CardiganVestRenderer),
-            (pattern.pieces.cardigan_sleeveds, CardiganSleevedRenderer),
-            (pattern.pieces.sleeves, SleeveRenderer),
+            (pieces_by_type["sweater_back"], SweaterbackRenderer),
+            (pieces_by_type["vest_back"], VestbackRenderer),
+            (pieces_by_type["sweater_front"], SweaterfrontRenderer),
+            (pieces_by_type["vest_front"], VestfrontRenderer),
+            (pieces_by_type["cardigan_vest"], CardiganVestRenderer),
+            (pieces_by_type["cardigan_sleeved"], CardiganSleevedRenderer),
+            (pieces_by_type["sleeve"], SleeveRenderer),
         ]
         real_piece_sections = [
             (PieceList(pieces), renderer)
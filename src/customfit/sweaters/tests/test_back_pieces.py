@@ -1,3 +1,5 @@
+from unittest import mock
+
 import django.test
 
 from customfit.bodies.factories import BodyFactory, get_csv_body
@@ -355,6 +357,21 @@ class SweaterBackTest(django.test.TestCase):
         self.assertFalse(piece.is_cardigan_sleeved)
         self.assertFalse(piece.is_cardigan_vest)
 
+    def test_row_counts_memoized(self):
+        sb = create_sweater_back()
+        self.assertEqual(sb.hem_to_armhole_in_rows(RS), 113)
+        self.assertEqual(sb.last_decrease_row, 45)
+        with mock.patch.object(
+            SweaterBack, "_height_to_row_count", side_effect=AssertionError
+        ):
+            self.assertEqual(sb.hem_to_armhole_in_rows(RS), 113)
+            self.assertEqual(sb.last_decrease_row, 45)
+
+        # Assigning a field forgets them
+        sb.hem_to_armhole_shaping_start += 1
+        self.assertEqual(sb.hem_to_armhole_in_rows(RS), 121)
+        self.assertEqual(sb.last_decrease_row, 45)
+
     def test_sweater_back_corner_case1(self):
         """
         A weird corner case in which we get a triple-dart row in waist and
@@ -0,0 +1,130 @@
+import copy
+import io
+import json
+import os
+import tempfile
+import unittest.mock as mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..benchmark import (
+    GRADED,
+    INDIVIDUAL,
+    STAGES,
+    compare_results,
+    make_cases,
+    run_benchmark,
+)
+from ..helpers import sweater_design_choices as SDC
+from ..models import SweaterPattern
+
+
+class BenchmarkTest(TestCase):
+
+    def _one_case(self, kind):
+        return make_cases(
+            kinds=[kind],
+            silhouettes=[SDC.SILHOUETTE_HOURGLASS],
+            constructions=[SDC.CONSTRUCTION_SET_IN_SLEEVE],
+            necklines=[SDC.NECK_VEE],
+            fits=["average"],
+        )
+
+    def test_make_cases(self):
+        self.assertEqual(len(make_cases()), 2 * 5 * 2 * 4 * 4)
+        cases = make_cases(kinds=[GRADED], fits=["tight"])
+        self.assertEqual(len(cases), 5 * 2 * 4)
+        self.assertTrue(all(case.kind == GRADED for case in cases))
+
+    def test_individual(self):
+        results = run_benchmark(self._one_case(INDIVIDUAL), repeat=2, warmup=0)
+        [case] = results["cases"]
+        self.assertIsNone(case["error"])
+        self.assertEqual(
+            case["id"], "individual/SILHOUETTE_HOURGLASS/setinsleeve/NECK_VEE/average"
+        )
+        self.assertEqual(list(case["stages"]), STAGES)
+        for stage in case["stages"].values():
+            self.assertEqual(len(stage["runs"]), 2)
+            self.assertGreater(stage["seconds"], 0)
+        self.assertGreater(case["stages"]["igp"]["queries"], 0)
+        # Nothing is left behind
+        self.assertFalse(SweaterPattern.objects.exists())
+        # and the results are JSON
+        json.dumps(results)
+
+    def test_shaping_memos_cleared_before_each_run(self):
+        with mock.patch(
+            "customfit.sweaters.benchmark.clear_shaping_caches"
+        ) as clear_shaping_caches:
+            run_benchmark(self._one_case(INDIVIDUAL), repeat=2, warmup=0)
+        self.assertEqual(clear_shaping_caches.call_count, 2)
+
+    def test_graded(self):
+        results = run_benchmark(self._one_case(GRADED), repeat=1, warmup=0)
+        [case] = results["cases"]
+        self.assertIsNone(case["error"])
+        self.assertEqual(list(case["stages"]), STAGES[:-1])
+
+    def test_compare_results(self):
+        baseline = {
+            "cases": [
+                {
+                    "id": "case",
+                    "error": None,
+                    "stages": {
+                        "igp": {"seconds": 0.1, "queries": 10},
+                        "pdf": {"seconds": 1.0, "queries": 5},
+                    },
+                }
+            ]
+        }
+        self.assertEqual(compare_results(baseline, baseline), [])
+
+        current = copy.deepcopy(baseline)
+        current["cases"][0]["stages"]["igp"]["queries"] = 11
+        current["cases"][0]["stages"]["pdf"]["seconds"] = 1.5
+        self.assertEqual(
+            compare_results(baseline, current),
+            [
+                "case: igp made 11 queries (was 10)",
+                "case: pdf took 1.5000s (was 1.0000s)",
+            ],
+        )
+        self.assertEqual(len(compare_results(baseline, current, threshold=0.6)), 1)
+
+        current = copy.deepcopy(baseline)
+        current["cases"][0].update({"error": "ValueError()", "stages": {}})
+        self.assertEqual(
+            compare_results(baseline, current), ["case: now fails with ValueError()"]
+        )
+
+    def test_command(self):
+        (fd, path) = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        options = {
+            "kind": [INDIVIDUAL],
+            "silhouette": [SDC.SILHOUETTE_STRAIGHT],
+            "construction": [SDC.CONSTRUCTION_DROP_SHOULDER],
+            "neckline": [SDC.NECK_CREW],
+            "fit": ["relaxed"],
+            "repeat": 1,
+            "stdout": io.StringIO(),
+            "stderr": io.StringIO(),
+        }
+        call_command("benchmark_pipeline", output=path, **options)
+        with open(path) as f:
+            results = json.load(f)
+        [case] = results["cases"]
+        self.assertIsNone(case["error"])
+
+        # Compare against a baseline that made no queries at all
+        for stage in case["stages"].values():
+            stage["queries"] = 0
+        with open(path, "w") as f:
+            json.dump(results, f)
+        with self.assertRaises(CommandError):
+            call_command("benchmark_pipeline", compare=path, **options)
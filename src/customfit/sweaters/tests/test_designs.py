@@ -10,6 +10,8 @@ from customfit.helpers.math_helpers import CompoundResult
 from customfit.stitches.factories import StitchFactory
 from customfit.stitches.models import Stitch
 from customfit.swatches.factories import GaugeFactory, SwatchFactory
+from customfit.swatches.models import Swatch
+from customfit.userauth.factories import UserFactory
 
 from ..factories import (
     AdditionalBackElementFactory,
@@ -579,6 +581,25 @@ class SweaterDesignBaseMethodTests(TestCase):
         with mock.patch.object(Stitch, "is_compatible", return_value=False):
             self.assertFalse(des.compatible_swatch(swatch))
 
+    def test_compatible_swatches(self):
+        user = UserFactory()
+        plain_swatch = SwatchFactory(user=user)
+        repeats_swatch = SwatchFactory(
+            user=user, use_repeats=True, stitches_per_repeat=7, additional_stitches=3
+        )
+        swatches = Swatch.objects.filter(user=user)
+
+        des = SweaterDesignFactory()
+        self.assertEqual(
+            set(des.compatible_swatches(swatches)), {plain_swatch, repeats_swatch}
+        )
+
+        des = SweaterDesignFactory(
+            sleeve_allover_stitch=StitchFactory(repeats_x_mod=1, repeats_mod_y=4)
+        )
+        self.assertEqual(list(des.compatible_swatches(swatches)), [plain_swatch])
+        self.assertFalse(des.compatible_swatch(repeats_swatch))
+
     def test_stitches_used(self):
         d_ps = SweaterDesignFactory(
             garment_type=SDC.PULLOVER_SLEEVED,
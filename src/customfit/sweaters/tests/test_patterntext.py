@@ -931,9 +931,11 @@ class TestPatterntextViewCorrectness(PatterntextTestCase):
                 back_cable_extra_stitches=0,
                 sleeve_cable_extra_stitches=0,
             )
-        self.assertContains(response, "Back cable stitch notes")
-        self.assertContains(response, "Front cable stitch notes")
-        self.assertContains(response, "Sleeve cable stitch notes")
+        # The patterntext is streamed, so the content can only be read once
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("Back cable stitch notes", content)
+        self.assertIn("Front cable stitch notes", content)
+        self.assertIn("Sleeve cable stitch notes", content)
 
 
 class TestSweaterBackPieceElements(TestCase):
@@ -3092,16 +3094,17 @@ lorem ipsem
         response = self.client.get(pattern_url)
         self.assertEqual(response.status_code, 200)
 
-        # Unfortunately, assertContains can only operate on a single HTML
-        # element when html=True is being used. Thus, there is no way to
-        # look for all of the entire notes_text at once and we need to
-        # break it up.
+        # Unfortunately, assertInHTML can only operate on a single HTML
+        # element. Thus, there is no way to look for all of the entire
+        # notes_text at once and we need to break it up. (And the patterntext
+        # is streamed, so the content can only be read once.)
+        content = b"".join(response.streaming_content).decode()
         goal_html1 = "<h3>Heading</h3>"
         goal_html2 = "<p>lorem ipsem</p>"
         goal_html3 = "<ul><li>Item 1</li><li>Item 2</li></ul>"
-        self.assertContains(response, goal_html1, html=True)
-        self.assertContains(response, goal_html2, html=True)
-        self.assertContains(response, goal_html3, html=True)
+        self.assertInHTML(goal_html1, content)
+        self.assertInHTML(goal_html2, content)
+        self.assertInHTML(goal_html3, content)
 
 
 class GradedPatterntextTests(TestCase):
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from customfit.swatches.factories import GaugeFactory
 
@@ -27,6 +27,8 @@ from ..models import (
     SweaterPiece,
     TorsoShapingResult,
 )
+from ..models.pieces.base_piece import clear_shaping_caches, shaping_cache_info
+from ..models.pieces.half_body_piece_mixin import _find_waist_and_bust_shaping
 
 
 class EdgeShapingResultTests(TestCase):
@@ -1635,6 +1637,214 @@ class TorsoShapingResultTests(TestCase):
             )
 
 
+class ShapingMemoTests(TestCase):
+
+    def setUp(self):
+        clear_shaping_caches()
+
+    def tearDown(self):
+        clear_shaping_caches()
+
+    def test_torso_shaping_memoized(self):
+        gauge = GaugeFactory(rows=4)
+        sr1 = TorsoShapingResult.compute_shaping(20, 10, 10, gauge)
+        # Same inputs, with the defaults spelled out, and an equal gauge
+        sr2 = TorsoShapingResult.compute_shaping(
+            20,
+            10,
+            10,
+            GaugeFactory(rows=4),
+            allow_double_darts=True,
+            allow_triple_darts=True,
+        )
+        info = shaping_cache_info()["TorsoShapingResult.compute_shaping"]
+        self.assertEqual((info.hits, info.misses), (1, 1))
+        self.assertIsNot(sr1, sr2)
+        self.assertEqual(sr1.__dict__, sr2.__dict__)
+
+        # A different gauge is a different computation
+        TorsoShapingResult.compute_shaping(20, 10, 10, GaugeFactory(rows=5))
+        info = shaping_cache_info()["TorsoShapingResult.compute_shaping"]
+        self.assertEqual((info.hits, info.misses), (1, 2))
+
+    def test_results_are_copies(self):
+        gauge = GaugeFactory(rows=4)
+        sr1 = EdgeShapingResult.compute_shaping_full(20, 10, 10, gauge)
+        sr1.num_standard_shaping_rows = 100
+        sr1.shaping_vertical_play = None
+        sr2 = EdgeShapingResult.compute_shaping_full(20, 10, 10, gauge)
+        self.assertEqual(sr2.num_standard_shaping_rows, 5)
+        self.assertIsNotNone(sr2.shaping_vertical_play)
+        # compute_shaping_full adds vertical play to what compute_shaping_partial
+        # gives it. That must not leak into the partial cache.
+        partial = EdgeShapingResult.compute_shaping_partial(20, 10, 40)
+        self.assertIsNone(partial.shaping_vertical_play)
+
+    def test_compound_shaping_memoized(self):
+        gauge = GaugeFactory(rows=4)
+        sr1 = EdgeCompoundShapingResult.compute_shaping(20, 10, 9.5, gauge)
+        sr2 = EdgeCompoundShapingResult.compute_shaping(20, 10, 9.5, gauge)
+        self.assertEqual(sr1.__dict__, sr2.__dict__)
+        info = shaping_cache_info()["EdgeCompoundShapingResult.compute_shaping"]
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_errors_not_memoized(self):
+        gauge = GaugeFactory(rows=4)
+        for _ in range(2):
+            with self.assertRaises(AssertionError):
+                TorsoShapingResult.compute_shaping(14, 10, -1, gauge)
+        info = shaping_cache_info()["TorsoShapingResult.compute_shaping"]
+        self.assertEqual((info.hits, info.misses, info.currsize), (0, 2, 0))
+
+
+def _linear_find_waist_and_bust_shaping(
+    compute_shaping,
+    cast_ons,
+    waist_stitches,
+    bust_stitches,
+    waist_shaping_vert_possibilities,
+    bust_shaping_vert_dists,
+):
+    # The original search from _compute_waist_and_bust_shaping_hourglass, which tries
+    # each candidate in turn. Kept as the reference for _find_waist_and_bust_shaping.
+    waist_shaping_vert_possibilities = list(waist_shaping_vert_possibilities)
+    bust_shaping_vert_dists = list(bust_shaping_vert_dists)
+    waist_shaping = None
+    bust_shaping = None
+    while (
+        (waist_shaping is None)
+        or (bust_shaping is None)
+        or ((not waist_shaping.constraints_met) and waist_shaping_vert_possibilities)
+        or ((not bust_shaping.constraints_met) and bust_shaping_vert_dists)
+    ):
+        if (waist_shaping is None) or (
+            (not waist_shaping.constraints_met) and waist_shaping_vert_possibilities
+        ):
+            (begin_decreases_height, top_height) = waist_shaping_vert_possibilities.pop(
+                0
+            )
+            max_waist_shaping_distance = top_height - begin_decreases_height
+            if max_waist_shaping_distance < 0:
+                continue
+            waist_shaping = compute_shaping(
+                cast_ons, waist_stitches, max_waist_shaping_distance
+            )
+        else:
+            max_bust_shaping_distance = bust_shaping_vert_dists.pop(0)
+            bust_shaping = compute_shaping(
+                bust_stitches, waist_stitches, max_bust_shaping_distance
+            )
+
+    return (
+        begin_decreases_height,
+        max_waist_shaping_distance,
+        waist_shaping,
+        max_bust_shaping_distance,
+        bust_shaping,
+    )
+
+
+class WaistAndBustShapingSearchTests(TestCase):
+    """
+    Regression harness: the bisecting search must pick exactly the shapings that
+    the original linear search did, across a grid of body and gauge inputs.
+    """
+
+    def _candidates(self, hem_height, waist_height, armpit_height, below_armpit, rows):
+        # Mirrors the candidate lists built in _compute_waist_and_bust_shaping_hourglass
+        waist_possibilities = [
+            (hem_height + 0.5, waist_height - 0.5),
+            (hem_height, waist_height - 0.5),
+            (hem_height, waist_height),
+        ]
+        if hem_height > 0.5:
+            waist_possibilities.append((0.5, waist_height))
+        bust_dists = []
+        while below_armpit >= 0:
+            bust_dists.append(
+                armpit_height - (waist_height + 0.5) - below_armpit + 3 / rows
+            )
+            below_armpit -= 0.5
+        return (waist_possibilities, bust_dists)
+
+    def test_matches_linear_search(self):
+        cases = 0
+        for rows in [3, 5.25, 7, 10]:
+            gauge = GaugeFactory(rows=rows)
+            for allow_darts in [True, False]:
+
+                def compute_shaping(larger, smaller, height):
+                    return TorsoShapingResult.compute_shaping(
+                        larger,
+                        smaller,
+                        height,
+                        gauge,
+                        allow_double_darts=allow_darts,
+                        allow_triple_darts=allow_darts,
+                    )
+
+                for hem_height in [0.5, 1, 3]:
+                    for waist_height in [4, 7, 10]:
+                        for armpit_height in [waist_height + d for d in [5, 8, 11]]:
+                            for below_armpit in [1.5, 3]:
+                                (waist_poss, bust_dists) = self._candidates(
+                                    hem_height,
+                                    waist_height,
+                                    armpit_height,
+                                    below_armpit,
+                                    rows,
+                                )
+                                for cast_ons in [80, 96, 120, 150]:
+                                    for bust_stitches in [80, 100, 130, 170]:
+                                        args = (
+                                            compute_shaping,
+                                            cast_ons,
+                                            80,
+                                            bust_stitches,
+                                            waist_poss,
+                                            bust_dists,
+                                        )
+                                        expected = _linear_find_waist_and_bust_shaping(
+                                            *args
+                                        )
+                                        actual = _find_waist_and_bust_shaping(*args)
+                                        msg = (rows, allow_darts, hem_height,
+                                               waist_height, armpit_height,
+                                               below_armpit, cast_ons,
+                                               bust_stitches)
+                                        self.assertEqual(
+                                            expected[:2] + (expected[3],),
+                                            actual[:2] + (actual[3],),
+                                            msg,
+                                        )
+                                        self.assertEqual(
+                                            expected[2].__dict__,
+                                            actual[2].__dict__,
+                                            msg,
+                                        )
+                                        self.assertEqual(
+                                            expected[4].__dict__,
+                                            actual[4].__dict__,
+                                            msg,
+                                        )
+                                        cases += 1
+        self.assertEqual(cases, 4 * 2 * 3 * 3 * 3 * 2 * 4 * 4)
+
+    def test_unmet_constraints_use_last_candidate(self):
+        gauge = GaugeFactory(rows=4)
+
+        def compute_shaping(larger, smaller, height):
+            return TorsoShapingResult.compute_shaping(larger, smaller, height, gauge)
+
+        result = _find_waist_and_bust_shaping(
+            compute_shaping, 300, 80, 300, [(1, 2), (1, 3)], [1, 2, 3]
+        )
+        (begin_height, waist_dist, waist_shaping, bust_dist, bust_shaping) = result
+        self.assertEqual((begin_height, waist_dist, bust_dist), (1, 2, 3))
+        self.assertFalse(waist_shaping.constraints_met)
+        self.assertFalse(bust_shaping.constraints_met)
+
+
 class SweaterPieceTests(TestCase):
 
     def test_compute_marker_shaping(self):
@@ -2662,9 +2872,65 @@ class GradedSweaterPatternPiecesTest(TestCase):
             self.assertEqual(front.sort_key, bust)
             self.assertEqual(back.sort_key, bust)
 
+    def test_make_in_parallel(self):
+        pspec = GradedCardiganPatternSpecFactory()
+        serial_gpp = GradedSweaterPatternPieces.make_from_schematic(
+            GradedSweaterSchematicFactory.from_pspec(pspec)
+        )
+        gcs = GradedSweaterSchematicFactory.from_pspec(pspec)
+        with override_settings(GRADED_PATTERN_PROCESSES=3):
+            # A warning would mean that it fell back to computing them serially
+            with self.assertNoLogs("customfit.helpers.parallel_helpers", "WARNING"):
+                parallel_gpp = GradedSweaterPatternPieces.make_from_schematic(gcs)
+
+        def summarize(pieces):
+            return [
+                (piece.cast_ons, piece.actual_hip)
+                for piece in pieces
+            ]
+
+        self.assertEqual(len(parallel_gpp.cardigan_sleeveds), 5)
+        self.assertEqual(
+            summarize(parallel_gpp.sweater_backs), summarize(serial_gpp.sweater_backs)
+        )
+        self.assertEqual(
+            summarize(parallel_gpp.cardigan_sleeveds),
+            summarize(serial_gpp.cardigan_sleeveds),
+        )
+        self.assertEqual(
+            [sleeve.cast_ons for sleeve in parallel_gpp.sleeves],
+            [sleeve.cast_ons for sleeve in serial_gpp.sleeves],
+        )
+
     def test_factory(self):
         GradedSweaterPatternPiecesFactory()
 
+    def test_get_pieces_by_type(self):
+        pspec = GradedCardiganPatternSpecFactory()
+        gcs = GradedSweaterSchematicFactory.from_pspec(pspec)
+        gpp = GradedSweaterPatternPieces.make_from_schematic(gcs)
+        gpp = GradedSweaterPatternPieces.objects.get(id=gpp.id)
+
+        # One query per piece-type, no matter how many grades
+        with self.assertNumQueries(7):
+            pieces_by_type = gpp.get_pieces_by_type()
+        self.assertEqual(len(pieces_by_type["sweater_back"]), 5)
+        self.assertEqual(len(pieces_by_type["cardigan_sleeved"]), 5)
+        self.assertEqual(len(pieces_by_type["sleeve"]), 5)
+        self.assertEqual(pieces_by_type["sweater_front"], [])
+
+        # and the grades can be assembled without going back to the database
+        with self.assertNumQueries(0):
+            grades = gpp._make_grades()
+            self.assertEqual(gpp.sweater_backs, pieces_by_type["sweater_back"])
+        self.assertEqual(len(grades), 5)
+        for grade in grades:
+            gp_grade_id = grade["sweater_back"].schematic.gp_grade_id
+            front = grade["cardigan_sleeved"]
+            self.assertEqual(front.schematic.gp_grade_id, gp_grade_id)
+            self.assertEqual(grade["sleeve"].schematic.gp_grade_id, gp_grade_id)
+            self.assertIs(grade["sleeve"].graded_pattern_pieces, gpp)
+
     def test_area_list(self):
         pspec = GradedCardiganVestPatternSpecFactory()
         gcs = GradedSweaterSchematicFactory.from_pspec(pspec)
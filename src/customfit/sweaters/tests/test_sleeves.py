@@ -5,7 +5,7 @@ from django.core.exceptions import ValidationError
 
 from customfit.bodies.factories import BodyFactory, SimpleBodyFactory, get_csv_body
 from customfit.stitches.tests import StitchFactory
-from customfit.swatches.factories import SwatchFactory
+from customfit.swatches.factories import GaugeFactory, SwatchFactory
 from customfit.userauth.factories import UserFactory
 
 from ..factories import (
@@ -25,6 +25,8 @@ from ..models import (
     SweaterIndividualGarmentParameters,
     SweaterSchematic,
 )
+from ..models.pieces.base_piece import clear_shaping_caches, shaping_cache_info
+from ..models.pieces.sleeves import _distribute_beads, compute_armcap_shaping
 
 # helper functions
 
@@ -1440,3 +1442,71 @@ class GradedSleeveTests(django.test.TestCase):
             GradedSleeveSchematic___gp_grade__grade=sweater_back.schematic.gp_grade.grade
         )
         GradedSleeve.make(sl_sch, sweater_back, roundings, ease_tolerances, spec_source)
+
+
+def _linear_distribute_beads(stitches, rows):
+    # The original bead game, moving one bead at a time. Kept as the reference
+    # for _distribute_beads.
+    one_count_beads = stitches
+    two_count_beads = 0
+    four_count_beads = 0
+    six_count_beads = 0
+
+    while True:
+        current_row_count = sum(
+            [
+                one_count_beads,
+                two_count_beads * 2,
+                four_count_beads * 4,
+                six_count_beads * 6,
+            ]
+        )
+        if current_row_count == rows:
+            return (one_count_beads, two_count_beads, four_count_beads, six_count_beads)
+        if not any([one_count_beads > 0, two_count_beads > 0, four_count_beads == 1]):
+            return None
+        if one_count_beads > 0:
+            one_count_beads -= 1
+            two_count_beads += 1
+        elif four_count_beads == 1:
+            four_count_beads = 0
+            six_count_beads += 1
+        else:
+            two_count_beads -= 1
+            four_count_beads = 1
+
+
+class ArmcapShapingTests(django.test.SimpleTestCase):
+
+    def setUp(self):
+        clear_shaping_caches()
+
+    def tearDown(self):
+        clear_shaping_caches()
+
+    def test_distribute_beads_matches_bead_game(self):
+        # Both int and (integral) float inputs, as produced by round()
+        for stitches, rows in itertools.product(range(-3, 41), range(-2, 250)):
+            for stitches_type, rows_type in itertools.product([int, float], repeat=2):
+                args = (stitches_type(stitches), rows_type(rows))
+                expected = _linear_distribute_beads(*args)
+                actual = _distribute_beads(*args)
+                self.assertEqual(actual, expected, args)
+                if expected is not None:
+                    self.assertEqual(
+                        [type(x) for x in actual], [type(x) for x in expected], args
+                    )
+
+    def test_armcap_shaping_memoized(self):
+        gauge = GaugeFactory.build(stitches=5, rows=7)
+        result1 = compute_armcap_shaping(gauge, 5, 4, 16.0, 70)
+        result2 = compute_armcap_shaping(
+            GaugeFactory.build(stitches=5, rows=7), 5, 4, 16.0, 70
+        )
+        self.assertEqual(result1, result2)
+        info = shaping_cache_info()["compute_armcap_shaping"]
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+        compute_armcap_shaping(GaugeFactory.build(stitches=5, rows=8), 5, 4, 16.0, 70)
+        info = shaping_cache_info()["compute_armcap_shaping"]
+        self.assertEqual((info.hits, info.misses), (1, 2))
@@ -7,6 +7,7 @@ from django.urls import reverse
 
 from customfit.design_wizard.exceptions import OwnershipInconsistency
 from customfit.design_wizard.tests.helpers import _fix_length_formatting
+from customfit.design_wizard.views.helpers import _save_pattern_pieces
 from customfit.stitches.tests import StitchFactory
 from customfit.userauth.factories import UserFactory
 
@@ -335,6 +336,8 @@ class _ApproveRedoViewGetTestMixin(object):
         ips = _make_IPS_from_IGP(user, igp)
         ipp = _make_IPP_from_IPS(ips)
         pattern = igp.get_spec_source().pattern
+        # The _make_* helpers compute in memory only
+        _save_pattern_pieces(ipp)
         pattern.update_with_new_pieces(ipp)
         return pattern
 
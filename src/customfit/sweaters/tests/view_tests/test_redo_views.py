@@ -855,6 +855,8 @@ class SweaterRedoUpdateTests(TestCase):
         )
         orig_response = self.client.get(patterntext_url)
         self.assertEqual(orig_response.status_code, 200)  # sanity check
+        # The patterntext is streamed, so the content can only be read once
+        orig_content = b"".join(orig_response.streaming_content).decode()
 
         orig_htmls = [
             "<li>Hourglass average fit</li>",
@@ -875,7 +877,7 @@ class SweaterRedoUpdateTests(TestCase):
         ]
         for orig_html in orig_htmls:
             # Sanity check orign patterntext
-            self.assertContains(orig_response, orig_html, html=True)
+            self.assertInHTML(orig_html, orig_content)
 
         # Now, redo the pattern
         # use same swatch
@@ -899,9 +901,10 @@ class SweaterRedoUpdateTests(TestCase):
 
         detail_view_url = approve_resp.redirect_chain[-1][0]
         new_patterntext_resp = self.client.get(detail_view_url)
+        new_content = b"".join(new_patterntext_resp.streaming_content).decode()
         for orig_html in orig_htmls:
             # Sanity check orign patterntext
-            self.assertNotContains(new_patterntext_resp, orig_html, html=True)
+            self.assertInHTML(orig_html, new_content, count=0)
 
         new_htmls = [
             "<li>Hourglass oversized fit</li>",
@@ -922,4 +925,4 @@ class SweaterRedoUpdateTests(TestCase):
         ]
         for new_html in new_htmls:
             # Sanity check orign patterntext
-            self.assertContains(new_patterntext_resp, new_html, html=True)
+            self.assertInHTML(new_html, new_content)
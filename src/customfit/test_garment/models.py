@@ -52,11 +52,20 @@ class TestDesign(Design):
     stitch1 = models.ForeignKey(Stitch, on_delete=models.CASCADE)
     test_length = LengthField()
 
+    def stitches_used(self):
+        return [self.stitch1]
+
+    def uses_stitch(self, stitch):
+        return stitch in self.stitches_used()
+
     def compatible_swatch(self, swatch):
         # Just to implment something non-trivial:
         swatch_stitch = swatch.get_stitch()
         return self.stitch1.is_compatible(swatch_stitch)
 
+    def compatible_swatches(self, swatches):
+        return swatches.compatible_with_stitches([self.stitch1])
+
 
 class TestDesignWithBody(TestDesign):
     pass
@@ -83,6 +92,9 @@ class BaseTestPatternSpec(models.Model):
     def compatible_swatch(self, swatch):
         return swatch.get_stitch().is_compatible(self.stitch1)
 
+    def compatible_swatches(self, swatches):
+        return swatches.compatible_with_stitches([self.stitch1])
+
     def get_garment(self):
         return "test_garment"
 
@@ -197,13 +197,10 @@ class TestApproveViewMixin(object):
         user = request.user
         ips = TestGarmentSchematic.make_from_garment_parameters(igp)
         ips.clean()
-        ips.save()
         ipp = TestPatternPieces.make_from_schematic(ips)
         ipp.clean()
-        ipp.save()
         pattern = TestIndividualPattern.make_from_individual_pattern_pieces(user, ipp)
         pattern.clean()
-        pattern.save()
         return pattern
 
     def get_context_data(self, **kwargs):
@@ -230,10 +227,8 @@ class TestRedoApproveView(TestApproveViewMixin, RedoApproveView):
     def _make_new_pieces(self, request, igp):
         ips = TestGarmentSchematic.make_from_garment_parameters(igp)
         ips.clean()
-        ips.save()
         ipp = TestPatternPieces.make_from_schematic(ips)
         ipp.clean()
-        ipp.save()
         return ipp
 
     def _make_pattern(self, request, igp):
@@ -245,7 +240,6 @@ class TestRedoApproveView(TestApproveViewMixin, RedoApproveView):
         ipp = self._make_new_pieces(request, igp)
         pattern = TestIndividualPattern.make_from_individual_pattern_pieces(user, ipp)
         pattern.clean()
-        pattern.save()
         return pattern
 
     def get_pattern(self):
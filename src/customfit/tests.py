@@ -3,6 +3,8 @@ import logging
 import unittest.mock as mock
 from urllib.parse import urljoin
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import (
     LiveServerTestCase,
@@ -20,6 +22,11 @@ import customfit.designs.helpers.design_choices as DC
 import customfit.views
 from customfit.designs.factories import DesignFactory
 from customfit.designs.models import Collection, Design
+from customfit.helpers.asset_helpers import (
+    clear_pdf_asset_cache,
+    find_static_asset,
+    pdf_asset_cache_info,
+)
 from customfit.test_garment.factories import (
     TestApprovedIndividualPatternFactory,
     TestApprovedIndividualPatternWithBodyFactory,
@@ -100,8 +107,19 @@ class ViewHelperTests(TestCase):
             self.assertNotEqual(three[1], three[2])
             for design in three:
                 self.assertIn(
-                    design,
-                    [design1, design2, design3, design4, design5, design6, design7],
+                    design.id,
+                    [
+                        d.id
+                        for d in [
+                            design1,
+                            design2,
+                            design3,
+                            design4,
+                            design5,
+                            design6,
+                            design7,
+                        ]
+                    ],
                 )
 
         # If we ask for 1000 promoted designs, we should get 1000 with repeats,
@@ -120,6 +138,46 @@ class ViewHelperTests(TestCase):
             self.assertNotEqual(lots[index], lots[index + 6])
 
 
+class PdfUrlFetcherTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        clear_pdf_asset_cache()
+
+    def tearDown(self):
+        cache.clear()
+        clear_pdf_asset_cache()
+
+    def test_local_asset(self):
+        url = settings.STATIC_URL + "img/CF_Favicon.png"
+        with open(find_static_asset("img/CF_Favicon.png"), "rb") as f:
+            contents = f.read()
+        asset = customfit.views.pdf_url_fetcher(url)
+        self.assertEqual(asset["string"], contents)
+        self.assertEqual(asset["mime_type"], "image/png")
+
+        # The second time, from memory
+        with mock.patch("customfit.views.read_static_asset") as mock_read:
+            asset = customfit.views.pdf_url_fetcher(url)
+        mock_read.assert_not_called()
+        self.assertEqual(asset["string"], contents)
+        info = pdf_asset_cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_remote_asset(self):
+        url = "https://example.com/media/image.png"
+        with mock.patch(
+            "customfit.views.default_url_fetcher",
+            return_value={"string": b"contents", "mime_type": "image/png"},
+        ) as mock_fetcher:
+            customfit.views.pdf_url_fetcher(url)
+            asset = customfit.views.pdf_url_fetcher(url)
+        mock_fetcher.assert_called_once_with(url)
+        self.assertEqual(asset, {"string": b"contents", "mime_type": "image/png"})
+        # Also shared with other processes through the cache
+        self.assertEqual(cache.get(url), asset)
+
+
 class StaffPageViewTests(TestCase):
 
     def tearDown(self):
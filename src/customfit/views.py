@@ -1,9 +1,9 @@
 import functools
+import hashlib
 import itertools
 import logging
-import mimetypes
-import os
 import random
+import time
 from io import BytesIO
 from urllib.parse import urlparse
 
@@ -20,7 +20,21 @@ from PyPDF2 import PdfReader, PdfWriter
 from weasyprint import HTML, default_url_fetcher
 
 from customfit.bodies.models import Body
-from customfit.designs.models import Collection, Design
+from customfit.designs.catalog import get_design_catalog
+from customfit.helpers.asset_helpers import (
+    get_pdf_asset,
+    pdf_asset_cache_info,
+    read_static_asset,
+)
+from customfit.helpers.cache_helpers import (
+    SingleFlightTimeout,
+    get_or_set_single_flight,
+)
+from customfit.helpers.profile_helpers import (
+    profile,
+    time_pdf_layout,
+    time_pdf_write,
+)
 from customfit.swatches.models import Swatch
 
 logger = logging.getLogger(__name__)
@@ -39,15 +53,16 @@ def _get_designs(return_count):
       that random sequence over and over again as many times as we need.
     * If we never get *any* designs at all, return None.
 
+    The designs are DesignCards (see customfit.designs.catalog) from the cached
+    catalog, so that the home and about pages make no design queries.
+
     Should be replaced when proper photo management exists.
     """
+    catalog = get_design_catalog()
 
-    curr_design_set = list(Design.currently_promoted.all())
-    # Note: Collections is currently ordered by '-creation_date' by default, but
-    # no harm in enforcing it again here, where we really need it.
-    displayable_collections_by_date = Collection.displayable.order_by(
-        "-creation_date"
-    ).iterator()
+    curr_design_set = catalog.currently_promoted()
+    # Note: the catalog's collections are newest-first
+    displayable_collections_by_date = iter(catalog.collections())
 
     # Note: the latest collection is automatically included in Designs.currently_promoted, so
     # we pop it off before adding collections by date
@@ -58,12 +73,11 @@ def _get_designs(return_count):
 
     while len(curr_design_set) < return_count:
         try:
-            next_collection = next(displayable_collections_by_date)
+            new_designs = next(displayable_collections_by_date)
         except StopIteration:
             break
         else:
-            new_designs = next_collection.visible_designs
-            curr_design_set += list(new_designs)  #
+            curr_design_set += new_designs
 
     # At this point, we either have enough designs to draw without replacement
     # or we've run out of Collections and need to shuffle and repeat. First,
@@ -137,17 +151,22 @@ def pdf_url_fetcher(url):
     for retrieving those assets, and we're going to take advantage of
     that opportunity.
 
-    1) First, it attempts to find the file locally. That is, it turns
+    0) Assets already fetched by this process are kept in memory (see
+    customfit.helpers.asset_helpers) and returned from there.
+
+    1) Otherwise, it attempts to find the file locally. That is, it turns
     STATIC_URL and MEDIA_URL into paths into the relevant directory in
     static. This bypasses the collectstatic mechanism.
 
     2) If the relevant file is not there, however (as would be the
     case for images uploaded through the admin interface, or
     thumbnails created by easy-thumbnails) then this function will
-    call _get_data_url to get it from the cache (possibly fetching
-    it first).
+    get it from the cache (possibly fetching it first).
     """
+    return get_pdf_asset(url, lambda: _fetch_pdf_asset(url))
+
 
+def _fetch_pdf_asset(url):
     # If is a local file? This is trickier than it seems, since we need to determine
     # it just from the URL provided-- and the URL provided can differ significantly
     # between local dev environments and Heroku.
@@ -165,7 +184,7 @@ def pdf_url_fetcher(url):
     # So in this next bit, we try to figure out if the URL falls into either of the above cases and
     # (if so) if the file can be found locally.
 
-    logger.info("pdf_url_fetcher called on url %s", url)
+    logger.info("pdf_url_fetcher fetching url %s", url)
 
     url_parts = urlparse(url)
     url_netloc = url_parts.netloc
@@ -195,30 +214,15 @@ def pdf_url_fetcher(url):
                 local_rel_path,
             )
 
-        # Get the path to the static directory.
-        project_root = os.path.dirname(os.path.realpath(__file__))
-        project_static_root = os.path.join(project_root, "static")
-
-        # Try to find the file
-        local_path = os.path.join(project_static_root, local_rel_path)
-        logger.debug(
-            "Adding a basepath of %s, and looking locally for %s",
-            project_static_root,
-            local_path,
-        )
-        if os.path.isfile(local_path):
+        # Look for the file in the index of the static directory. For the format/
+        # structure of the dict being returned, see WeasyPrint documentation
+        # http://weasyprint.readthedocs.io/en/latest/api.html#weasyprint.default_url_fetcher
+        return_me = read_static_asset(local_rel_path)
+        if return_me is not None:
             logger.info("%s found locally. Returning it.", local_rel_path)
-            f = open(local_path, "rb")
-            # For questions about the format/structure of the
-            # dict being returned, see WeasyPrint documentation
-            # http://weasyprint.readthedocs.io/en/latest/api.html#weasyprint.default_url_fetcher
-            return_me = {"file_obj": f}
-            (mime_type, encoding) = mimetypes.guess_type(local_path)
-            return_me["mime_type"] = mime_type
-            return_me["encoding"] = encoding
             return return_me
         else:
-            logger.info("%s not found locally.", local_path)
+            logger.info("%s not found locally.", local_rel_path)
 
             # No 'return' needed. If the file is not there, then we just proceed as if the URL
             # was not to our static files in the first place
@@ -235,7 +239,7 @@ def pdf_url_fetcher(url):
         # 'string' key and cache/return that. See the WeasyPrint documentation
         # http://weasyprint.readthedocs.io/en/latest/api.html#weasyprint.default_url_fetcher
 
-        f = return_me.pop("file_obj")
+        f = return_me.pop("file_obj", None)
         if f is not None:
             if "string" not in return_me:
                 return_me["string"] = f.read()
@@ -261,11 +265,43 @@ class MakePdfMixin(object):
     * make_html(context)
     * get_base_url()
     * get_cover_sheet()
+    * get_pdf_sections(context)
+    * queue_pdf_render()
+    * load_or_render_pdf(render) and has_stored_pdf()
+    * get_cache_fingerprint()
+    * profile_render(label)
     """
 
+    # How often a download polls the cache while waiting for a PDF that is being
+    # rendered elsewhere.
+    pdf_wait_poll_interval = 0.25
+
+    # The time.monotonic() by which a download has to have its PDF, set by
+    # render_to_response(). None (as for views made by tasks and commands) means
+    # that waits for other renders are not counted against a single budget, and
+    # end in rendering the PDF anyway.
+    pdf_deadline = None
+
+    # When a download that ran out of time asks the user to try again
+    pdf_retry_seconds = 5
+    pdf_not_ready_template_name = "pdf_not_ready.html"
+
     def get_cover_sheet(self):
         return None
 
+    def get_pdf_sections(self, context):
+        """
+        Return the names of the sections to render as separate PDF fragments, in
+        order. Each fragment is cached on its own (keyed on its HTML) so that
+        only the fragments that change need to go through WeasyPrint again. The
+        fragments are then concatenated. The template sees the section being
+        rendered as `pdf_section`, and the page number it starts on as
+        `pdf_first_page`.
+
+        The default (an empty list) renders the whole document in one go.
+        """
+        return []
+
     def make_file_name(self):
         object_name = self.get_object_name()
         slug = slugify(object_name)
@@ -287,9 +323,34 @@ class MakePdfMixin(object):
         base_url = self.request.build_absolute_uri()
         return base_url
 
+    def get_cache_fingerprint(self):
+        """
+        Return a string identifying the contents of the PDF, to build its cache key
+        from. The default is the id of the object. Subclasses can override this to
+        return a fingerprint of what the PDF is rendered from, so that the key
+        changes when that does.
+        """
+        return str([self.object.id])
+
+    def profile_render(self, label):
+        """
+        Return a context manager that profiles the render inside it (see
+        customfit.helpers.profile_helpers). Subclasses can override this to
+        identify what is being rendered, or to keep the results.
+        """
+        return profile(label, object_id=self.object.id)
+
     def _make_cache_key(self):
-        ids = [self.object.id]
-        key = "pdf:%s:%s" % (self.__class__.__name__, ids)
+        key = "pdf:%s:%s" % (self.__class__.__name__, self.get_cache_fingerprint())
+        key = key.replace(" ", "_")  # Memcached doesn't like spaces
+        return key
+
+    def _make_section_cache_key(self, section_name, html):
+        # Keyed on the HTML itself, so that these never need to be flushed: if
+        # the section changes, so does its key. Sections with the same HTML (those
+        # of duplicate patterns, say) share their PDF.
+        digest = hashlib.sha1(html.encode("utf-8")).hexdigest()
+        key = "pdf:%s:%s:%s" % (self.__class__.__name__, section_name, digest)
         key = key.replace(" ", "_")  # Memcached doesn't like spaces
         return key
 
@@ -297,47 +358,172 @@ class MakePdfMixin(object):
         cache_key = self._make_cache_key()
         cache.delete(cache_key)
 
-    def make_pdf(self):
+    def _make_render_marker_key(self):
+        return "rendering:" + self._make_cache_key()
+
+    def claim_pdf_render(self):
         """
-        Allow direct access to the xhtml2pdf engine using the callback method of
-        this class. Note: broken out into its own method so that it can be used
-        by the make_sample_files management command.
+        Record that this PDF is being rendered (or is queued to be rendered) by
+        a worker. Returns False if someone else already claimed it. The claim
+        expires on its own, so that a worker dying mid-render can't leave
+        downloads waiting forever.
+        """
+        timeout = 4 * settings.PDF_DOWNLOAD_WAIT_SECONDS
+        return cache.add(self._make_render_marker_key(), True, timeout)
+
+    def release_pdf_render(self):
+        cache.delete(self._make_render_marker_key())
+
+    def pdf_render_in_flight(self):
+        return cache.get(self._make_render_marker_key()) is not None
+
+    def queue_pdf_render(self):
+        """
+        Ask a worker to render (and cache) this PDF, and release the render-claim
+        when done. Return False if this view can't do that, in which case the PDF
+        is rendered in the request.
+        """
+        return False
+
+    def load_or_render_pdf(self, render):
+        """
+        Called when the PDF is not in the cache, to produce it by calling render().
+        Subclasses can override this (and has_stored_pdf()) to keep PDFs somewhere
+        that outlasts the cache.
         """
+        return render()
+
+    def has_stored_pdf(self):
+        return False
 
+    def wait_for_pdf(self):
+        """
+        Called before making a PDF for download. Return True if make_pdf() can go
+        ahead: the PDF is in the cache (or stored elsewhere), or this view can't
+        hand it to a worker, and so renders it in the request.
+
+        Otherwise, if a worker is rendering the PDF (as one usually is just after
+        the pattern is approved), wait for that render to finish rather than
+        starting a second one. If nobody is rendering it, hand it to a worker
+        (ahead of any speculative renders) and wait for that. Return False if the
+        PDF isn't ready by `pdf_deadline`.
+        """
         cache_key = self._make_cache_key()
-        pdf = cache.get(cache_key)
-        if pdf is None:
+        if cache.get(cache_key) is not None or self.has_stored_pdf():
+            return True
+
+        if self.claim_pdf_render():
+            if not self.queue_pdf_render():
+                self.release_pdf_render()
+                return True
+
+        while cache.get(cache_key) is None:
+            if not self.pdf_render_in_flight():
+                # The next download will queue it again
+                logger.warning("PDF render finished without caching %s", cache_key)
+                return False
+            if time.monotonic() >= self.pdf_deadline:
+                logger.warning("Gave up waiting for PDF render of %s", cache_key)
+                return False
+            time.sleep(self.pdf_wait_poll_interval)
+        return True
+
+    @staticmethod
+    def _html_to_pdf(html):
+        pdf_buffer = BytesIO()
+        with time_pdf_layout():
+            document = HTML(string=html, url_fetcher=pdf_url_fetcher).render()
+        with time_pdf_write():
+            document.write_pdf(target=pdf_buffer)
+        pdf = pdf_buffer.getvalue()
+        pdf_buffer.close()
+        asset_info = pdf_asset_cache_info()
+        logger.debug(
+            "PDF asset cache: %s hits, %s misses, %s of %s bytes used",
+            asset_info.hits,
+            asset_info.misses,
+            asset_info.currsize,
+            asset_info.maxsize,
+        )
+        return pdf
 
-            context = self.get_context_data(object=self.object)
+    @staticmethod
+    def _concatenate_pdfs(pdf_files):
+        result = PdfWriter()
+        for pdf_file in pdf_files:
+            for page in PdfReader(pdf_file).pages:
+                result.add_page(page)
+        combined_pdf_buffer = BytesIO()
+        result.write(combined_pdf_buffer)
+        pdf = combined_pdf_buffer.getvalue()
+        combined_pdf_buffer.close()
+        return pdf
+
+    def _get_or_render(self, cache_key, render):
+        # If two requests (say, both PDF links clicked at once) miss the cache
+        # together, only one of them goes through WeasyPrint. A download waits
+        # for the other only as long as its deadline allows, and then gives up
+        # rather than rendering the PDF itself.
+        if self.pdf_deadline is None:
+            wait_timeout = settings.PDF_DOWNLOAD_WAIT_SECONDS
+        else:
+            wait_timeout = max(0, self.pdf_deadline - time.monotonic())
+        return get_or_set_single_flight(
+            cache_key,
+            render,
+            lock_timeout=4 * settings.PDF_DOWNLOAD_WAIT_SECONDS,
+            wait_timeout=wait_timeout,
+            poll_interval=self.pdf_wait_poll_interval,
+            compute_after_wait=self.pdf_deadline is None,
+        )
+
+    def _make_sectioned_pdf(self, context, sections):
+        fragments = []
+        first_page = 1
+        for section_name in sections:
+            context["pdf_section"] = section_name
+            context["pdf_first_page"] = first_page
             html = self.make_html(context)
 
-            pdf_buffer = BytesIO()
-            HTML(string=html, url_fetcher=pdf_url_fetcher).write_pdf(target=pdf_buffer)
-            pdf_buffer.seek(0)
+            cache_key = self._make_section_cache_key(section_name, html)
+            fragment = self._get_or_render(
+                cache_key, functools.partial(self._html_to_pdf, html)
+            )
 
+            fragment_buffer = BytesIO(fragment)
+            first_page += len(PdfReader(fragment_buffer).pages)
+            fragments.append(fragment_buffer)
 
-            cache.set(cache_key, pdf_buffer.getvalue())
-            pdf = pdf_buffer.getvalue()
-            pdf_buffer.close()
-        else:
-            logger.info("PDF found in cache")
+        return self._concatenate_pdfs(fragments)
+
+    def make_pdf(self):
+        """
+        Allow direct access to the xhtml2pdf engine using the callback method of
+        this class. Note: broken out into its own method so that it can be used
+        by the make_sample_files management command.
+        """
+
+        def render():
+            context = self.get_context_data(object=self.object)
+            sections = self.get_pdf_sections(context)
+            if sections:
+                return self._make_sectioned_pdf(context, sections)
+            else:
+                html = self.make_html(context)
+                return self._html_to_pdf(html)
+
+        with self.profile_render("pdf:" + self.__class__.__name__):
+            pdf = self._get_or_render(
+                self._make_cache_key(),
+                functools.partial(self.load_or_render_pdf, render),
+            )
 
         cover_sheet = self.get_cover_sheet()
 
         if cover_sheet:
             # use pyPdf to stitch together the cover sheet and the PDF
             try:
-                pdf_buffer = BytesIO(pdf)
-                result = PdfFileWriter()
-                for pdf_file in [cover_sheet, pdf_buffer]:
-                    input = PdfFileReader(pdf_file)
-                    for page_num in range(input.numPages):
-                        result.addPage(input.getPage(page_num))
-                combined_pdf_buffer = BytesIO()
-                result.write(combined_pdf_buffer)
-                pdf = combined_pdf_buffer.getvalue()
-                pdf_buffer.close()
-                combined_pdf_buffer.close()
+                pdf = self._concatenate_pdfs([cover_sheet, BytesIO(pdf)])
             except:
                 logger.exception("exception raised while trying to glue on cover sheet")
         else:
@@ -345,7 +531,32 @@ class MakePdfMixin(object):
 
         return pdf
 
+    def pdf_not_ready_response(self):
+        """
+        Return the response to a download whose PDF wasn't ready in time: a 202
+        (Accepted) with a page that asks for the PDF again after
+        `pdf_retry_seconds`.
+        """
+        context = {"retry_seconds": self.pdf_retry_seconds}
+        content = loader.render_to_string(
+            self.pdf_not_ready_template_name, context, self.request
+        )
+        response = HttpResponse(content, status=202)
+        response["Retry-After"] = str(self.pdf_retry_seconds)
+        return response
+
     def render_to_response(self, context, **response_kwargs):
+        # All the waiting a download does, for a worker's render or for another
+        # request's, comes out of the one budget, so that the request ends well
+        # within gunicorn's timeout.
+        self.pdf_deadline = time.monotonic() + settings.PDF_DOWNLOAD_WAIT_SECONDS
+        try:
+            if not self.wait_for_pdf():
+                return self.pdf_not_ready_response()
+            pdf = self.make_pdf()
+        except SingleFlightTimeout:
+            return self.pdf_not_ready_response()
+
         response = HttpResponse(content_type="application/pdf")
 
         filename = self.make_file_name()
@@ -353,7 +564,6 @@ class MakePdfMixin(object):
 
         response["Content-Disposition"] = disposition
 
-        pdf = self.make_pdf()
         response.write(pdf)
         return response
 